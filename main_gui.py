@@ -1,7 +1,6 @@
 # main_gui.py
 import sys
 import os
-import time
 from pathlib import Path 
 
 # PyInstaller --windowed mode 'fileno' 오류 해결용 패치
@@ -11,16 +10,26 @@ if sys.stderr is None:
     sys.stderr = open(os.devnull, "w")
 
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
-from contextlib import redirect_stdout
 import io
+import itertools
+import collections
+import datetime as dt
+import tkinter.font as tkfont
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+import matplotlib.dates as mdates
 
 # 'src' 폴더에서 핵심 로직들을 임포트
 try:
-    from src.storage import append_row, load_logs, DEFAULT_LOG_PATH
-    from src.measure import safe_measure
-    from src.visualize import plot_logs, analyze_logs
+    from src.storage import log_fingerprint, DEFAULT_LOG_PATH
+    from src.engine import MeasureEngine
+    from src.visualize import analyze_logs
+    from src.pyramid import query as query_pyramid
+    from src.rollup import load_combined
+    from src.analysis import load_cached, save_cached
 except ImportError:
     messagebox.showerror(
         "모듈 임포트 오류", 
@@ -29,10 +38,102 @@ except ImportError:
     )
     sys.exit(1)
 
+class LogView(ttk.Frame):
+    """
+    최근 max_lines줄만 보관하는 링 버퍼 로그 창.
+    Text 위젯에는 지금 보이는 줄만 그리므로 자동 측정을 며칠씩 돌려도 메모리와 다시 그리는 비용이 일정합니다.
+    맨 아래를 보고 있으면 새 줄을 따라가고, 위로 스크롤해 둔 동안에는 보던 줄을 그대로 보여줍니다.
+    """
+    # 줄이 연달아 추가될 때 다시 그리기를 모으는 간격 (ms)
+    RENDER_DELAY_MS = 50
+    WHEEL_LINES = 3
+
+    def __init__(self, master, max_lines: int = 2000, height: int = 10):
+        super().__init__(master)
+        self.lines = collections.deque(maxlen=max_lines)
+        self.top = 0 # 화면 첫 줄의 버퍼 위치
+        self.follow = True
+        self._render_pending = None
+
+        self.text = tk.Text(self, height=height, wrap=tk.NONE, state=tk.DISABLED)
+        self.vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        xbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.configure(xscrollcommand=xbar.set)
+        self.text.grid(row=0, column=0, sticky=tk.NSEW)
+        self.vbar.grid(row=0, column=1, sticky=tk.NS)
+        xbar.grid(row=1, column=0, sticky=tk.EW)
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self._linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+
+        self.text.bind("<Configure>", lambda e: self._schedule_render())
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text.bind(seq, self._on_wheel)
+
+    def append(self, message: str):
+        """ 줄을 추가합니다 (메인 스레드 전용). 다시 그리기는 RENDER_DELAY_MS 안의 추가분을 모아 한 번만 합니다. """
+        for line in message.splitlines() or [""]:
+            if len(self.lines) == self.lines.maxlen and not self.follow:
+                self.top = max(self.top - 1, 0) # 맨 앞 줄이 밀려나도 보던 줄을 그대로 유지
+            self.lines.append(line)
+        self._schedule_render()
+
+    def _visible_rows(self) -> int:
+        inner = self.text.winfo_height() - 2 * sum(
+            int(str(self.text.cget(opt))) for opt in ("borderwidth", "highlightthickness", "pady"))
+        return max(inner // self._linespace, 1)
+
+    def _schedule_render(self):
+        if self._render_pending is None:
+            self._render_pending = self.after(self.RENDER_DELAY_MS, self._render)
+
+    def _render(self):
+        self._render_pending = None
+        rows = self._visible_rows()
+        total = len(self.lines)
+        last = max(total - rows, 0)
+        self.top = last if self.follow else min(self.top, last)
+
+        x = self.text.xview()[0]
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(itertools.islice(self.lines, self.top, self.top + rows)))
+        self.text.config(state=tk.DISABLED)
+        self.text.xview_moveto(x)
+        if total:
+            self.vbar.set(self.top / total, min(self.top + rows, total) / total)
+        else:
+            self.vbar.set(0, 1)
+
+    def _scroll_to(self, top: int):
+        last = max(len(self.lines) - self._visible_rows(), 0)
+        self.top = min(max(top, 0), last)
+        self.follow = self.top >= last
+        self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * len(self.lines)))
+        else: # "scroll", n, "units" | "pages"
+            step = self._visible_rows() if unit == "pages" else 1
+            self._scroll_to(self.top + int(amount) * step)
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self._scroll_to(self.top + (-self.WHEEL_LINES if up else self.WHEEL_LINES))
+        return "break"
+
+
 class NetSpeedApp:
     # --- 플레이스홀더 상수 정의 ---
     PLACEHOLDER_HOST = "8.8.8.8 (기본: Google 서버)"
     PLACEHOLDER_COLOR = "grey"
+    # 분석 결과 캐시에 보관할 최대 로그 지문 수
+    ANALYSIS_CACHE_SIZE = 8
+    # 결과 로그 창에 보관할 최대 줄 수 (오래된 줄부터 버림)
+    LOG_MAX_LINES = 2000
+    # 작업 스레드가 보낸 상태 문구/로그 줄을 모아 화면에 반영하는 간격 (ms)
+    POST_FLUSH_MS = 250
     
     def __init__(self, root):
         self.root = root
@@ -42,7 +143,16 @@ class NetSpeedApp:
         # --- 스레드 제어용 변수 ---
         self.measure_thread = None
         self.loop_thread = None
-        self.stop_event = threading.Event() 
+        self.engine = None # 실행 중인 MeasureEngine (1회/자동 측정 공용)
+        self.analyze_thread = None
+        self.analyze_stop_event = threading.Event()
+        # 분석 결과 캐시: 로그 지문(log_fingerprint) -> 리포트 텍스트
+        self.analysis_cache = {}
+        # 작업 스레드 -> 화면 전달용 (_post_status, _post_log)
+        self._post_lock = threading.Lock()
+        self._pending_status = None
+        self._pending_lines = []
+        self._flush_scheduled = False
 
         # --- 메인 프레임 ---
         main_frame = ttk.Frame(self.root, padding="10")
@@ -142,8 +252,8 @@ class NetSpeedApp:
         self.status_label = ttk.Label(main_frame, text="대기 중...")
         self.status_label.pack(pady=5)
 
-        self.result_text = scrolledtext.ScrolledText(main_frame, height=10, wrap=tk.WORD, state=tk.DISABLED)
-        self.result_text.pack(pady=5, fill=tk.BOTH, expand=True)
+        self.result_log = LogView(main_frame, max_lines=self.LOG_MAX_LINES, height=10)
+        self.result_log.pack(pady=5, fill=tk.BOTH, expand=True)
         
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -190,14 +300,54 @@ class NetSpeedApp:
         self.root.destroy()
 
     def _update_status(self, message):
-        self.status_label.config(text=message)
+        if self.status_label.cget("text") != message:
+            self.status_label.config(text=message)
 
     def _update_result_text(self, message):
         if self.root.winfo_exists():
-            self.result_text.config(state=tk.NORMAL)
-            self.result_text.insert(tk.END, message + "\n")
-            self.result_text.see(tk.END) 
-            self.result_text.config(state=tk.DISABLED)
+            self.result_log.append(message)
+
+    # --- 작업 스레드에서 화면 갱신 요청 ---
+    # 스레드마다 root.after를 부르면 Tk 이벤트 큐에 요청이 쌓이므로, 모아 두었다가
+    # POST_FLUSH_MS마다 한 번만 반영합니다 (상태 문구는 마지막 것만, 로그 줄은 모두).
+    def _post_status(self, message):
+        with self._post_lock:
+            self._pending_status = message
+        self._schedule_flush()
+
+    def _post_log(self, message):
+        with self._post_lock:
+            self._pending_lines.append(message)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        with self._post_lock:
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            self.root.after(self.POST_FLUSH_MS, self._flush_posts)
+        except (RuntimeError, tk.TclError):
+            pass # 창이 이미 닫힘
+
+    def _flush_posts(self):
+        with self._post_lock:
+            status, lines = self._pending_status, self._pending_lines
+            self._pending_status, self._pending_lines = None, []
+            self._flush_scheduled = False
+        if not self.root.winfo_exists():
+            return
+        for line in lines:
+            self.result_log.append(line)
+        if status is not None:
+            self._update_status(status)
+
+    def _call_soon(self, func, *args):
+        """ 작업 스레드에서 func을 메인 스레드로 넘깁니다 (이미 보낸 상태/로그 줄을 먼저 반영). """
+        try:
+            self.root.after(0, lambda: (self._flush_posts(), func(*args)))
+        except (RuntimeError, tk.TclError):
+            pass
 
     def _lock_ui_for_measurement(self, is_looping=False):
         self.host_entry.config(state=tk.DISABLED)
@@ -216,9 +366,11 @@ class NetSpeedApp:
             self.start_loop_button.config(state=tk.DISABLED)
             self.stop_loop_button.config(state=tk.DISABLED)
 
-    def _unlock_ui(self):
+    def _unlock_ui(self, message="대기 중..."):
         if not self.root.winfo_exists():
             return
+        with self._post_lock:
+            self._pending_status = None # 아직 반영되지 않은 진행 상태가 완료 문구를 덮지 않게
             
         self.host_entry.config(state=tk.NORMAL)
         # 작업 완료 후에도 비어있으면 플레이스홀더 복원 (수정됨)
@@ -236,41 +388,27 @@ class NetSpeedApp:
         self.interval_entry.config(state=tk.NORMAL)
         self.count_entry.config(state=tk.NORMAL)
         
-        self.status_label.config(text="대기 중...")
+        self.status_label.config(text=message)
         self.loop_thread = None
         self.measure_thread = None
 
     # --- 1. 1회 측정 로직 (수정됨) ---
     def start_measure_thread(self):
         self._lock_ui_for_measurement()
+        self.status_label.config(text="측정 중... (평균 1분 소요)")
         
-        host = self.get_host() # 수정된 get_host 사용
-        log_path = self.get_log_path()
-        
-        self.status_label.config(text=f"측정 중... (대상: {host})")
-
-        self.measure_thread = threading.Thread(
-            target=self.run_measure_once_worker,
-            args=(host, log_path) 
+        # 엔진에 현재 설정값을 전달 (1회 측정 = count 1)
+        self.engine = MeasureEngine(
+            host=self.get_host(),
+            log_path=self.get_log_path(),
+            count=1,
+            on_result=lambda i, row: self._post_log(f"[측정 완료] {row}"),
+            on_error=lambda i, e: self._post_log(f"[오류 발생] {e}"),
+            on_finish=lambda cancelled: self._call_soon(self._unlock_ui),
         )
-        self.measure_thread.daemon = True
-        self.measure_thread.start()
+        self.measure_thread = self.engine.start()
 
-    def run_measure_once_worker(self, host: str, log_path: Path):
-        try:
-            row = safe_measure(host=host) 
-            append_row(row, log_path=log_path) 
-            result_message = f"[측정 완료] {row}"
-        except Exception as e:
-            result_message = f"[오류 발생] {e}"
-        
-        self.root.after(0, self.update_gui_after_measure, result_message)
-
-    def update_gui_after_measure(self, result_message):
-        self._update_result_text(result_message)
-        self._unlock_ui()
-
-    # --- 2. 자동 측정 로직 (수정됨) ---
+    # --- 2. 자동 측정 로직 (MeasureEngine 사용) ---
     def start_loop_thread(self):
         try:
             interval_sec = int(self.interval_entry.get())
@@ -282,115 +420,292 @@ class NetSpeedApp:
             if count < 0:
                 messagebox.showerror("입력 오류", "측정 횟수는 0 이상이어야 합니다.")
                 return
+
         except ValueError:
             messagebox.showerror("입력 오류", "간격과 횟수는 숫자여야 합니다.")
             return
 
-        self.stop_event.clear() 
         self._lock_ui_for_measurement(is_looping=True)
-        
-        host = self.get_host() # 수정된 get_host 사용
-        log_path = self.get_log_path()
-        
-        self.status_label.config(text=f"자동 측정 시작됨... (대상: {host})")
+        self.status_label.config(text="자동 측정 시작됨...")
 
-        self.loop_thread = threading.Thread(
-            target=self.run_loop_worker,
-            args=(interval_sec, count if count > 0 else None, host, log_path)
-        )
-        self.loop_thread.daemon = True
-        self.loop_thread.start()
+        count = count if count > 0 else None
 
-    def run_loop_worker(self, interval_sec, count, host: str, log_path: Path):
-        i = 0
-        while not self.stop_event.is_set():
-            i += 1
-            
+        def on_start(i):
             count_str = f"{i}/{count}" if count else f"{i}회"
-            self.root.after(0, self._update_status, f"자동 측정 중... ({count_str})")
-            
-            try:
-                row = safe_measure(host=host)
-                append_row(row, log_path=log_path)
-                self.root.after(0, self._update_result_text, f"[자동 측정 {i}회] {row}")
-            except Exception as e:
-                self.root.after(0, self._update_result_text, f"[자동 측정 오류] {e}")
-
-            if count and i >= count:
-                self.root.after(0, self._update_status, f"자동 측정 완료 ({count}회).")
-                break
-            
-            wait_time = 0
-            while wait_time < interval_sec and not self.stop_event.is_set():
-                time.sleep(1) 
-                wait_time += 1
-                
-                remaining = interval_sec - wait_time
-                if remaining > 0 and not self.stop_event.is_set():
-                     self.root.after(0, self._update_status, f"다음 측정까지 {remaining}초...")
-
-        if self.stop_event.is_set():
-            self.root.after(0, self._update_status, "자동 측정이 중지되었습니다.")
-        
-        self.root.after(0, self._unlock_ui) 
+            self._post_status(f"자동 측정 중... ({count_str})")
+
+        def on_finish(cancelled):
+            if cancelled:
+                self._call_soon(self._unlock_ui, "자동 측정이 중지되었습니다.")
+            elif count:
+                self._call_soon(self._unlock_ui, f"자동 측정 완료 ({count}회).")
+            else:
+                self._call_soon(self._unlock_ui)
+
+        # 엔진에 설정값 전달
+        self.engine = MeasureEngine(
+            host=self.get_host(),
+            log_path=self.get_log_path(),
+            interval_sec=interval_sec,
+            count=count,
+            on_start=on_start,
+            on_result=lambda i, row: self._post_log(f"[자동 측정 {i}회] {row}"),
+            on_error=lambda i, e: self._post_log(f"[자동 측정 오류] {e}"),
+            on_wait=lambda remaining: self._post_status(f"다음 측정까지 {remaining}초..."),
+            on_finish=on_finish,
+        )
+        self.loop_thread = self.engine.start()
 
     def stop_loop_thread(self):
         if self.loop_thread and self.loop_thread.is_alive():
-            self.stop_event.set()
+            # 진행 중인 speedtest도 약 1초 이내에 중단됨
+            self.engine.stop()
             self.stop_loop_button.config(state=tk.DISABLED)
             self.status_label.config(text="자동 측정 중지 중...")
 
     # --- 3. 분석 도구 로직 (기존과 동일) ---
     def run_plot(self):
+        """ 확대/이동할 때마다 보이는 구간만 알맞은 해상도로 다시 읽는 그래프 창을 엽니다. """
         self.status_label.config(text="그래프 생성 중...")
         log_path = self.get_log_path() 
         
         try:
-            df = load_logs(log_path=log_path) 
+            df, level = query_pyramid(log_path) 
             if df is None or df.empty:
                 self._update_result_text(f"[{log_path.name}] 표시할 데이터가 없습니다.")
             else:
-                plot_logs(df, show=True) 
-                self._update_result_text("[알림] 그래프 창을 확인하세요. (그래프 창을 닫아야 프로그램이 다시 반응합니다)")
+                self.show_chart_window(log_path, df, level)
+                self._update_result_text("[알림] 그래프 창에서 확대/이동하면 해당 구간을 더 자세히 보여줍니다.")
         except Exception as e:
             self._update_result_text(f"[오류] {e}")
         self.status_label.config(text="대기 중...")
 
-    def run_analyze(self):
-        self.status_label.config(text="로그 분석 중...")
-        log_path = self.get_log_path() 
+    # 그래프 창에 표시할 지표 (컬럼, 제목)
+    CHART_METRICS = [("ping_ms", "Ping (ms)"), ("download_mbps", "Download (Mbps)"),
+                     ("upload_mbps", "Upload (Mbps)")]
 
-        try:
-            df = load_logs(log_path=log_path) 
-            if df is None or df.empty:
-                self._update_result_text(f"[{log_path.name}] 분석할 데이터가 없습니다.")
-                self.status_label.config(text="대기 중...")
+    def show_chart_window(self, log_path: Path, df, level):
+        top = tk.Toplevel(self.root)
+        top.title(f"그래프 ({log_path.name})")
+        top.geometry("900x700")
+
+        fig = Figure(figsize=(9, 7))
+        axes = fig.subplots(len(self.CHART_METRICS), 1, sharex=True)
+        canvas = FigureCanvasTkAgg(fig, master=top)
+        NavigationToolbar2Tk(canvas, top).update()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        state = {"pending": None, "bands": []}
+
+        def draw(frame, level):
+            times = [dt.datetime.fromtimestamp(int(t)) for t in frame["timestamp"]]
+            for band in state["bands"]:
+                band.remove()
+            state["bands"] = []
+            for ax, (col, title) in zip(axes, self.CHART_METRICS):
+                if col not in frame.columns:
+                    continue
+                if not ax.lines:
+                    ax.plot(times, frame[col])
+                    ax.set_ylabel(title)
+                    ax.grid(True)
+                else:
+                    ax.lines[0].set_data(times, frame[col])
+                # 버킷의 최솟값~최댓값 범위
+                state["bands"].append(ax.fill_between(times, frame[f"{col}_min"], frame[f"{col}_max"],
+                                                      alpha=0.2, color=ax.lines[0].get_color()))
+                ax.relim()
+                ax.autoscale_view(scalex=False)
+            axes[0].set_title(f"해상도 {level} ({len(frame)}개 버킷)")
+            canvas.draw_idle()
+
+        def refresh():
+            # 보이는 구간과 양옆 절반씩을 더 읽어 두어, 짧게 이동할 때는 빈 곳이 보이지 않게 함
+            state["pending"] = None
+            if not top.winfo_exists():
                 return
+            lo, hi = (mdates.num2date(x).replace(tzinfo=None).timestamp() for x in axes[0].get_xlim())
+            margin = (hi - lo) / 2
+            width_px = max(canvas.get_tk_widget().winfo_width(), 100)
+            frame, level = query_pyramid(log_path, int(lo - margin), int(hi + margin) + 1,
+                                         width_px=width_px * 2)
+            if frame is not None and not frame.empty:
+                draw(frame, level)
+
+        def on_xlim(_ax):
+            # 확대/이동 중에는 이벤트가 연달아 오므로 멈춘 뒤에 한 번만 다시 읽음
+            if state["pending"] is not None:
+                top.after_cancel(state["pending"])
+            state["pending"] = top.after(200, refresh)
+
+        draw(df, level)
+        fig.autofmt_xdate()
+        axes[0].callbacks.connect("xlim_changed", on_xlim)
+
+    def run_analyze(self):
+        """ 로그 분석 실행 (백그라운드 스레드 + 결과 캐시) """
+        log_path = self.get_log_path()
+
+        # 로그가 바뀌지 않았다면 캐시된 결과(메모리, 없으면 디스크)를 즉시 표시
+        fingerprint = log_fingerprint(log_path)
+        cached = self.analysis_cache.get(fingerprint) if fingerprint else None
+        if cached is None and fingerprint is not None:
+            cached = load_cached(log_path, by='all')
+            if cached is not None:
+                self._remember_analysis(fingerprint, cached)
+        if cached is not None:
+            self.show_analysis_window(cached, log_path.name)
+            self._update_result_text(f"[{log_path.name}] 분석 결과(캐시)를 새 창에서 확인하세요.")
+            return
 
-            f = io.StringIO()
-            with redirect_stdout(f):
-                analyze_logs(df, by='all') 
-            analysis_result = f.getvalue() 
+        self.analyze_stop_event.clear()
+        self._lock_ui_for_analysis()
+        self.status_label.config(text="로그 불러오는 중... (0%)")
 
-            self.show_analysis_window(analysis_result, log_path.name) 
-            self._update_result_text(f"[{log_path.name}] 분석 결과(새 창)를 확인하세요.")
+        self.analyze_thread = threading.Thread(
+            target=self.run_analyze_worker,
+            args=(log_path, fingerprint)
+        )
+        self.analyze_thread.daemon = True
+        self.analyze_thread.start()
+
+    def run_analyze_worker(self, log_path: Path, fingerprint):
+        """ (스레드 작업) 로그 로드 및 분석 실행 """
+        def on_progress(fraction):
+            self._post_status(f"로그 불러오는 중... ({fraction:.0%})")
+
+        result, message = None, None
+        try:
+            df = load_combined(log_path=log_path, progress=on_progress,
+                               stop_event=self.analyze_stop_event)
+            if self.analyze_stop_event.is_set():
+                message = f"[{log_path.name}] 분석이 취소되었습니다."
+            elif df is None or df.empty:
+                message = f"[{log_path.name}] 분석할 데이터가 없습니다."
+            else:
+                self._post_status("로그 분석 중...")
+                analysis = analyze_logs(df, by='all', quiet=True)
+                if self.analyze_stop_event.is_set():
+                    message = f"[{log_path.name}] 분석이 취소되었습니다."
+                else:
+                    result = analysis
         except Exception as e:
-            self._update_result_text(f"[오류] {e}")
-            
-        self.status_label.config(text="대기 중...")
+            message = f"[오류] {e}"
+
+        self._call_soon(self.update_gui_after_analyze, log_path, fingerprint, result, message)
 
-    def show_analysis_window(self, content, filename=""):
+    def update_gui_after_analyze(self, log_path: Path, fingerprint, result, message):
+        if not self.root.winfo_exists():
+            return
+        self.analyze_thread = None
+        self._unlock_ui_after_analysis()
+        if result is None:
+            self._update_result_text(message)
+            return
+
+        # 분석 도중 로그가 바뀌었다면 캐시에 넣지 않음
+        if fingerprint is not None and fingerprint == log_fingerprint(log_path):
+            self._remember_analysis(fingerprint, result)
+            try:
+                save_cached(log_path, result, fingerprint)
+            except OSError:
+                pass # 디스크 캐시는 선택 사항
+
+        self.show_analysis_window(result, log_path.name) # 제목에 파일 이름 표시
+        self._update_result_text(f"[{log_path.name}] 분석 결과(새 창)를 확인하세요.")
+
+    def _remember_analysis(self, fingerprint, result):
+        if len(self.analysis_cache) >= self.ANALYSIS_CACHE_SIZE:
+            self.analysis_cache.pop(next(iter(self.analysis_cache)))
+        self.analysis_cache[fingerprint] = result
+
+    def cancel_analyze(self):
+        if self.analyze_thread and self.analyze_thread.is_alive():
+            self.analyze_stop_event.set()
+            self.analyze_button.config(state=tk.DISABLED)
+            self.status_label.config(text="로그 분석 취소 중...")
+
+    def _lock_ui_for_analysis(self):
+        # 분석 중에는 측정을 막고, 분석 버튼을 '취소' 버튼으로 사용
+        self._lock_ui_for_measurement()
+        self.analyze_button.config(text="분석 취소 (Cancel)", command=self.cancel_analyze,
+                                   state=tk.NORMAL)
+
+    def _unlock_ui_after_analysis(self):
+        self.analyze_button.config(text="로그 분석 (Analyze)", command=self.run_analyze)
+        self._unlock_ui()
+
+    # 표 탭 제목 (AnalysisResult.tables()의 키 순서)
+    ANALYSIS_TABS = {"overall": "전체 (Overall)", "hourly": "시간대별 (Hourly)", "daily": "요일별 (Day of Week)"}
+
+    def show_analysis_window(self, result, filename=""):
+        """ 분석 결과 창: 텍스트 리포트 탭 + 열 제목을 눌러 정렬할 수 있는 표 탭 """
         top = tk.Toplevel(self.root)
         top.title(f"분석 리포트 ({filename})") 
-        top.geometry("600x600")
-        
-        txt_area = scrolledtext.ScrolledText(top, wrap=tk.WORD, font=("Consolas", 10))
-        txt_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        txt_area.insert(tk.INSERT, content)
+        top.geometry("700x600")
+
+        notebook = ttk.Notebook(top)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        report = io.StringIO()
+        result.render_text(report)
+        txt_area = scrolledtext.ScrolledText(notebook, wrap=tk.WORD, font=("Consolas", 10))
+        txt_area.insert(tk.INSERT, report.getvalue())
         txt_area.config(state=tk.DISABLED)
+        notebook.add(txt_area, text="리포트 (Report)")
+
+        for name, table in result.tables().items():
+            notebook.add(self._make_table(notebook, table), text=self.ANALYSIS_TABS.get(name, name))
+
+        ttk.Button(top, text="내보내기 (Export)...",
+                   command=lambda: self._export_analysis(top, result)).pack(anchor=tk.E, padx=10, pady=(0, 10))
         top.transient(self.root) 
         top.grab_set() 
 
+    def _make_table(self, parent, table):
+        """ DataFrame을 Treeview로 표시합니다. 열 제목을 누르면 정렬(다시 누르면 역순). """
+        frame = ttk.Frame(parent)
+        key = table.index.name or ""
+        columns = [key] + list(table.columns)
+        tree = ttk.Treeview(frame, columns=columns, show="headings")
+        scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+
+        # 정렬은 표시 문자열이 아니라 원래 값 기준 (NaN은 항상 끝으로)
+        values = {}
+        for pos, (label, row) in enumerate(table.iterrows()):
+            cells = [label] + [row[c] for c in table.columns]
+            item = tree.insert("", tk.END, values=[label] + [
+                "" if v != v else f"{v:.2f}" for v in cells[1:]])
+            values[item] = [pos] + cells[1:] # 키 열은 원래 순서(시간, 요일 순)로 정렬
+
+        def sort_by(col_idx, reverse):
+            valid = [i for i in values if values[i][col_idx] == values[i][col_idx]]
+            missing = [i for i in values if values[i][col_idx] != values[i][col_idx]]
+            items = sorted(valid, key=lambda i: values[i][col_idx], reverse=reverse) + missing
+            for pos, item in enumerate(items):
+                tree.move(item, "", pos)
+            tree.heading(columns[col_idx], command=lambda: sort_by(col_idx, not reverse))
+
+        for idx, col in enumerate(columns):
+            tree.heading(col, text=col, command=lambda i=idx: sort_by(i, False))
+            tree.column(col, width=90 if idx else 70, anchor=tk.E if idx else tk.W)
+        return frame
+
+    def _export_analysis(self, parent, result):
+        path = filedialog.asksaveasfilename(
+            parent=parent, title="분석 결과 내보내기", defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv"), ("Arrow", "*.arrow")])
+        if not path:
+            return
+        try:
+            result.export(Path(path))
+        except (OSError, RuntimeError, ValueError) as e:
+            messagebox.showerror("내보내기 실패", str(e), parent=parent)
+            return
+        self._update_result_text(f"[OK] 분석 결과를 저장했습니다: {path}")
 
 if __name__ == "__main__":
     main_root = tk.Tk()
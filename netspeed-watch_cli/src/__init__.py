@@ -0,0 +1,6 @@
+# netspeed-watch_cli/src/__init__.py
+# CLI 전용 복사본을 두지 않고 프로젝트 최상위 src 패키지의 모듈을 그대로 사용합니다.
+# (이 폴더에서 'python -m src.main'을 실행해도 최상위 src/main.py가 실행됨)
+from pathlib import Path
+
+__path__.append(str(Path(__file__).resolve().parents[2] / "src"))
@@ -0,0 +1,161 @@
+# src/adaptive.py
+from __future__ import annotations
+import math
+import time
+import datetime as dt
+from collections import deque
+from statistics import median
+from typing import Optional, Deque
+
+import pandas as pd
+
+
+# speedtest-cli는 다운로드/업로드를 각각 약 10초 동안 수행하므로,
+# 바이트 기록이 없는 행은 (다운로드 + 업로드 Mbps) * 10초 / 8 로 사용량(MB)을 추정
+SPEEDTEST_SECONDS_PER_DIRECTION = 10
+
+
+def estimate_test_mb(row: dict) -> float:
+    """
+    한 번의 대역폭 측정에 사용된 데이터량(MB)을 반환합니다.
+    행에 bytes_used가 있으면 그 값을, 없으면 측정 속도로 추정한 값을 사용합니다.
+    """
+    used = row.get("bytes_used")
+    if used is not None and not pd.isna(used):
+        return float(used) / 1_000_000
+
+    total = 0.0
+    for col in ("download_mbps", "upload_mbps"):
+        v = row.get(col)
+        if v is not None and not pd.isna(v):
+            total += float(v) * SPEEDTEST_SECONDS_PER_DIRECTION / 8
+    return total
+
+
+class AdaptiveScheduler:
+    """
+    최근 측정값의 안정성에 따라 다음 대역폭 측정까지의 간격을 정합니다.
+
+    - 최근 window개 측정의 중앙값을 기준선(baseline)으로 사용
+    - 핑이 기준선보다 ping_tolerance 이상 높거나, 다운로드/업로드가
+      throughput_tolerance 이상 낮으면 '이탈'로 보고 min_interval로 촘촘하게 측정
+    - 안정 상태가 이어지면 간격을 두 배씩 늘려 max_interval까지 완화
+    - daily_budget_mb 지정 시 오늘 사용량이 예산을 넘으면 자정까지 대역폭 측정 중단
+    - 대기 중에는 probe_interval마다 가벼운 핑만 보내 이탈 여부를 확인(observe_ping)
+    """
+
+    def __init__(self, min_interval: int = 60, max_interval: int = 3600,
+                 daily_budget_mb: Optional[float] = None, window: int = 20,
+                 ping_tolerance: float = 0.5, throughput_tolerance: float = 0.3,
+                 ping_floor_ms: float = 5.0, probe_interval: Optional[int] = None):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("0 < min_interval <= max_interval 이어야 합니다.")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.daily_budget_mb = daily_budget_mb
+        self.ping_tolerance = ping_tolerance
+        self.throughput_tolerance = throughput_tolerance
+        self.ping_floor_ms = ping_floor_ms
+        self.probe_interval = probe_interval or min_interval
+
+        self.history: dict[str, Deque[float]] = {
+            col: deque(maxlen=window)
+            for col in ("ping_ms", "download_mbps", "upload_mbps")
+        }
+        self.interval = min_interval
+        self._budget_day: Optional[dt.date] = None
+        self.used_today_mb = 0.0
+
+    # --- 기준선 ---
+    def seed(self, df: Optional[pd.DataFrame]):
+        """ 로그의 최근 행(load_tail 결과)으로 기준선과 오늘 사용량을 초기화합니다. """
+        if df is None or df.empty:
+            return
+        today = dt.date.today()
+        for row in df.to_dict("records"):
+            self._push(row)
+            ts = row.get("timestamp")
+            if ts is not None and not pd.isna(ts) and \
+                    dt.date.fromtimestamp(int(ts)) == today:
+                self._add_usage(estimate_test_mb(row), today)
+
+    def baseline(self, col: str) -> float:
+        values = self.history[col]
+        return median(values) if values else float("nan")
+
+    def _push(self, row: dict):
+        for col, values in self.history.items():
+            v = row.get(col)
+            if v is not None and not pd.isna(v):
+                values.append(float(v))
+
+    def is_deviation(self, row: dict) -> bool:
+        """ row가 현재 기준선에서 벗어났는지 확인합니다. """
+        ping = row.get("ping_ms")
+        base = self.baseline("ping_ms")
+        if ping is not None and not math.isnan(base):
+            if pd.isna(ping):
+                return True # 핑 실패는 이탈로 간주
+            if ping > max(base * (1 + self.ping_tolerance), base + self.ping_floor_ms):
+                return True
+
+        for col in ("download_mbps", "upload_mbps"):
+            v = row.get(col)
+            base = self.baseline(col)
+            if v is None or math.isnan(base):
+                continue
+            if pd.isna(v) or v < base * (1 - self.throughput_tolerance):
+                return True
+        return False
+
+    # --- 예산 ---
+    def _add_usage(self, mb: float, day: dt.date):
+        if self._budget_day != day:
+            self._budget_day = day
+            self.used_today_mb = 0.0
+        self.used_today_mb += mb
+
+    def budget_left_mb(self, now: Optional[float] = None) -> float:
+        if self.daily_budget_mb is None:
+            return float("inf")
+        day = dt.date.fromtimestamp(now if now is not None else time.time())
+        used = self.used_today_mb if self._budget_day == day else 0.0
+        return self.daily_budget_mb - used
+
+    # --- 스케줄링 ---
+    def observe(self, row: dict, now: Optional[float] = None) -> int:
+        """
+        측정 결과 row를 반영하고 다음 대역폭 측정까지의 대기 시간(초)을 반환합니다.
+        """
+        now = now if now is not None else time.time()
+        self._add_usage(estimate_test_mb(row), dt.date.fromtimestamp(now))
+
+        if self.is_deviation(row):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        # 이탈한 값도 기준선에 반영해야 지속적인 변화에 적응함
+        self._push(row)
+
+        return max(self.budget_wait(now), self.interval)
+
+    def budget_wait(self, now: Optional[float] = None) -> int:
+        """ 예산을 다 썼으면 다음 날 자정까지 남은 시간(초), 아니면 0 """
+        now = now if now is not None else time.time()
+        if self.budget_left_mb(now) > 0:
+            return 0
+        midnight = dt.datetime.combine(dt.date.fromtimestamp(now) + dt.timedelta(days=1), dt.time())
+        return int(midnight.timestamp() - now)
+
+    def idle_delay(self, now: Optional[float] = None) -> int:
+        """ 측정하지 못했을 때(실패, 건너뜀)의 대기 시간. 예산 소진 시에는 자정까지 보류. """
+        return max(self.budget_wait(now), self.min_interval)
+
+    def observe_ping(self, ping_ms: float, now: Optional[float] = None) -> bool:
+        """
+        대기 중 핑 결과를 확인합니다. 기준선에서 벗어났고 예산이 남아 있으면
+        True를 반환하며, 이때 호출 측은 즉시 대역폭 측정을 실행해야 합니다.
+        """
+        if self.budget_left_mb(now) <= 0:
+            return False
+        return self.is_deviation({"ping_ms": ping_ms})
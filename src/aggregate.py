@@ -0,0 +1,320 @@
+# src/aggregate.py
+from __future__ import annotations
+import datetime as dt
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Tuple, Dict, TextIO
+
+import numpy as np
+import pandas as pd
+
+from .storage import (read_manifest, _read_segment, read_csv_bytes, log_cursor, read_since,
+                      log_lock, log_fingerprint, DEFAULT_LOG_PATH)
+from .rollup import hourly_path, hourly_stat, hourly_as_rows, METRICS, QUALITY_METRICS
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# 시간대 x 요일 히트맵으로 보여줄 지표 (값이 있는 것만)
+HEATMAP_METRICS = METRICS + ["jitter_ms", "loss_pct"]
+
+# 활성 CSV를 나눌 기본 청크 크기 (작업 단위 하나가 이보다 크지 않도록 분할)
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def local_time_parts(timestamps) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    유닉스 시각 배열을 로컬 시간대 기준 (시, 요일 0=월요일) 배열로 변환합니다.
+    15분 단위로 내림한 고유 시각만 datetime.fromtimestamp로 변환하므로
+    (30/45분 오프셋 시간대와 서머타임도 정확) 행마다 변환하는 것보다 훨씬 빠릅니다.
+    """
+    ts = np.asarray(timestamps, dtype="int64")
+    quarters, inverse = np.unique(ts // 900, return_inverse=True)
+    local = [dt.datetime.fromtimestamp(int(q) * 900) for q in quarters]
+    hours = np.fromiter((t.hour for t in local), dtype="int64", count=len(local))
+    dows = np.fromiter((t.weekday() for t in local), dtype="int64", count=len(local))
+    return hours[inverse], dows[inverse]
+
+
+# --- 부분 집계 ---
+def _agg(columns) -> Dict[str, str]:
+    """ 부분 집계 컬럼별 합치는 방법 (count/sum은 합, min/max는 최소/최대) """
+    return {c: ("sum" if c.endswith(("_count", "_sum")) else c.rsplit("_", 1)[1]) for c in columns}
+
+
+def partial_aggregate(df: pd.DataFrame) -> Dict[str, object]:
+    """
+    한 작업 단위의 부분 집계: 시간대 x 요일 칸(slot = 요일 * 24 + 시, 168칸)별 지표 count/sum/min/max,
+    전체 행 수, 마지막 timestamp. 시간대별/요일별 표와 히트맵은 모두 이 피벗 하나에서 계산합니다.
+    가중치 컬럼({지표}_n, 시간별 집계 행)이 있으면 표본 수만큼 반영합니다.
+    결과는 merge_partials로 순서에 상관없이 합칠 수 있습니다.
+    """
+    if df is None or df.empty:
+        return {"rows": 0, "slot": None, "last_ts": None}
+
+    hours, dows = local_time_parts(df["timestamp"].to_numpy())
+    cols = {}
+    weights = []
+    for m in METRICS + QUALITY_METRICS:
+        if m not in df.columns:
+            continue
+        values = df[m].to_numpy(dtype="float64")
+        if f"{m}_n" in df.columns:
+            n = df[f"{m}_n"].to_numpy(dtype="float64")
+            lo = df[f"{m}_min"].to_numpy(dtype="float64") if f"{m}_min" in df.columns else values
+            hi = df[f"{m}_max"].to_numpy(dtype="float64") if f"{m}_max" in df.columns else values
+        else:
+            n = (~np.isnan(values)).astype("float64")
+            lo = hi = values
+        if m in METRICS:
+            weights.append(n)
+        cols[f"{m}_count"] = n
+        cols[f"{m}_sum"] = np.where(n > 0, np.nan_to_num(values) * n, 0.0)
+        cols[f"{m}_min"] = np.where(n > 0, lo, np.nan)
+        cols[f"{m}_max"] = np.where(n > 0, hi, np.nan)
+
+    frame = pd.DataFrame(cols)
+    return {
+        "rows": int(np.max(weights, axis=0).sum()) if weights else len(df),
+        "slot": frame.groupby(dows * 24 + hours).agg(_agg(frame.columns)),
+        "last_ts": int(df["timestamp"].max()),
+    }
+
+
+def merge_partials(partials: List[Dict[str, object]]) -> Dict[str, object]:
+    """ 부분 집계들을 하나로 합칩니다 (count/sum은 더하고 min/max는 최소/최대). """
+    last = [p["last_ts"] for p in partials if p.get("last_ts") is not None]
+    merged = {"rows": sum(p["rows"] for p in partials), "last_ts": max(last) if last else None}
+    frames = [p["slot"] for p in partials if p["slot"] is not None]
+    if not frames:
+        merged["slot"] = None
+        return merged
+    both = pd.concat(frames)
+    merged["slot"] = both.groupby(level=0).agg(_agg(both.columns))
+    return merged
+
+
+def means_from_partial(merged: Dict[str, object]) -> Tuple[pd.Series, pd.DataFrame, pd.DataFrame]:
+    """ 합친 부분 집계에서 (전체 평균, 시간대별 평균, 요일별 평균)을 계산합니다 (slot 피벗을 시/요일로 접음). """
+    slot = merged["slot"]
+    agg = _agg(slot.columns)
+    hour = slot.groupby(slot.index % 24).agg(agg)
+    dow = slot.groupby(slot.index // 24).agg(agg)
+    cols = [m for m in METRICS + QUALITY_METRICS if f"{m}_count" in hour.columns]
+
+    def avg(frame):
+        return pd.DataFrame({m: frame[f"{m}_sum"] / frame[f"{m}_count"].where(frame[f"{m}_count"] > 0)
+                             for m in cols})
+
+    overall = pd.Series({
+        m: hour[f"{m}_sum"].sum() / hour[f"{m}_count"].sum() if hour[f"{m}_count"].sum() else float("nan")
+        for m in cols
+    })
+    hourly = avg(hour)
+    hourly.index.name = "hour"
+    daily = avg(dow)
+    daily.index = [DAYS[i] for i in daily.index]
+    daily = daily.reindex(DAYS)
+    daily.index.name = "day_of_week"
+    return overall, hourly, daily
+
+
+def heatmap_from_partial(merged: Dict[str, object]) -> Dict[str, pd.DataFrame]:
+    """ 합친 부분 집계에서 지표별 요일(7행) x 시(24열) 평균 격자를 만듭니다. 값이 없는 지표는 뺍니다. """
+    slot = merged["slot"]
+    grids = {}
+    for m in HEATMAP_METRICS:
+        if f"{m}_count" not in slot.columns or not slot[f"{m}_count"].sum():
+            continue
+        mean = slot[f"{m}_sum"] / slot[f"{m}_count"].where(slot[f"{m}_count"] > 0)
+        grid = pd.DataFrame(mean.reindex(range(7 * 24)).to_numpy(dtype="float64").reshape(7, 24),
+                            index=pd.Index(DAYS, name="day_of_week"), columns=range(24))
+        grid.columns.name = "hour"
+        grids[m] = grid
+    return grids
+
+
+# --- 작업 단위 계획 ---
+def plan_units(log_path: Path = DEFAULT_LOG_PATH, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+               min_units: int = 1, cursor: Optional[dict] = None) -> List[tuple]:
+    """
+    분석 입력을 독립적인 작업 단위로 나눕니다.
+    - ('hourly', 경로): 시간별 집계 저장소
+    - ('segment', 로그 경로, manifest 항목): 회전된 압축 세그먼트 하나
+    - ('csv', 경로, 시작 바이트, 끝 바이트): 활성 CSV의 줄 단위로 정렬된 구간
+    활성 CSV는 chunk_bytes 이하이면서 전체 단위 수가 min_units 이상이 되도록 나눕니다.
+    cursor(storage.log_cursor)를 주면 그 시점의 세그먼트와 활성 CSV의 offset까지만 계획합니다.
+    """
+    units: List[tuple] = []
+    if hourly_path(log_path).exists():
+        units.append(("hourly", hourly_path(log_path)))
+    for seg in (read_manifest(log_path) if cursor is None else cursor["segments"]):
+        units.append(("segment", log_path, seg))
+
+    if log_path.exists() and (cursor is None or cursor["offset"]):
+        size = log_path.stat().st_size if cursor is None else cursor["offset"]
+        with open(log_path, "rb") as f:
+            f.readline()
+            body_start = f.tell()
+            body = size - body_start
+            if body > 0:
+                n_chunks = max(-(-body // chunk_bytes), min_units - len(units), 1)
+                step = -(-body // n_chunks)
+                bounds = [body_start]
+                for k in range(1, n_chunks):
+                    f.seek(body_start + k * step)
+                    f.readline() # 다음 줄 시작으로 정렬
+                    pos = min(f.tell(), size)
+                    if pos > bounds[-1]:
+                        bounds.append(pos)
+                bounds.append(size)
+                for lo, hi in zip(bounds, bounds[1:]):
+                    if hi > lo:
+                        units.append(("csv", log_path, lo, hi))
+    return units
+
+
+def load_unit(unit: tuple) -> Optional[pd.DataFrame]:
+    """ 작업 단위 하나를 DataFrame으로 읽습니다 (워커 프로세스에서 실행). """
+    kind = unit[0]
+    if kind == "hourly":
+        return hourly_as_rows(pd.read_csv(unit[1]))
+    if kind == "segment":
+        return _read_segment(unit[1], unit[2])
+    if kind == "csv":
+        _, path, lo, hi = unit
+        with open(path, "rb") as f:
+            header = f.readline()
+            f.seek(lo)
+            body = f.read(hi - lo)
+        return read_csv_bytes(header, body, path.name)
+    raise ValueError(f"알 수 없는 작업 단위: {kind}")
+
+
+def aggregate_unit(unit: tuple) -> Dict[str, object]:
+    return partial_aggregate(load_unit(unit))
+
+
+def parallel_partials(log_path: Path = DEFAULT_LOG_PATH, workers: Optional[int] = None,
+                      chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                      cursor: Optional[dict] = None) -> Dict[str, object]:
+    """
+    작업 단위별 부분 집계를 프로세스 풀에서 계산해 합칩니다.
+    workers=1이면 현재 프로세스에서 순서대로 계산합니다. cursor는 plan_units와 같습니다.
+    """
+    workers = workers or os.cpu_count() or 1
+    units = plan_units(log_path, chunk_bytes=chunk_bytes, min_units=workers * 2, cursor=cursor)
+    if workers == 1 or len(units) <= 1:
+        partials = [aggregate_unit(u) for u in units]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(units))) as pool:
+            partials = list(pool.map(aggregate_unit, units))
+    return merge_partials(partials)
+
+
+# --- 누적 피벗 캐시 ---
+def pivot_path(log_path: Path) -> Path:
+    """ 시간대 x 요일 누적 피벗 캐시 경로 (예: data/logs_pivot.json) """
+    return log_path.with_name(f"{log_path.stem}_pivot.json")
+
+
+def _read_pivot(log_path: Path) -> Optional[dict]:
+    try:
+        with open(pivot_path(log_path), encoding="utf-8") as f:
+            state = json.load(f)
+        slot = state["slot"]
+        state["slot"] = None if slot is None else \
+            pd.DataFrame(slot["columns"], index=slot["index"], dtype="float64")
+        return state
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_pivot(log_path: Path, state: dict):
+    slot = state["slot"]
+    doc = dict(state, slot=None if slot is None else {
+        "index": [int(i) for i in slot.index],
+        "columns": {c: [None if np.isnan(v) else float(v) for v in slot[c].to_numpy(dtype="float64")]
+                    for c in slot.columns},
+    })
+    path = pivot_path(log_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f)
+    os.replace(tmp, path)
+
+
+def update_pivot(log_path: Path = DEFAULT_LOG_PATH, workers: Optional[int] = 1,
+                 rebuild: bool = False) -> Optional[Dict[str, object]]:
+    """
+    전체 기록의 부분 집계(merge_partials 형식)를 읽은 위치(storage.read_since 커서)와 함께
+    <로그>_pivot.json에 캐시합니다.
+    - 활성 CSV에 추가된 바이트가 없으면 캐시를 그대로 사용
+    - 추가된 바이트만 있으면 그 행만 읽어 합침 - 비용은 새 행 수에 비례하며, timestamp가 아니라
+      바이트 위치 기준이므로 같은 초에 기록된 행이나 늦게 들어온 행도 빠짐없이 반영
+    - 회전/헤더 확장/압축으로 커서를 이어 갈 수 없거나 rebuild=True이면 parallel_partials(workers)로 다시 만듦
+    반환값의 "mode"는 'cached', 'appended', 'rebuilt' 중 하나입니다. 로그가 없으면 None.
+    """
+    with log_lock(pivot_path(log_path)):
+        if log_fingerprint(log_path) is None:
+            return None
+        state = None if rebuild else _read_pivot(log_path)
+        if state is not None and state.get("version") == 2 and state["hourly"] == hourly_stat(log_path):
+            new, cursor = read_since(log_path, state["cursor"])
+            if cursor == state["cursor"]:
+                state["mode"] = "cached"
+                return state
+            if cursor is not None:
+                merged = merge_partials([state, partial_aggregate(new)])
+                return _save_pivot(log_path, merged, cursor, state["hourly"], "appended")
+
+        for _ in range(3):
+            # 커서 시점까지 계산한 뒤, 그동안 회전/압축이 없었는지(커서가 이어지는지) 확인
+            cursor, hourly = log_cursor(log_path), hourly_stat(log_path)
+            merged = parallel_partials(log_path, workers=workers, cursor=cursor)
+            new, nxt = read_since(log_path, cursor)
+            if nxt is not None and hourly == hourly_stat(log_path):
+                merged = merge_partials([merged, partial_aggregate(new)])
+                return _save_pivot(log_path, merged, nxt, hourly, "rebuilt")
+        merged["mode"] = "rebuilt" # 로그가 계속 바뀜: 결과만 반환하고 캐시하지 않음
+        return merged
+
+
+def _save_pivot(log_path: Path, merged: Dict[str, object], cursor: dict, hourly: List[int],
+                mode: str) -> Dict[str, object]:
+    state = dict(merged, version=2, cursor=cursor, hourly=hourly)
+    _write_pivot(log_path, state)
+    state["mode"] = mode
+    return state
+
+
+def benchmark(log_path: Path = DEFAULT_LOG_PATH, max_workers: Optional[int] = None,
+              out: Optional[TextIO] = None) -> List[Tuple[int, float]]:
+    """
+    워커 수를 1, 2, 4, ... max_workers로 늘려 가며 병렬 집계 시간을 측정하고
+    확장성 표(워커 수, 초, 속도 향상)를 출력합니다. 결과가 1 워커와 같은지도 확인합니다.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    counts, w = [], 1
+    while w < max_workers:
+        counts.append(w)
+        w *= 2
+    counts.append(max_workers)
+
+    results, baseline = [], None
+    print(f"\n[Parallel Analysis Benchmark] {log_path.name}, 작업 단위 계획: "
+          f"{len(plan_units(log_path, min_units=max_workers * 2))}개", file=out)
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}", file=out)
+    for w in counts:
+        t0 = time.perf_counter()
+        merged = parallel_partials(log_path, workers=w)
+        elapsed = time.perf_counter() - t0
+        if baseline is None:
+            baseline = (elapsed, means_from_partial(merged)[1])
+        elif not np.allclose(means_from_partial(merged)[1].to_numpy(), baseline[1].to_numpy(),
+                             equal_nan=True):
+            print(f"[경고] workers={w} 결과가 1 워커 결과와 다릅니다.", file=out)
+        results.append((w, elapsed))
+        print(f"{w:>8} {elapsed:>9.3f} {baseline[0] / elapsed:>7.2f}x", file=out)
+    return results
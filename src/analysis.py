@@ -0,0 +1,262 @@
+# src/analysis.py
+from __future__ import annotations
+import datetime as dt
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, TextIO
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # 선택 의존성: Arrow 내보내기
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+from .rollup import METRICS, QUALITY_METRICS
+from .sla import print_tier_table
+from .storage import log_fingerprint, DEFAULT_LOG_PATH
+
+
+def analysis_cache_path(log_path: Path) -> Path:
+    """ 분석 결과 디스크 캐시 경로 (예: data/logs_analysis.json) """
+    return log_path.with_name(f"{log_path.stem}_analysis.json")
+
+
+def _clean(value):
+    """ JSON으로 쓸 수 있도록 NaN은 None, NumPy 스칼라는 파이썬 값으로 바꿉니다. """
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _frame_to_dict(frame: Optional[pd.DataFrame]) -> Optional[dict]:
+    if frame is None:
+        return None
+    return {
+        "index_name": frame.index.name,
+        "index": [_clean(i) for i in frame.index],
+        "columns": list(frame.columns),
+        "data": [[_clean(v) for v in row] for row in frame.itertuples(index=False)],
+    }
+
+
+def _frame_from_dict(d: Optional[dict]) -> Optional[pd.DataFrame]:
+    if d is None:
+        return None
+    frame = pd.DataFrame(d["data"], index=d["index"], columns=d["columns"], dtype="float64")
+    frame.index.name = d.get("index_name")
+    return frame
+
+
+@dataclass
+class AnalysisResult:
+    """
+    analyze_logs / analyze_pivot의 결과.
+    - total: 측정 횟수, overall: 지표별 전체 평균
+    - hourly: 시간대(0~23)별 평균, daily: 요일별 평균 (by 선택에 따라 None)
+    - heatmap: 지표 -> 요일 x 시간대 평균 격자 (by가 'heatmap'/'all'일 때)
+    - meta: 분석 범위(by), 생성 시각, 원본 로그 지문 등
+    텍스트 리포트(render_text), JSON/CSV/Arrow 내보내기, 디스크 캐시가 모두 이 객체를 사용합니다.
+    """
+    total: int
+    overall: pd.Series
+    hourly: Optional[pd.DataFrame] = None
+    daily: Optional[pd.DataFrame] = None
+    meta: Dict[str, object] = field(default_factory=dict)
+    heatmap: Optional[Dict[str, pd.DataFrame]] = None
+
+    # --- 표 ---
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        """ 이름 -> 표. overall은 한 행짜리 표로 변환하고, 히트맵은 heatmap_{지표} 표입니다. """
+        overall = self.overall.to_frame("all").T
+        overall.index.name = "scope"
+        out = {"overall": overall}
+        if self.hourly is not None:
+            out["hourly"] = self.hourly
+        if self.daily is not None:
+            out["daily"] = self.daily
+        for m, grid in (self.heatmap or {}).items():
+            out[f"heatmap_{m}"] = grid
+        return out
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        모든 표를 (section, key, metric, value) 긴 형식 하나로 합칩니다 (CSV/Arrow용).
+        히트맵은 section 'heatmap', key '요일 시' (예: 'Friday 21')로 펼칩니다.
+        """
+        parts = []
+        for name, table in self.tables().items():
+            if name.startswith("heatmap_"):
+                continue
+            long = table.rename_axis("key").reset_index().melt(
+                id_vars="key", var_name="metric", value_name="value")
+            long.insert(0, "section", name)
+            long["key"] = long["key"].astype(str)
+            parts.append(long)
+        for m, grid in (self.heatmap or {}).items():
+            parts.append(pd.DataFrame({
+                "section": "heatmap",
+                "key": [f"{day} {hour}" for day in grid.index for hour in grid.columns],
+                "metric": m,
+                "value": grid.to_numpy(dtype="float64").ravel(),
+            }))
+        total = pd.DataFrame([{"section": "overall", "key": "all", "metric": "total_measurements",
+                               "value": float(self.total)}])
+        return pd.concat([total] + parts, ignore_index=True)
+
+    # --- 직렬화 ---
+    def to_dict(self) -> dict:
+        return {
+            "total": int(self.total),
+            "overall": {k: _clean(v) for k, v in self.overall.items()},
+            "hourly": _frame_to_dict(self.hourly),
+            "daily": _frame_to_dict(self.daily),
+            "heatmap": None if self.heatmap is None else {m: _frame_to_dict(g) for m, g in self.heatmap.items()},
+            "meta": self.meta,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "AnalysisResult":
+        overall = pd.Series({k: (float("nan") if v is None else v) for k, v in d["overall"].items()},
+                            dtype="float64")
+        heatmap = d.get("heatmap")
+        if heatmap is not None:
+            heatmap = {m: _frame_from_dict(g) for m, g in heatmap.items()}
+            for grid in heatmap.values():
+                grid.columns.name = "hour"
+        return cls(total=int(d["total"]), overall=overall, hourly=_frame_from_dict(d.get("hourly")),
+                   daily=_frame_from_dict(d.get("daily")), meta=d.get("meta", {}), heatmap=heatmap)
+
+    def to_json(self, path: Optional[Path] = None) -> str:
+        text = json.dumps(self.to_dict(), ensure_ascii=False, indent=1)
+        if path is not None:
+            path.write_text(text, encoding="utf-8")
+        return text
+
+    @classmethod
+    def from_json(cls, text: str) -> "AnalysisResult":
+        return cls.from_dict(json.loads(text))
+
+    def to_csv(self, path: Path):
+        self.to_frame().to_csv(path, index=False)
+
+    def to_arrow(self, path: Path):
+        """ Arrow IPC 파일로 저장합니다 (pyarrow 필요). """
+        if pyarrow is None:
+            raise RuntimeError("Arrow로 내보내려면 'pyarrow' 패키지가 필요합니다.")
+        table = pyarrow.Table.from_pandas(self.to_frame(), preserve_index=False)
+        with pyarrow.OSFile(str(path), "wb") as sink, pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    def export(self, path: Path):
+        """ 확장자(.json, .csv, .arrow)에 맞는 형식으로 저장합니다. """
+        suffix = path.suffix.lower()
+        if suffix == ".json":
+            self.to_json(path)
+        elif suffix == ".csv":
+            self.to_csv(path)
+        elif suffix in (".arrow", ".feather", ".ipc"):
+            self.to_arrow(path)
+        else:
+            raise ValueError(f"지원하지 않는 형식입니다: {path.name} (.json, .csv, .arrow)")
+
+    # --- 텍스트 보기 ---
+    def render_text(self, out: Optional[TextIO] = None):
+        """ 분석 리포트 텍스트 출력 (CLI 출력과 GUI 리포트 탭 공용) """
+        overall = self.overall
+        print("\n--- NetSpeed Analysis Report ---", file=out)
+
+        # 전체 평균 (항상 표시)
+        print("\n[Overall Average]", file=out)
+        print(f"Total Measurements: {self.total}", file=out)
+        print(f"Ping: {overall['ping_ms']:.2f} ms", file=out)
+        print(f"Download: {overall['download_mbps']:.2f} Mbps", file=out)
+        print(f"Upload: {overall['upload_mbps']:.2f} Mbps", file=out)
+        if "jitter_ms" in overall.index:
+            print(f"Jitter: {overall['jitter_ms']:.2f} ms", file=out)
+        if "loss_pct" in overall.index:
+            print(f"Packet Loss: {overall['loss_pct']:.2f} %", file=out)
+
+        # 인터넷 상품별 속도 기준표 (--sla로 실제 측정값과 비교)
+        print_tier_table(out)
+
+        if self.hourly is not None:
+            # 시간대별 평균
+            hourly = self.hourly
+            print("\n[Hourly Average]", file=out)
+            print(hourly[[c for c in hourly.columns if c in METRICS]].to_string(), file=out) # .to_string() for better alignment
+
+            # 버스트 핑 품질 (--ping-count > 1로 측정한 행이 있을 때만)
+            quality = [c for c in QUALITY_METRICS if c in hourly.columns]
+            if quality:
+                print("\n[Hourly Ping Quality]", file=out)
+                print(hourly[quality].to_string(), file=out)
+
+        if self.daily is not None:
+            # 요일별 평균
+            daily = self.daily
+            print("\n[Day of Week Average]", file=out)
+            print(daily[[c for c in daily.columns if c in METRICS]].to_string(), file=out)
+
+        for m, grid in (self.heatmap or {}).items():
+            # 요일 x 시간대 평균 (예: 금요일 21시에만 느려지는 패턴)
+            print(f"\n[{m} by Day of Week x Hour]", file=out)
+            digits = 0 if grid.abs().max().max() >= 10 else 1
+            print(grid.rename(index=lambda d: d[:3]).rename_axis(index=None).to_string(
+                na_rep="-", float_format=lambda v: f"{v:.{digits}f}"), file=out)
+            values = grid.to_numpy(dtype="float64")
+            if not np.isnan(values).all():
+                # 속도는 가장 낮은 칸, 지연/손실은 가장 높은 칸
+                pos = np.nanargmin(values) if m.endswith("_mbps") else np.nanargmax(values)
+                day, hour = divmod(int(pos), 24)
+                print(f"Worst: {grid.index[day]} {hour:02d}:00 ({values[day, hour]:.2f})", file=out)
+
+        print("\n--- End of Report ---", file=out)
+
+
+# --- 디스크 캐시 ---
+def load_cached(log_path: Path = DEFAULT_LOG_PATH, by: str = "all") -> Optional[AnalysisResult]:
+    """ 로그가 바뀌지 않았고 같은 범위(by)로 분석한 결과가 캐시에 있으면 반환합니다. """
+    fingerprint = log_fingerprint(log_path)
+    if fingerprint is None:
+        return None
+    try:
+        with open(analysis_cache_path(log_path), encoding="utf-8") as f:
+            result = AnalysisResult.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    meta = result.meta
+    if meta.get("fingerprint") != list(fingerprint) or meta.get("by") != by:
+        return None
+    if by in ("heatmap", "all") and result.heatmap is None:
+        return None # 히트맵이 없던 이전 버전의 캐시
+    return result
+
+
+def save_cached(log_path: Path, result: AnalysisResult, fingerprint: Optional[tuple] = None):
+    """
+    결과를 디스크 캐시에 저장합니다. fingerprint는 분석 시작 시점의 로그 지문이며,
+    분석 도중 로그가 바뀌었으면 저장하지 않습니다.
+    """
+    fingerprint = fingerprint if fingerprint is not None else log_fingerprint(log_path)
+    if fingerprint is None or fingerprint != log_fingerprint(log_path):
+        return
+    result.meta["fingerprint"] = list(fingerprint)
+    path = analysis_cache_path(log_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result.to_dict(), f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def new_meta(by: str, source: str) -> Dict[str, object]:
+    return {"by": by, "source": source, "generated_at": dt.datetime.now().isoformat(timespec="seconds")}
@@ -0,0 +1,350 @@
+# src/bandwidth.py
+from __future__ import annotations
+import http.client
+import itertools
+import math
+import os
+import statistics
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Optional, Tuple, List, Callable
+
+import speedtest
+
+from .measure import Probe, ProbeContext, run_bandwidth, run_in_thread
+
+# 한 번에 읽고/보내는 크기. 멀티 기가비트에서도 호출 횟수가 초당 수천 번 수준에 머물도록 크게 잡음
+CHUNK_BYTES = 256 * 1024
+# 업로드 본문 (speedtest-cli와 같은 형식: 'content1=' + 영숫자 반복). 복사 없이 잘라서 보냄
+_BODY = memoryview(b"content1=" + (b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+                                   * (CHUNK_BYTES // 36 + 1))[:CHUNK_BYTES - 9])
+# 서버를 직접 지정해 speedtest.net 설정을 받지 않을 때의 기본값
+DEFAULT_STREAMS = 4
+DEFAULT_DOWNLOAD_SIZES = [4000, 3500]
+DEFAULT_UPLOAD_BYTES = 4 * 1024 * 1024
+PROC_STAT = Path("/proc/stat")
+
+
+@dataclass
+class BandwidthCap:
+    """
+    데이터량/시간을 제한한 대역폭 측정 설정 (종량제 회선용).
+
+    - max_bytes: 다운로드+업로드 합계 최대 바이트 (None이면 제한 없음).
+      다운로드가 절반까지 사용하고, 업로드는 남은 양을 사용
+    - max_seconds: 방향별 최대 측정 시간(초)
+    - tolerance: 처리량 추정의 95% 신뢰구간 반폭이 평균의 이 비율 이하가 되면 조기 종료 (0이면 끝까지 측정)
+    - warmup_s: TCP 슬로 스타트 구간으로 보고 처리량 계산에서 제외하는 시간
+    - window_s: 처리량 표본 하나의 길이, min_windows: 수렴 판정에 필요한 최소 표본 수
+    """
+    max_bytes: Optional[int] = None
+    max_seconds: float = 10.0
+    tolerance: float = 0.05
+    warmup_s: float = 1.0
+    window_s: float = 0.5
+    min_windows: int = 4
+
+    def limited(self, max_bytes: int) -> "BandwidthCap":
+        """ max_bytes를 주어진 값 이하로 줄인 사본 (일일 예산 잔량 적용용) """
+        if self.max_bytes is not None:
+            max_bytes = min(self.max_bytes, max_bytes)
+        return replace(self, max_bytes=max(int(max_bytes), 0))
+
+
+@dataclass
+class StreamPlan:
+    """
+    병렬 스트림/서버 구성 (서버 하나나 TCP 연결 하나가 회선보다 먼저 포화되는 고속 회선용).
+
+    - streams: 서버당 동시 연결 수 (None이면 speedtest.net 설정값, 서버 직접 지정 시 DEFAULT_STREAMS)
+    - servers: 동시에 사용할 speedtest.net 서버 수 (가장 빠른 서버 + 가까운 순)
+    - urls: 서버 upload URL 직접 지정 (예: http://10.0.0.5/speedtest/upload.php).
+      지정하면 speedtest.net 서버를 찾지 않음 (사설 측정 서버, 루프백 검증용)
+    """
+    streams: Optional[int] = None
+    servers: int = 1
+    urls: List[str] = field(default_factory=list)
+
+
+def _system_cpu_times(path: Path = PROC_STAT) -> Optional[Tuple[int, int]]:
+    """ /proc/stat 첫 줄에서 (사용 시간, 전체 시간) jiffies. Linux가 아니면 None. """
+    try:
+        with open(path, encoding="ascii") as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    idle = sum(fields[3:5]) # idle + iowait
+    return sum(fields) - idle, sum(fields)
+
+
+class CpuMeter:
+    """
+    with 블록 동안의 CPU 사용률을 잽니다.
+    - process_pct: 이 프로세스의 CPU 시간 / 경과 시간 (100 = 코어 하나). 전송 스레드는 GIL을 나눠 쓰므로
+      100에 가까우면 회선이 아니라 측정 호스트가 병목일 가능성이 큼
+    - system_pct: 시스템 전체 사용률 (/proc/stat, Linux 외에는 NaN)
+    """
+
+    def __enter__(self) -> "CpuMeter":
+        self._wall = time.perf_counter()
+        self._proc = time.process_time()
+        self._sys = _system_cpu_times()
+        return self
+
+    def __exit__(self, *exc):
+        wall = max(time.perf_counter() - self._wall, 1e-6)
+        self.process_pct = 100.0 * (time.process_time() - self._proc) / wall
+        end = _system_cpu_times()
+        if self._sys is not None and end is not None and end[1] > self._sys[1]:
+            self.system_pct = 100.0 * (end[0] - self._sys[0]) / (end[1] - self._sys[1])
+        else:
+            self.system_pct = float("nan")
+        return False
+
+
+class _Meter:
+    """
+    전송 스레드가 공유하는 바이트 계수기. limit에 도달하면 done이 설정됩니다.
+    last_at은 마지막 전송 시각이며, 업로드는 소켓 버퍼에 넣은 시각이 아니라
+    서버 응답을 받은 시각(touch)을 사용합니다 (track_reserve=False).
+    """
+
+    def __init__(self, limit: Optional[int], track_reserve: bool = True):
+        self.limit = limit
+        self.bytes = 0
+        self.track_reserve = track_reserve
+        self.last_at = time.perf_counter()
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def reserve(self, n: int) -> int:
+        """ 남은 한도 안에서 최대 n바이트를 예약합니다. 0이면 전송을 멈춰야 합니다. """
+        with self.lock:
+            if self.done.is_set():
+                return 0
+            if self.limit is not None:
+                n = min(n, self.limit - self.bytes)
+                if n <= 0:
+                    self.done.set()
+                    return 0
+            self.bytes += n
+            if self.track_reserve:
+                self.last_at = time.perf_counter()
+            return n
+
+    def touch(self):
+        self.last_at = time.perf_counter()
+
+    def refund(self, n: int):
+        """ 예약했지만 실제로 전송하지 않은 바이트를 돌려줍니다. """
+        if n > 0:
+            with self.lock:
+                self.bytes -= n
+
+
+class _Stopped(Exception):
+    """ 업로드 본문 전송 중 한도/종료에 도달함 """
+
+
+class _UploadBody:
+    """
+    보낼 때마다 계수기에서 바이트를 예약하는 업로드 본문 (한도에 닿으면 전송 중단).
+    반복 가능한 객체로 넘기면 http.client가 조각을 그대로 보내므로 CHUNK_BYTES 단위로 전송됩니다.
+    """
+
+    def __init__(self, size: int, meter: _Meter):
+        self.remaining = size
+        self.meter = meter
+
+    def __iter__(self):
+        while self.remaining > 0:
+            n = self.meter.reserve(min(CHUNK_BYTES, self.remaining))
+            if not n:
+                raise _Stopped()
+            self.remaining -= n
+            yield _BODY[:n]
+
+
+_ERRORS = (OSError, http.client.HTTPException, _Stopped)
+
+
+def _download_worker(meter: _Meter, next_url: Callable[[], str]):
+    view = memoryview(bytearray(CHUNK_BYTES)) # 스레드별 버퍼에 바로 읽어 할당/복사를 줄임
+    while not meter.done.is_set():
+        try:
+            with urllib.request.urlopen(speedtest.build_request(next_url()), timeout=10) as f:
+                while True:
+                    n = meter.reserve(CHUNK_BYTES)
+                    if not n:
+                        return
+                    got = f.readinto(view[:n])
+                    meter.refund(n - got)
+                    if not got:
+                        break
+        except _ERRORS:
+            return # 연결 실패 시 이 스레드만 종료 (다른 스레드가 계속 측정)
+
+
+def _upload_worker(meter: _Meter, url: str, size: int):
+    while not meter.done.is_set():
+        body = _UploadBody(size, meter)
+        request = speedtest.build_request(url, data=body, headers={"Content-length": str(size)})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as f:
+                f.read()
+            meter.touch() # 서버가 본문을 모두 받은 시각
+        except _ERRORS:
+            if not meter.done.is_set() and body.remaining == size:
+                return # 한 바이트도 보내지 못함 (연결 실패)
+
+
+def converged(samples: List[float], cap: BandwidthCap) -> bool:
+    """ 표본 평균의 95% 신뢰구간 반폭이 평균의 tolerance 이하인지 확인합니다. """
+    if cap.tolerance <= 0 or len(samples) < max(cap.min_windows, 2):
+        return False
+    mean = statistics.fmean(samples)
+    if mean <= 0:
+        return False
+    half = 1.96 * statistics.stdev(samples) / math.sqrt(len(samples))
+    return half <= cap.tolerance * mean
+
+
+def run_transfer(workers: List[Callable[[_Meter], None]], cap: BandwidthCap,
+                 limit: Optional[int], stop_event: Optional[threading.Event] = None,
+                 upload: bool = False) -> Tuple[float, int]:
+    """
+    workers를 하나씩 스레드로 실행하며(모든 스레드가 계수기 하나를 공유해 합산)
+    window_s마다 처리량을 표본으로 기록합니다.
+    바이트 한도, max_seconds, 수렴, stop_event 중 하나에 도달하면 멈추고
+    (워밍업 이후 처리량 Mbps, 전송 바이트)를 반환합니다.
+    """
+    meter = _Meter(limit, track_reserve=not upload)
+    pool = [threading.Thread(target=w, args=(meter,), daemon=True) for w in workers]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+
+    samples: List[float] = []
+    steady: Optional[Tuple[float, int]] = None # 워밍업이 끝난 시점 (시각, 바이트)
+    last_t, last_b = t0, 0
+    try:
+        while True:
+            # 바이트 한도에 닿으면 창이 끝나기 전에 바로 깨어남
+            meter.done.wait(cap.window_s)
+            if stop_event is not None and stop_event.is_set():
+                break
+            now, done_bytes = time.perf_counter(), meter.bytes
+            if steady is None:
+                if now - t0 >= cap.warmup_s:
+                    steady = (now, done_bytes)
+            else:
+                samples.append((done_bytes - last_b) * 8 / (now - last_t) / 1_000_000)
+            last_t, last_b = now, done_bytes
+            if now - t0 >= cap.max_seconds or meter.done.is_set() \
+                    or not any(t.is_alive() for t in pool) or converged(samples, cap):
+                break
+    finally:
+        meter.done.set()
+        for t in pool:
+            t.join(timeout=1)
+
+    if meter.bytes == 0:
+        raise OSError("측정 서버와 데이터를 주고받지 못했습니다.")
+    if steady is not None and last_t > steady[0] and last_b > steady[1]:
+        mbps = (last_b - steady[1]) * 8 / (last_t - steady[0]) / 1_000_000
+    else:
+        # 워밍업 전에 끝남 (작은 한도): 첫 바이트부터 마지막 바이트까지의 평균
+        mbps = meter.bytes * 8 / max(meter.last_at - t0, 1e-3) / 1_000_000
+    return mbps, meter.bytes
+
+
+def _resolve_servers(plan: StreamPlan, stop_event: Optional[threading.Event]) -> dict:
+    """ 사용할 서버 upload URL 목록과 방향별 서버당 스트림 수, 다운로드 이미지 크기, 업로드 요청 크기 """
+    if plan.urls:
+        streams = plan.streams or DEFAULT_STREAMS
+        return {"urls": list(plan.urls), "down_streams": streams, "up_streams": streams,
+                "down_sizes": DEFAULT_DOWNLOAD_SIZES, "up_bytes": DEFAULT_UPLOAD_BYTES}
+
+    s = speedtest.Speedtest(shutdown_event=stop_event)
+    if plan.servers > 5:
+        s.get_closest_servers(limit=plan.servers)
+    s.get_best_server()
+    others = [srv["url"] for srv in s.closest if srv["url"] != s.best["url"]]
+    return {
+        "urls": [s.best["url"]] + others[:max(plan.servers, 1) - 1],
+        "down_streams": plan.streams or s.config["threads"]["download"],
+        "up_streams": plan.streams or s.config["threads"]["upload"],
+        # 큰 이미지부터 돌아가며 받아 연결 수립 비용을 줄임
+        "down_sizes": sorted(s.config["sizes"]["download"], reverse=True)[:2],
+        "up_bytes": max(s.config["sizes"]["upload"]),
+    }
+
+
+def _download_workers(urls: List[str], sizes: List[int], streams: int) -> List[Callable[[_Meter], None]]:
+    workers = []
+    for url in urls:
+        # 리스트로 바로 만들어 둠 (제너레이터로 두면 url이 마지막 서버로 바뀐 뒤에 평가됨)
+        images = itertools.cycle([f"{os.path.dirname(url)}/random{n}x{n}.jpg" for n in sizes])
+        lock = threading.Lock()
+
+        def next_url(images=images, lock=lock) -> str:
+            with lock:
+                return next(images)
+
+        workers += [lambda m, f=next_url: _download_worker(m, f)] * max(streams, 1)
+    return workers
+
+
+def measure_capped(cap: BandwidthCap, stop_event: Optional[threading.Event] = None,
+                   plan: Optional[StreamPlan] = None) -> dict:
+    """
+    데이터량/시간 제한 안에서 다운로드/업로드 속도를 측정합니다.
+    plan에 따라 서버마다 여러 연결을 여러 서버에 동시에 열고 처리량을 합산합니다.
+    반환: download_mbps, upload_mbps, bytes_used, servers, streams(다운로드 연결 수),
+          cpu_pct(프로세스, 100 = 코어 하나), sys_cpu_pct(시스템 전체)
+    """
+    plan = plan or StreamPlan()
+    with CpuMeter() as cpu:
+        cfg = _resolve_servers(plan, stop_event)
+        urls = cfg["urls"]
+        down_limit = None if cap.max_bytes is None else cap.max_bytes // 2
+        down_mbps, down_bytes = run_transfer(_download_workers(urls, cfg["down_sizes"], cfg["down_streams"]),
+                                             cap, down_limit, stop_event)
+        up_mbps, up_bytes = float("nan"), 0
+        if stop_event is None or not stop_event.is_set():
+            up_limit = None if cap.max_bytes is None else cap.max_bytes - down_bytes
+            up_threads = max(cfg["up_streams"], 1) * len(urls)
+            up_size = cfg["up_bytes"]
+            if up_limit is not None:
+                # 한도가 요청 경계에서 끝나도록 나눠, 마지막 요청도 서버 응답까지 받고 끝나게 함
+                up_size = min(up_size, max(up_limit // up_threads, CHUNK_BYTES))
+            workers = [lambda m, u=url: _upload_worker(m, u, up_size)
+                       for url in urls for _ in range(max(cfg["up_streams"], 1))]
+            up_mbps, up_bytes = run_transfer(workers, cap, up_limit, stop_event, upload=True)
+
+    return {
+        "download_mbps": down_mbps,
+        "upload_mbps": up_mbps,
+        "bytes_used": down_bytes + up_bytes,
+        "servers": len(urls),
+        "streams": max(cfg["down_streams"], 1) * len(urls),
+        "cpu_pct": round(cpu.process_pct, 1),
+        "sys_cpu_pct": round(cpu.system_pct, 1),
+    }
+
+
+class BandwidthProbe(Probe):
+    """
+    대역폭 측정 프로브 ('bandwidth', 비용 등급 BANDWIDTH). ctx.cap과 plan으로 run_bandwidth를 실행하며,
+    취소되거나 제한 시간을 넘기면 진행 중인 전송 스레드를 멈춥니다.
+    """
+    name = "bandwidth"
+
+    def __init__(self, plan: Optional[StreamPlan] = None):
+        self.plan = plan
+
+    async def measure(self, ctx: ProbeContext) -> dict:
+        return await run_in_thread(lambda stop: run_bandwidth(stop, ctx.cap, self.plan))
@@ -0,0 +1,191 @@
+# src/compare.py
+from __future__ import annotations
+import datetime as dt
+import math
+import re
+import time
+from pathlib import Path
+from typing import Optional, Tuple, Dict, TextIO
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import local_time_parts, DAYS
+from .detect import DIRECTIONS
+from .rollup import load_combined, METRICS
+from .storage import DEFAULT_LOG_PATH
+
+_RELATIVE_RE = re.compile(r"^-?(\d+(?:\.\d+)?)([mhdw])$")
+_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_time(text: str, now: Optional[float] = None) -> int:
+    """
+    시각 문자열을 유닉스 시각으로 변환합니다 (로컬 시간대).
+    'now', 지금으로부터 상대 시각('7d', '12h', '2w', '30m', 앞의 '-'는 생략 가능),
+    'YYYY-MM-DD', 'YYYY-MM-DD HH:MM'을 지원합니다.
+    """
+    now = now if now is not None else time.time()
+    text = text.strip()
+    if text == "now":
+        return int(now)
+    m = _RELATIVE_RE.match(text)
+    if m:
+        return int(now - float(m.group(1)) * _UNITS[m.group(2)])
+    for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return int(dt.datetime.strptime(text, fmt).timestamp())
+        except ValueError:
+            continue
+    raise ValueError(f"시각 형식을 알 수 없습니다: {text!r} (예: 2024-05-01, '2024-05-01 18:00', 7d, now)")
+
+
+def parse_range(text: str, now: Optional[float] = None) -> Tuple[int, int]:
+    """ 'START..END' 형식의 구간을 [start, end) 유닉스 시각으로 변환합니다. """
+    if ".." not in text:
+        raise ValueError(f"구간은 START..END 형식이어야 합니다: {text!r}")
+    a, b = text.split("..", 1)
+    start, end = parse_time(a, now), parse_time(b, now)
+    if end <= start:
+        raise ValueError(f"구간의 끝이 시작보다 빠릅니다: {text!r}")
+    return start, end
+
+
+def parse_hours(text: str) -> set:
+    """ '18-23', '22-2'(자정 넘김), '9' 형식의 시간대 필터를 시(0~23) 집합으로 변환합니다. """
+    if "-" in text:
+        a, b = (int(x) for x in text.split("-", 1))
+        if not (0 <= a <= 23 and 0 <= b <= 23):
+            raise ValueError(f"시간대는 0~23이어야 합니다: {text!r}")
+        return set(range(a, b + 1)) if a <= b else set(range(a, 24)) | set(range(0, b + 1))
+    h = int(text)
+    if not 0 <= h <= 23:
+        raise ValueError(f"시간대는 0~23이어야 합니다: {text!r}")
+    return {h}
+
+
+def _bucket_stats(df: pd.DataFrame, key: Optional[str]) -> Dict[str, pd.DataFrame]:
+    """
+    지표별 (n, mean, var)를 key 버킷마다 계산합니다 (key=None이면 전체).
+    시간별 집계 행은 평균값이 표본 수만큼 있는 것으로 보므로 분산은 다소 작게 잡힙니다.
+    """
+    out = {}
+    groups = df[key] if key else pd.Series(0, index=df.index)
+    for m in METRICS:
+        if m not in df.columns:
+            continue
+        w = df[f"{m}_n"].fillna(0) if f"{m}_n" in df.columns else df[m].notna().astype("float64")
+        x = df[m].fillna(0)
+        n = w.groupby(groups).sum()
+        s1 = (x * w).groupby(groups).sum()
+        s2 = (x * x * w).groupby(groups).sum()
+        mean = s1 / n.where(n > 0)
+        var = (s2 - n * mean * mean) / (n - 1).where(n > 1)
+        out[m] = pd.DataFrame({"n": n, "mean": mean, "var": var.clip(lower=0)})
+    return out
+
+
+def _compare_frames(a: pd.DataFrame, b: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """
+    두 구간의 버킷별 평균 차이(B - A)와 Welch 검정 p값(정규 근사)을 계산합니다.
+    표본이 각각 2개 이상인 버킷만 p값을 계산합니다.
+    """
+    t = a.join(b, how="outer", lsuffix="_a", rsuffix="_b")
+    delta = t["mean_b"] - t["mean_a"]
+    se = np.sqrt(t["var_a"] / t["n_a"] + t["var_b"] / t["n_b"])
+    z = delta / se.where(se > 0)
+    p = z.abs().map(lambda v: math.erfc(v / math.sqrt(2)) if pd.notna(v) else float("nan"))
+    p[(t["n_a"] < 2) | (t["n_b"] < 2)] = float("nan")
+
+    sig = p.map(lambda v: "**" if v < 0.01 else ("*" if v < 0.05 else "") if pd.notna(v) else "")
+    # 지표의 '나쁜' 방향(detect.DIRECTIONS) 기준으로 유의한 변화만 better/worse 표시
+    worse = delta * DIRECTIONS[metric] > 0
+    trend = np.where(sig == "", "", np.where(worse, "worse", "better"))
+    return pd.DataFrame({
+        "n_a": t["n_a"].fillna(0).astype("int64"),
+        "mean_a": t["mean_a"],
+        "n_b": t["n_b"].fillna(0).astype("int64"),
+        "mean_b": t["mean_b"],
+        "delta": delta,
+        "delta_pct": 100 * delta / t["mean_a"].abs().where(t["mean_a"] != 0),
+        "p": p,
+        "sig": sig,
+        "trend": trend,
+    })
+
+
+def _load_range(log_path: Path, start: int, end: int, hours: Optional[set]) -> Optional[pd.DataFrame]:
+    """ 구간 하나를 읽어 시/요일 컬럼을 붙입니다 (세그먼트는 manifest, 활성 CSV는 희소 인덱스로 선별). """
+    df = load_combined(log_path=log_path, start=start, end=end)
+    if df is None or df.empty:
+        return None
+    df = df.copy()
+    hh, dows = local_time_parts(df["timestamp"].to_numpy())
+    df["hour"] = hh
+    df["day_of_week"] = [DAYS[d] for d in dows]
+    if hours is not None:
+        df = df[df["hour"].isin(hours)]
+    return df if not df.empty else None
+
+
+def compare_ranges(log_path: Path, range_a: Tuple[int, int], range_b: Tuple[int, int],
+                   hours: Optional[set] = None) -> Optional[Dict[str, Dict[str, pd.DataFrame]]]:
+    """
+    두 구간(A = 기준, B = 비교 대상)의 지표를 전체/시간대별/요일별로 비교합니다.
+    반환: {"overall"|"hourly"|"daily": {지표: 비교 표}}. 어느 한쪽에 데이터가 없으면 None.
+    """
+    a = _load_range(log_path, *range_a, hours)
+    b = _load_range(log_path, *range_b, hours)
+    if a is None or b is None:
+        return None
+
+    result = {}
+    for name, key in (("overall", None), ("hourly", "hour"), ("daily", "day_of_week")):
+        sa, sb = _bucket_stats(a, key), _bucket_stats(b, key)
+        tables = {m: _compare_frames(sa[m], sb[m], m) for m in sa if m in sb}
+        if key == "day_of_week":
+            tables = {m: t.reindex([d for d in DAYS if d in t.index]) for m, t in tables.items()}
+        result[name] = tables
+    return result
+
+
+def _fmt_range(r: Tuple[int, int]) -> str:
+    fmt = "%Y-%m-%d %H:%M"
+    return f"{dt.datetime.fromtimestamp(r[0]).strftime(fmt)} ~ {dt.datetime.fromtimestamp(r[1]).strftime(fmt)}"
+
+
+def print_comparison(result: Dict[str, Dict[str, pd.DataFrame]], range_a: Tuple[int, int],
+                     range_b: Tuple[int, int], hours: Optional[set] = None,
+                     out: Optional[TextIO] = None):
+    """ compare_ranges 결과를 텍스트로 출력합니다. """
+    print("\n--- NetSpeed Comparison Report ---", file=out)
+    print(f"A (baseline): {_fmt_range(range_a)}", file=out)
+    print(f"B           : {_fmt_range(range_b)}", file=out)
+    if hours is not None:
+        print(f"Hours       : {', '.join(str(h) for h in sorted(hours))}", file=out)
+    print("delta = B - A, sig: * p<0.05, ** p<0.01 (Welch, normal approximation)", file=out)
+
+    pd_opts = ("display.float_format", "{:.2f}".format, "display.width", 200)
+    with pd.option_context(*pd_opts):
+        print("\n[Overall]", file=out)
+        overall = pd.concat({m: t.iloc[0] for m, t in result["overall"].items()}, axis=1).T
+        print(overall.to_string(), file=out)
+        for name, title in (("hourly", "Hourly"), ("daily", "Day of Week")):
+            for m, table in result[name].items():
+                print(f"\n[{title}: {m}]", file=out)
+                print(table.to_string(), file=out)
+    print("\n--- End of Report ---", file=out)
+
+
+def run_compare(log_path: Path = DEFAULT_LOG_PATH, range_a: str = "14d..7d", range_b: str = "7d..now",
+                hours: Optional[str] = None, out: Optional[TextIO] = None) -> bool:
+    """ 문자열 인자로 비교를 실행하고 리포트를 출력합니다. 데이터가 없으면 False. """
+    now = time.time()
+    ra, rb = parse_range(range_a, now), parse_range(range_b, now)
+    hour_set = parse_hours(hours) if hours else None
+    result = compare_ranges(log_path, ra, rb, hour_set)
+    if result is None:
+        print("두 구간 중 하나에 데이터가 없습니다.", file=out)
+        return False
+    print_comparison(result, ra, rb, hour_set, out)
+    return True
@@ -0,0 +1,139 @@
+# src/core.py
+from __future__ import annotations
+import asyncio
+import tempfile
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, TYPE_CHECKING
+
+from .measure import Probe, ProbeContext, ProbeError, StageTimeout, BANDWIDTH
+from .storage import log_lock, DEFAULT_LOG_PATH
+
+if TYPE_CHECKING:
+    from .bandwidth import BandwidthCap
+
+# 같은 컴퓨터의 모든 측정 프로세스(GUI, cron으로 실행한 CLI)가 공유하는 대역폭 측정 잠금
+# (로그 경로가 달라도 회선은 같으므로 로그 폴더가 아닌 임시 폴더에 둠)
+BANDWIDTH_LOCK = Path(tempfile.gettempdir()) / "netspeed_bandwidth"
+# 제한 시간을 넘긴 프로브를 취소한 뒤 정리(ping 프로세스 종료 등)를 기다리는 최대 시간
+CANCEL_GRACE_S = 1.0
+
+_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def bandwidth_slot(poll_s: float = 0.2):
+    """
+    대역폭 측정 순번. 같은 이벤트 루프 안에서는 세마포어로, 다른 스레드/프로세스와는
+    BANDWIDTH_LOCK 잠금 파일로 한 번에 하나만 측정하게 합니다 (두 측정이 회선을 나눠 쓰면 둘 다 낮게 나옴).
+    잠금 파일은 기다리지 않는 방식으로 poll_s마다 다시 시도하므로, 순번을 기다리는 중에도 바로 취소됩니다.
+    """
+    loop = asyncio.get_running_loop()
+    sem = _slots.get(loop)
+    if sem is None:
+        sem = _slots[loop] = asyncio.Semaphore(1)
+    async with sem:
+        while True:
+            lock = log_lock(BANDWIDTH_LOCK, blocking=False)
+            try:
+                lock.__enter__()
+                break
+            except BlockingIOError:
+                await asyncio.sleep(poll_s)
+        try:
+            yield
+        finally:
+            lock.__exit__(None, None, None)
+
+
+@dataclass
+class RoundResult:
+    """
+    MeasureCore.measure 한 번의 결과.
+    row: 메인 로그 한 행, tables: 보조 테이블 이름 -> 행 목록, errors: 프로브별 실패 (시간 초과 포함)
+    """
+    row: dict
+    tables: Dict[str, List[dict]] = field(default_factory=dict)
+    errors: List[Exception] = field(default_factory=list)
+
+
+class MeasureCore:
+    """
+    측정 한 주기를 asyncio로 실행합니다 (CLI --loop/--once와 GUI가 MeasureEngine을 통해 공유).
+    probes의 각 프로브는 비용 등급(ProbeSpec.cost)에 따라
+    1단계: LATENCY 프로브(핑, DNS/TCP/HTTP, 경로 등)를 모두 동시에 실행
+    2단계: BANDWIDTH 프로브를 bandwidth_slot 순번을 받아 하나씩 실행
+           (지연 측정이 대역폭 측정의 부하를 재지 않도록 1단계가 끝난 뒤 시작)
+    프로브마다 제한 시간(budgets[name], 없으면 probe.budget_s)을 넘기면 그 프로브만 취소하고
+    StageTimeout을 errors에 남기므로, 멈춘 프로브 하나가 주기 전체를 붙잡지 않습니다.
+    바깥에서 작업을 취소하면 진행 중인 모든 프로브가 함께 취소됩니다.
+    """
+
+    def __init__(self, probes: List[Probe], host: str = "8.8.8.8", log_path: Path = DEFAULT_LOG_PATH,
+                 budgets: Optional[Dict[str, float]] = None):
+        self.probes = probes
+        self.host = host
+        self.log_path = log_path
+        self.budgets = dict(budgets or {})
+
+    def budget(self, probe: Probe) -> float:
+        return self.budgets.get(probe.name, probe.budget_s)
+
+    async def run_probe(self, probe: Probe, ctx: ProbeContext):
+        """ 제한 시간 안에 probe를 실행합니다. 넘기면 취소하고 StageTimeout을 발생시킵니다. """
+        budget = self.budget(probe)
+        task = asyncio.ensure_future(probe.measure(ctx))
+        # 취소 뒤 늦게 끝난 작업의 예외는 아무도 기다리지 않으므로 여기서 확인만 함
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        try:
+            done, _ = await asyncio.wait({task}, timeout=budget)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if task in done:
+            return task.result()
+        task.cancel()
+        await asyncio.wait({task}, timeout=CANCEL_GRACE_S)
+        raise StageTimeout(f"{probe.name} 프로브 시간 초과 ({budget:g}초)")
+
+    async def _run_heavy(self, probe: Probe, ctx: ProbeContext):
+        async with bandwidth_slot(): # 순번을 기다리는 시간은 제한 시간에 넣지 않음
+            return await self.run_probe(probe, ctx)
+
+    async def measure(self, cap: Optional[BandwidthCap] = None) -> RoundResult:
+        """
+        한 주기를 측정합니다. row는 timestamp와 프로브 순서대로의 columns(실패 시 NaN), 그 뒤에
+        프로브가 더 돌려준 컬럼입니다. table 프로브의 행은 같은 timestamp로 tables에 모읍니다.
+        기록은 호출한 쪽(MeasureEngine)에서 합니다.
+        """
+        ctx = ProbeContext(timestamp=int(time.time()), host=self.host, log_path=self.log_path, cap=cap)
+        light = [p for p in self.probes if p.spec.cost != BANDWIDTH]
+        heavy = [p for p in self.probes if p.spec.cost == BANDWIDTH]
+        outcomes = await asyncio.gather(*(self.run_probe(p, ctx) for p in light), return_exceptions=True)
+        for probe in heavy:
+            try:
+                outcomes.append(await self._run_heavy(probe, ctx))
+            except Exception as e:
+                outcomes.append(e)
+
+        result = RoundResult(row={"timestamp": ctx.timestamp})
+        extra = {}
+        for probe, out in zip(light + heavy, outcomes):
+            spec = probe.spec
+            if isinstance(out, BaseException):
+                if not isinstance(out, Exception):
+                    raise out # CancelledError 등
+                result.errors.append(out if isinstance(out, StageTimeout)
+                                     else ProbeError(f"{probe.name} 프로브 실패: {out}"))
+                out = [] if spec.table else probe.failed()
+            if spec.table:
+                result.tables.setdefault(spec.table, []).extend(out)
+                continue
+            for col in spec.columns:
+                result.row[col] = out.get(col, float("nan"))
+            extra.update((k, v) for k, v in out.items() if k not in spec.columns)
+        result.row.update(extra)
+        return result
@@ -0,0 +1,249 @@
+# src/detect.py
+from __future__ import annotations
+import datetime as dt
+import json
+import math
+import os
+import subprocess
+import urllib.request
+from pathlib import Path
+from typing import Optional, Dict, List, Callable
+
+import pandas as pd
+
+from .rollup import METRICS
+
+# 지표별 '나쁜' 방향: +1 = 값이 클수록 나쁨(핑), -1 = 값이 작을수록 나쁨(대역폭)
+DIRECTIONS = {
+    "ping_ms": +1,
+    "download_mbps": -1,
+    "upload_mbps": -1,
+}
+
+GLOBAL_BUCKET = "all"
+
+
+def default_state_path(log_path: Path) -> Path:
+    """ 로그 파일 옆에 두는 탐지기 상태 파일 경로 (예: data/logs_detector.json) """
+    return log_path.with_name(f"{log_path.stem}_detector.json")
+
+
+class AnomalyDetector:
+    """
+    측정 루프에서 한 행씩 갱신하는 이상 탐지기.
+
+    - 지표별로 시간대(0~23시) 버킷과 전체 버킷의 EWMA 평균/분산을 유지
+      (해당 시간대 표본이 min_samples 미만이면 전체 버킷을 기준선으로 사용)
+    - 기준선 대비 '나쁜' 방향의 z-score가 z_threshold를 넘으면 spike 경보
+    - z-score 누적합(CUSUM, 허용치 cusum_k)이 cusum_h를 넘으면 지속 저하(drift) 경보
+    - 갱신은 표본당 O(1)이며, 상태는 state_path(JSON)에 저장되어 재시작 시 이력 재스캔 불필요
+
+    hooks: 경보 dict를 받는 콜러블 목록 (LogHook, CommandHook, WebhookHook 등)
+    """
+
+    def __init__(self, state_path: Optional[Path] = None, hooks: Optional[List[Callable[[dict], None]]] = None,
+                 alpha: float = 0.05, z_threshold: float = 4.0,
+                 cusum_k: float = 1.0, cusum_h: float = 8.0,
+                 min_samples: int = 5, rel_sd_floor: float = 0.05):
+        self.state_path = state_path
+        self.hooks = hooks or []
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.min_samples = min_samples
+        self.rel_sd_floor = rel_sd_floor
+
+        # baselines[metric][bucket] = {"n": int, "mean": float, "var": float}
+        self.baselines: Dict[str, Dict[str, dict]] = {m: {} for m in METRICS}
+        self.cusum: Dict[str, float] = {m: 0.0 for m in METRICS}
+        self.last_timestamp: Optional[int] = None
+
+        if state_path is not None:
+            self.load()
+
+    # --- 상태 저장/복원 ---
+    def load(self) -> bool:
+        """ state_path에서 상태를 불러옵니다. 파일이 없거나 손상되었으면 False. """
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        for m in METRICS:
+            self.baselines[m] = state.get("baselines", {}).get(m, {})
+            self.cusum[m] = float(state.get("cusum", {}).get(m, 0.0))
+        self.last_timestamp = state.get("last_timestamp")
+        return True
+
+    def save(self):
+        """ 상태를 state_path에 원자적으로 저장합니다 (임시 파일 작성 후 교체). """
+        if self.state_path is None:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "baselines": self.baselines,
+                "cusum": self.cusum,
+                "last_timestamp": self.last_timestamp,
+            }, f)
+        os.replace(tmp, self.state_path)
+
+    # --- 기준선 ---
+    def _bucket_stats(self, metric: str, bucket: str) -> dict:
+        return self.baselines[metric].setdefault(bucket, {"n": 0, "mean": 0.0, "var": 0.0})
+
+    def baseline(self, metric: str, hour: int) -> Optional[dict]:
+        """ 해당 시간대의 기준선(충분한 표본이 없으면 전체 버킷). 없으면 None. """
+        for bucket in (str(hour), GLOBAL_BUCKET):
+            stats = self.baselines[metric].get(bucket)
+            if stats and stats["n"] >= self.min_samples:
+                return stats
+        return None
+
+    def _score(self, metric: str, value: float, stats: dict) -> float:
+        sd = math.sqrt(max(stats["var"], 0.0))
+        sd = max(sd, abs(stats["mean"]) * self.rel_sd_floor, 1e-9)
+        return DIRECTIONS[metric] * (value - stats["mean"]) / sd
+
+    def _learn(self, metric: str, bucket: str, value: float, damp: float = 1.0):
+        stats = self._bucket_stats(metric, bucket)
+        if stats["n"] == 0:
+            stats["mean"], stats["var"] = value, 0.0
+        else:
+            # 표본이 적을 때는 단순 평균처럼, 이후에는 alpha로 지수 가중
+            a = max(self.alpha, 1.0 / (stats["n"] + 1)) * damp
+            diff = value - stats["mean"]
+            stats["mean"] += a * diff
+            stats["var"] = (1 - a) * (stats["var"] + a * diff * diff)
+        stats["n"] += 1
+
+    # --- 갱신 ---
+    def update(self, row: dict, fire: bool = True, persist: bool = True) -> List[dict]:
+        """
+        측정 행 하나로 탐지기를 갱신하고 발생한 경보 목록을 반환합니다.
+        fire=True면 경보마다 hooks를 호출하고, persist=True면 상태를 저장합니다.
+        """
+        ts = int(row.get("timestamp") or 0)
+        hour = dt.datetime.fromtimestamp(ts).hour
+        alerts = []
+
+        for metric in METRICS:
+            value = row.get(metric)
+            if value is None or pd.isna(value):
+                continue
+            value = float(value)
+
+            stats = self.baseline(metric, hour)
+            damp = 1.0
+            if stats is not None:
+                z = self._score(metric, value, stats)
+                self.cusum[metric] = max(0.0, self.cusum[metric] + z - self.cusum_k)
+                kind = None
+                if z >= self.z_threshold:
+                    kind = "spike"
+                elif self.cusum[metric] >= self.cusum_h:
+                    kind = "drift"
+                if kind:
+                    self.cusum[metric] = 0.0
+                    alerts.append({
+                        "timestamp": ts,
+                        "metric": metric,
+                        "kind": kind,
+                        "value": value,
+                        "baseline": stats["mean"],
+                        "score": round(z, 2),
+                        "message": f"{metric} {kind}: {value:.2f} (기준선 {stats['mean']:.2f}, {hour}시, z={z:.1f})",
+                    })
+                # 나쁜 쪽으로 크게 벗어난 표본은 천천히 반영해 기준선이 저하를 바로 흡수하지 않도록 함
+                if z > 2 * self.cusum_k:
+                    damp = 0.1
+
+            self._learn(metric, str(hour), value, damp)
+            self._learn(metric, GLOBAL_BUCKET, value, damp)
+
+        self.last_timestamp = ts
+        if fire:
+            for alert in alerts:
+                self.fire(alert)
+        if persist:
+            self.save()
+        return alerts
+
+    def learn_history(self, df: Optional[pd.DataFrame]):
+        """
+        상태 파일의 last_timestamp 이후 행들로 기준선을 학습합니다 (경보 없이).
+        상태 파일이 없을 때 한 번만 전체 이력을 훑으면 이후에는 필요 없음.
+        """
+        if df is None or df.empty or "timestamp" not in df.columns:
+            return
+        if self.last_timestamp is not None:
+            df = df[df["timestamp"] > self.last_timestamp]
+        for row in df.sort_values("timestamp").to_dict("records"):
+            self.update(row, fire=False, persist=False)
+        self.save()
+
+    def fire(self, alert: dict):
+        """ 모든 hook에 경보를 전달합니다. hook 하나의 실패가 측정 루프를 멈추지 않도록 함. """
+        for hook in self.hooks:
+            try:
+                hook(alert)
+            except Exception as e:
+                print(f"[ALERT HOOK ERROR] {hook!r}: {e}")
+
+
+# --- 경보 hook ---
+class LogHook:
+    """ 경보를 한 줄로 출력하고, path 지정 시 파일에도 추가합니다. """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+
+    def __call__(self, alert: dict):
+        when = dt.datetime.fromtimestamp(alert["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[ALERT] {when} {alert['message']}"
+        print(line)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, mode="a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class CommandHook:
+    """
+    경보마다 셸 명령을 실행합니다. 경보 내용은 표준입력(JSON)과
+    NETSPEED_ALERT_* 환경변수로 전달됩니다.
+    """
+
+    def __init__(self, command: str, timeout_s: float = 10):
+        self.command = command
+        self.timeout_s = timeout_s
+
+    def __call__(self, alert: dict):
+        env = dict(os.environ)
+        for key, value in alert.items():
+            env[f"NETSPEED_ALERT_{key.upper()}"] = str(value)
+        subprocess.run(self.command, shell=True, input=json.dumps(alert, ensure_ascii=False),
+                       text=True, env=env, timeout=self.timeout_s, check=False)
+
+    def __repr__(self):
+        return f"CommandHook({self.command!r})"
+
+
+class WebhookHook:
+    """ 경보를 JSON으로 POST합니다 (예: http://127.0.0.1:8080/alerts). """
+
+    def __init__(self, url: str, timeout_s: float = 5):
+        self.url = url
+        self.timeout_s = timeout_s
+
+    def __call__(self, alert: dict):
+        data = json.dumps(alert, ensure_ascii=False).encode("utf-8")
+        req = urllib.request.Request(self.url, data=data, method="POST",
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout_s) as resp:
+            resp.read()
+
+    def __repr__(self):
+        return f"WebhookHook({self.url!r})"
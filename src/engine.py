@@ -0,0 +1,292 @@
+# src/engine.py
+from __future__ import annotations
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Optional, Callable, List, Dict, TYPE_CHECKING
+
+from .storage import append_row, table_path, RotationPolicy, DEFAULT_LOG_PATH
+from .measure import ping_async, create_probe, PingProbe, ProbeSet
+from .core import MeasureCore
+from .adaptive import AdaptiveScheduler
+from .detect import AnomalyDetector
+from .passive import PassiveMonitor
+from .pyramid import update_pyramid
+
+if TYPE_CHECKING:
+    from .bandwidth import BandwidthCap, StreamPlan
+    from .path_probe import PathProbe
+
+# 일일 예산 잔량이 이보다 적으면 측정하지 않음 (의미 있는 처리량 추정에 필요한 최소량)
+MIN_BUDGET_MB = 1.0
+
+
+@dataclass
+class EngineConfig:
+    """
+    MeasureEngine에 붙이는 선택 하위 시스템과 측정 설정. 기본값이면 핑 1회와 대역폭만 측정합니다.
+    - scheduler(AdaptiveScheduler): interval_sec 대신 스케줄러가 정한 간격을 사용하고,
+      대기 중에는 probe_interval마다 핑만 보내 이탈이 감지되면 바로 다음 측정을 시작
+    - detector(AnomalyDetector): 저장된 각 행으로 탐지기를 갱신하고, 경보 hook은 전용 스레드에서 호출
+    - rotation(RotationPolicy): 기록할 때마다 로그 회전 조건을 확인
+    - probes(ProbeSet): 측정마다 DNS/TCP/HTTP 프로브를 동시에 실행해 보조 테이블(<로그 이름>_probes.csv)에
+      같은 timestamp로 기록
+    - passive(PassiveMonitor): 측정 직전의 실제 사용량을 bg_rx_mbps/bg_tx_mbps 컬럼에 기록하고,
+      회선이 이미 바쁘면(busy_mbps 이상) 능동 측정을 건너뜀
+    - path_probe(PathProbe): 측정마다 경로의 홉별 지연/손실을 hops_path에 기록
+    - cap(BandwidthCap): 대역폭 측정의 데이터량/시간 제한. scheduler에 일일 예산이 있으면
+      남은 예산을 넘지 않도록 줄이고, 예산을 다 썼으면 측정을 건너뜀
+    - plan(StreamPlan): 서버당 병렬 스트림 수와 동시에 사용할 서버 수를 바꿔 측정하고,
+      측정 중 CPU 사용률(cpu_pct, sys_cpu_pct)도 기록
+    - ping_count > 1이면 핑을 ping_interval_s 간격 버스트로 보내 지터/손실률 컬럼도 기록
+    - extra_probes: 함께 실행할 등록된 프로브 이름 (measure.register_probe, entry point).
+      구현 모듈은 엔진을 만들 때 처음 임포트
+    - budgets: {프로브 이름: 초} 프로브별 제한 시간
+    """
+    scheduler: Optional[AdaptiveScheduler] = None
+    detector: Optional[AnomalyDetector] = None
+    rotation: Optional[RotationPolicy] = None
+    probes: Optional[ProbeSet] = None
+    passive: Optional[PassiveMonitor] = None
+    path_probe: Optional[PathProbe] = None
+    cap: Optional[BandwidthCap] = None
+    plan: Optional[StreamPlan] = None
+    ping_count: int = 1
+    ping_interval_s: float = 0.2
+    extra_probes: List[str] = field(default_factory=list)
+    budgets: Dict[str, float] = field(default_factory=dict)
+
+
+class MeasureEngine:
+    """
+    CLI와 GUI가 공유하는 측정 루프 엔진.
+    루프는 엔진을 실행한 스레드의 asyncio 이벤트 루프에서 돌고, 한 주기의 측정은 MeasureCore가 맡습니다
+    (지연 계열 프로브는 동시에, 대역폭 측정은 순번을 받아 하나씩, 프로브마다 제한 시간 적용).
+    측정 결과와 진행 상황은 콜백으로 전달하며, stop() 호출 시 루프 작업을 취소해 대기 중이거나
+    진행 중인 측정(ping 프로세스, 다운로드/업로드 전송 포함)을 바로 중단합니다.
+
+    콜백 (모두 엔진을 실행한 스레드에서 호출됨 - GUI는 root.after로 넘겨야 함):
+    - on_start(i): i번째 측정 시작
+    - on_result(i, row): 측정 및 저장 완료
+    - on_error(i, exc): 측정/저장 중 예외 발생
+    - on_wait(remaining_sec): 다음 측정까지 남은 시간 (1초마다)
+    - on_finish(cancelled): 루프 종료 (stop()으로 중단되었으면 True)
+    - on_probes(i, rows): 프로브 결과 기록 완료 (probes 지정 시)
+    - on_skip(i, reason): 회선이 바빠 능동 측정을 건너뜀 (passive 지정 시)
+    - on_path(i, hops): 홉별 경로 측정 기록 완료 (path_probe 지정 시)
+
+    선택 하위 시스템(적응형 간격, 이상 탐지, 회전, 프로브, 수동 측정, 대역폭 제한)은 config(EngineConfig)로 받습니다.
+    """
+
+    def __init__(self, host: str = "8.8.8.8", log_path: Path = DEFAULT_LOG_PATH,
+                 interval_sec: int = 300, count: Optional[int] = None,
+                 config: Optional[EngineConfig] = None,
+                 on_start: Optional[Callable[[int], None]] = None,
+                 on_result: Optional[Callable[[int, dict], None]] = None,
+                 on_error: Optional[Callable[[int, Exception], None]] = None,
+                 on_wait: Optional[Callable[[int], None]] = None,
+                 on_finish: Optional[Callable[[bool], None]] = None,
+                 on_probes: Optional[Callable[[int, list], None]] = None,
+                 on_skip: Optional[Callable[[int, str], None]] = None,
+                 on_path: Optional[Callable[[int, list], None]] = None):
+        self.host = host
+        self.log_path = log_path
+        self.interval_sec = interval_sec
+        self.count = count
+        self.config = config = config or EngineConfig()
+        self.on_start = on_start
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_wait = on_wait
+        self.on_finish = on_finish
+        self.on_probes = on_probes
+        self.on_skip = on_skip
+        self.on_path = on_path
+        # 켠 프로브만 만들고 모듈을 임포트함 (대역폭 측정과 speedtest는 여기서 처음 불러옴)
+        enabled = [PingProbe(config.ping_count, config.ping_interval_s)]
+        if config.probes:
+            enabled.append(config.probes)
+        if config.path_probe is not None:
+            enabled.append(config.path_probe)
+        enabled += [create_probe(name) for name in config.extra_probes]
+        enabled.append(create_probe("bandwidth", plan=config.plan))
+        self.core = MeasureCore(enabled, host=host, log_path=log_path, budgets=config.budgets)
+
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._alerts: Optional[ThreadPoolExecutor] = None
+
+    # --- 제어 ---
+    def start(self) -> threading.Thread:
+        """ 백그라운드 데몬 스레드에서 run()을 시작합니다. """
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        """ 루프 중단을 요청합니다 (다른 스레드에서 호출 가능). 진행 중인 측정도 즉시 취소됩니다. """
+        self.stop_event.set()
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass # 루프가 이미 끝남
+
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def _alert_executor(self) -> ThreadPoolExecutor:
+        """ 경보 hook 전용 스레드 (처음 경보가 날 때 만듦, 엔진을 다시 시작해도 재사용) """
+        if self._alerts is None:
+            self._alerts = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-hooks")
+        return self._alerts
+
+    # --- 실행 ---
+    def measure_once(self, i: int = 1) -> Optional[dict]:
+        """ measure_once_async를 새 이벤트 루프에서 실행합니다 (루프 밖에서 1회만 측정할 때). """
+        try:
+            return asyncio.run(self.measure_once_async(i))
+        except asyncio.CancelledError:
+            return None
+
+    async def measure_once_async(self, i: int = 1) -> Optional[dict]:
+        """
+        1회 측정 후 log_path에 저장합니다.
+        오류가 나면 None을 반환하고, 취소되면 아무것도 기록하지 않고 CancelledError를 전달합니다.
+        """
+        scheduler, passive, cap = self.config.scheduler, self.config.passive, self.config.cap
+        if scheduler is not None and scheduler.daily_budget_mb is not None:
+            left_mb = scheduler.budget_left_mb()
+            if left_mb < MIN_BUDGET_MB:
+                if self.on_skip:
+                    self.on_skip(i, f"오늘 데이터 예산 소진 (남은 예산 {max(left_mb, 0):.1f}MB)")
+                return None
+            from .bandwidth import BandwidthCap
+            cap = (cap or BandwidthCap()).limited(int(left_mb * 1_000_000))
+
+        background = None
+        if passive is not None:
+            if passive.is_busy():
+                rx, tx = passive.recent()
+                if self.on_skip:
+                    self.on_skip(i, f"회선 사용 중 (수신 {rx:.1f} / 송신 {tx:.1f} Mbps)")
+                return None
+            background = passive.recent()
+
+        if self.on_start:
+            self.on_start(i)
+        try:
+            if passive is not None:
+                passive.active.set() # 측정 자체 트래픽을 수동 기록에서 구분
+            try:
+                result = await self.core.measure(cap=cap)
+            finally:
+                if passive is not None:
+                    passive.active.clear()
+            row = result.row
+            if background is not None:
+                row["bg_rx_mbps"], row["bg_tx_mbps"] = round(background[0], 3), round(background[1], 3)
+            append_row(row, log_path=self.log_path, rotation=self.config.rotation)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.on_error:
+                self.on_error(i, e)
+            return None
+
+        try:
+            # 그래프용 해상도 피라미드에 새 행만 반영 (처음 만들기/다시 만들기는 측정 중에 하지 않고 그래프 조회에 맡김)
+            update_pyramid(self.log_path, build=False)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(i, e)
+
+        if self.on_result:
+            self.on_result(i, row)
+        for e in result.errors: # 시간 초과 등 프로브별 실패
+            if self.on_error:
+                self.on_error(i, e)
+        callbacks = {"probes": self.on_probes, "hops": self.on_path}
+        for table, rows in result.tables.items():
+            if not rows:
+                continue
+            try:
+                for table_row in rows:
+                    append_row(table_row, log_path=table_path(self.log_path, table))
+                if callbacks.get(table):
+                    callbacks[table](i, rows)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(i, e)
+        detector = self.config.detector
+        if detector:
+            try:
+                # 탐지는 여기서 바로 하고, 경보 hook(명령 실행, 웹훅 - 최대 수 초)은 이벤트 루프를 막지 않도록
+                # 전용 스레드 하나에서 발생 순서대로 실행
+                loop = asyncio.get_running_loop()
+                for alert in detector.update(row, fire=False):
+                    loop.run_in_executor(self._alert_executor(), detector.fire, alert)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(i, e)
+        return row
+
+    async def wait(self, seconds: int) -> bool:
+        """
+        seconds 동안 1초 단위로 대기합니다. 중단 요청 시 False 반환.
+        스케줄러가 있으면 대기 중 핑으로 이탈을 확인하고, 감지 시 대기를 일찍 끝냅니다.
+        """
+        scheduler = self.config.scheduler
+        for elapsed in range(seconds):
+            if self.on_wait:
+                self.on_wait(seconds - elapsed)
+            await asyncio.sleep(1)
+            if self.stop_event.is_set():
+                return False
+            if scheduler and (elapsed + 1) % scheduler.probe_interval == 0 \
+                    and elapsed + 1 < seconds:
+                ping = await ping_async(self.host)
+                if scheduler.observe_ping(ping["ping_ms"]):
+                    break
+        return not self.stop_event.is_set()
+
+    def next_delay(self, row: Optional[dict]) -> int:
+        """ 다음 측정까지의 대기 시간(초). """
+        scheduler = self.config.scheduler
+        if scheduler is None:
+            return self.interval_sec
+        if row is None:
+            return scheduler.idle_delay()
+        return scheduler.observe(row)
+
+    def run(self):
+        """ count회(None이면 무제한) interval_sec 간격으로 측정합니다 (이 스레드에서 이벤트 루프 실행). """
+        try:
+            asyncio.run(self.run_async())
+        except asyncio.CancelledError:
+            pass # stop()으로 취소됨
+
+    async def run_async(self):
+        self._loop, self._task = asyncio.get_running_loop(), asyncio.current_task()
+        i = 0
+        try:
+            while not self.stop_event.is_set():
+                i += 1
+                row = await self.measure_once_async(i)
+                if self.count and i >= self.count:
+                    break
+                if not await self.wait(self.next_delay(row)):
+                    break
+        except asyncio.CancelledError:
+            self.stop_event.set() # stop() 또는 Ctrl+C
+            raise
+        finally:
+            self._loop = self._task = None
+            if self.on_finish:
+                self.on_finish(self.stop_event.is_set())
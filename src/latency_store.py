@@ -0,0 +1,182 @@
+# src/latency_store.py
+from __future__ import annotations
+import mmap
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# 레코드 1개 = 16바이트 (타임스탬프 int64 + RTT float32 + 플래그 uint32)
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("rtt_ms", "<f4"),
+    ("flags", "<u4"),
+])
+
+# 플래그 비트
+FLAG_LOST = 1 << 0      # 응답 없음 (rtt_ms는 NaN)
+FLAG_ERROR = 1 << 1     # ping 실행/파싱 오류
+
+# 헤더: 매직(8) + 버전(u4) + 레코드 크기(u4) + 용량(u8) + 다음 쓰기 위치(u8) + 레코드 수(u8)
+MAGIC = b"NSLATRB1"
+VERSION = 1
+HEADER_FMT = "<8sIIQQQ"
+HEADER_SIZE = 64
+
+
+def default_store_path(log_path: Path) -> Path:
+    """ 대역폭 CSV 옆에 두는 지연 시간 링 파일 경로 (예: data/logs_latency.ring) """
+    return log_path.with_name(f"{log_path.stem}_latency.ring")
+
+
+class LatencyStore:
+    """
+    고빈도(예: 1Hz) 핑 결과를 고정 크기 바이너리 레코드로 저장하는 메모리 매핑 링 버퍼.
+
+    - 용량 = retention_s * rate_hz 개 레코드. 가득 차면 가장 오래된 레코드를 덮어씀
+    - segments()/window()는 파일을 그대로 가리키는 NumPy 뷰(복사 없음)를 반환
+    - 타임스탬프가 증가하는 순서로 기록된다는 가정 하에 seek()는 O(log n) 이진 탐색
+    - 쓰기는 단일 프로세스만 해야 함 (읽기는 여러 프로세스가 동시에 열어도 됨)
+    """
+
+    def __init__(self, path: Path, retention_s: int = 7 * 24 * 3600, rate_hz: float = 1.0,
+                 readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        capacity = max(int(retention_s * rate_hz), 1)
+
+        if not path.exists():
+            if readonly:
+                raise FileNotFoundError(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(struct.pack(HEADER_FMT, MAGIC, VERSION, RECORD_DTYPE.itemsize,
+                                    capacity, 0, 0).ljust(HEADER_SIZE, b"\0"))
+                f.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+
+        self._file = open(path, "rb" if readonly else "r+b")
+        access = mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=access)
+
+        magic, version, rec_size, self.capacity, _, _ = self._read_header()
+        if magic != MAGIC or version != VERSION or rec_size != RECORD_DTYPE.itemsize:
+            self.close()
+            raise ValueError(f"지연 시간 링 파일 형식이 아닙니다: {path}")
+        if self.capacity != capacity and not readonly:
+            # 기존 파일의 용량을 그대로 사용 (보존 기간 변경은 파일을 새로 만들어야 함)
+            print(f"[알림] 기존 링 파일 용량({self.capacity}개)을 사용합니다: {path}")
+
+        # 헤더 뒤 영역 전체를 레코드 배열로 매핑 (복사 없음)
+        self._records = np.frombuffer(self._mm, dtype=RECORD_DTYPE,
+                                      count=self.capacity, offset=HEADER_SIZE)
+
+    # --- 헤더 ---
+    def _read_header(self) -> Tuple[bytes, int, int, int, int, int]:
+        return struct.unpack_from(HEADER_FMT, self._mm, 0)
+
+    @property
+    def head(self) -> int:
+        """ 다음 레코드를 쓸 물리 위치 """
+        return self._read_header()[4]
+
+    def __len__(self) -> int:
+        return self._read_header()[5]
+
+    # --- 쓰기 ---
+    def append(self, timestamp: int, rtt_ms: float, flags: int = 0):
+        """ 레코드 1개를 추가합니다. RTT가 NaN이면 FLAG_LOST를 함께 기록합니다. """
+        head, count = self.head, len(self)
+        if np.isnan(rtt_ms):
+            flags |= FLAG_LOST
+        self._records[head] = (timestamp, rtt_ms, flags)
+        # 레코드를 먼저 쓰고 헤더를 갱신해, 읽는 쪽이 덜 쓰인 레코드를 보지 않도록 함
+        struct.pack_into("<QQ", self._mm, 24, (head + 1) % self.capacity,
+                         min(count + 1, self.capacity))
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        # NumPy 뷰가 mmap을 참조하고 있으면 닫을 수 없으므로 먼저 해제
+        self._records = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass # 외부에 남아 있는 뷰가 있으면 GC 시 해제됨
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- 읽기 ---
+    def segments(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        시간순으로 이어지는 두 개의 복사 없는 뷰 (오래된 부분, 최근 부분)를 반환합니다.
+        링이 한 바퀴 돌기 전에는 첫 번째 뷰가 비어 있습니다.
+        """
+        head, count = self.head, len(self)
+        if count < self.capacity:
+            return self._records[:0], self._records[:count]
+        return self._records[head:], self._records[:head]
+
+    def view(self) -> np.ndarray:
+        """ 전체 레코드를 시간순으로 반환합니다. 링이 돌았으면 두 구간을 이어 붙여 복사합니다. """
+        older, newer = self.segments()
+        if len(older) == 0:
+            return newer
+        return np.concatenate([older, newer])
+
+    def seek(self, timestamp: int) -> int:
+        """
+        timestamp 이상인 첫 레코드의 논리 위치(0 = 가장 오래된 레코드)를 반환합니다.
+        각 구간이 정렬되어 있으므로 구간별 이진 탐색으로 O(log n).
+        """
+        older, newer = self.segments()
+        if len(older) and timestamp <= older["timestamp"][-1]:
+            return int(np.searchsorted(older["timestamp"], timestamp, side="left"))
+        return len(older) + int(np.searchsorted(newer["timestamp"], timestamp, side="left"))
+
+    def window(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """
+        start <= timestamp < end 구간의 레코드를 반환합니다.
+        구간이 링 경계를 넘지 않으면 복사 없는 뷰를 반환합니다.
+        """
+        older, newer = self.segments()
+        n_old = len(older)
+        lo = self.seek(start) if start is not None else 0
+        hi = self.seek(end) if end is not None else n_old + len(newer)
+        if hi <= n_old:
+            return older[lo:hi]
+        if lo >= n_old:
+            return newer[lo - n_old:hi - n_old]
+        return np.concatenate([older[lo:], newer[:hi - n_old]])
+
+    def latest(self) -> Optional[np.void]:
+        """ 가장 최근 레코드 (없으면 None) """
+        if len(self) == 0:
+            return None
+        return self._records[(self.head - 1) % self.capacity]
+
+
+def summarize(records: np.ndarray) -> dict:
+    """ 레코드 배열(window() 결과 등)의 손실률과 RTT 통계를 계산합니다. """
+    n = len(records)
+    if n == 0:
+        return {"samples": 0}
+    rtt = records["rtt_ms"][(records["flags"] & (FLAG_LOST | FLAG_ERROR)) == 0]
+    lost = int(np.count_nonzero(records["flags"] & FLAG_LOST))
+    out = {"samples": n, "loss_pct": 100.0 * lost / n}
+    if len(rtt):
+        out.update({
+            "min_ms": float(rtt.min()),
+            "avg_ms": float(rtt.mean()),
+            "p95_ms": float(np.percentile(rtt, 95)),
+            "max_ms": float(rtt.max()),
+            "jitter_ms": float(np.abs(np.diff(rtt)).mean()) if len(rtt) > 1 else 0.0,
+        })
+    return out
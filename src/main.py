@@ -1,370 +1,736 @@
-# main_gui.py
+# src/main.py
+from __future__ import annotations
+import argparse
 import sys
-import os
 import time
+from typing import Optional, List, Dict
 from pathlib import Path # Path 객체 사용을 위해 추가
 
-# PyInstaller --windowed mode 'fileno' 오류 해결용 패치
-if sys.stdout is None:
-    sys.stdout = open(os.devnull, "w")
-if sys.stderr is None:
-    sys.stderr = open(os.devnull, "w")
+import pandas as pd
 
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import threading
-from contextlib import redirect_stdout
-import io
-
-# 'src' 폴더에서 핵심 로직들을 임포트
+# GUI와 분리하기 위해 .storage, .measure, .visualize를 명시적으로 사용
 try:
-    # storage에서 DEFAULT_LOG_PATH를 임포트 (파일 경로 기본값으로 사용)
-    from src.storage import append_row, load_logs, DEFAULT_LOG_PATH
-    from src.measure import safe_measure
-    from src.visualize import plot_logs, analyze_logs
+    # storage에서 DEFAULT_LOG_PATH를 임포트하여 기본값으로 사용
+    from .storage import load_logs, load_tail, rotate_log, log_fingerprint, benchmark_writers, RotationPolicy, DEFAULT_LOG_PATH
+    from .engine import MeasureEngine, EngineConfig
+    from .adaptive import AdaptiveScheduler
+    from .detect import AnomalyDetector, LogHook, CommandHook, WebhookHook, default_state_path
+    from .visualize import plot_range, plot_heatmaps, analyze_pivot
+    from .aggregate import benchmark
+    from .rollup import compact
+    from .measure import stream_ping, probe_specs, ProbeSet, BUILTIN_PROBES
+    from .bandwidth import BandwidthCap, StreamPlan
+    from .latency_store import LatencyStore, default_store_path, summarize
+    from .passive import PassiveMonitor, passive_path
+    from .path_probe import PathProbe, hops_path
+    from .report import build_report
+    from .compare import run_compare, parse_range
+    from .sla import sla_report, TIERS
+    from .watch import watch_analysis, watch_plot, DEFAULT_REFRESH_S
+    from .analysis import load_cached, save_cached
 except ImportError:
-    messagebox.showerror(
-        "모듈 임포트 오류", 
-        "'src' 폴더에서 모듈을 불러오는 데 실패했습니다.\n"
-        "main_gui.py 파일이 'src' 폴더와 같은 위치(최상위 폴더)에 있는지 확인하세요."
-    )
+    # (python -m src.main으로 실행하지 않고)
+    # (src 폴더 내에서 python main.py로 실행한 경우)
+    print("ImportError: .으로 시작하는 상대 경로 임포트에 실패했습니다.")
+    print("프로젝트 최상위(src 폴더의 부모)에서 'python -m src.main'으로 실행하세요.")
     sys.exit(1)
 
-class NetSpeedApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("NetSpeed Watch v2.1 (Configurable)")
-        self.root.geometry("500x550") # UI가 추가되어 세로 길이 증가
-
-        # --- 스레드 제어용 변수 ---
-        self.measure_thread = None
-        self.loop_thread = None
-        self.stop_event = threading.Event() 
-
-        # --- 메인 프레임 ---
-        main_frame = ttk.Frame(self.root, padding="10")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-
-        # --- 0. 설정 프레임 (신규) ---
-        config_frame = ttk.LabelFrame(main_frame, text="설정 (Options)", padding="10")
-        config_frame.pack(fill=tk.X, pady=5)
-        config_frame.columnconfigure(1, weight=1) # Entry가 가로로 늘어나도록 설정
-
-        ttk.Label(config_frame, text="핑 대상 (Host):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-        self.host_entry = ttk.Entry(config_frame)
-        self.host_entry.grid(row=0, column=1, sticky=tk.EW, padx=5, pady=5)
-        self.host_entry.insert(0, "8.8.8.8") # 기본값
-
-        ttk.Label(config_frame, text="로그 파일 (Output):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
-        self.log_path_entry = ttk.Entry(config_frame)
-        self.log_path_entry.grid(row=1, column=1, sticky=tk.EW, padx=5, pady=5)
-        self.log_path_entry.insert(0, str(DEFAULT_LOG_PATH)) # 기본값
-
-        # --- 1. 1회 측정 ---
-        self.measure_button = ttk.Button(
-            main_frame,
-            text="속도 측정 시작 (1회)",
-            command=self.start_measure_thread
-        )
-        self.measure_button.pack(pady=5, fill=tk.X)
-
-        # --- 구분선 ---
-        ttk.Separator(main_frame, orient='horizontal').pack(fill='x', pady=10)
-
-        # --- 2. 자동 측정 (Loop) ---
-        loop_frame = ttk.LabelFrame(main_frame, text="자동 측정 (Loop)", padding="10")
-        loop_frame.pack(fill=tk.X)
-
-        controls_frame = ttk.Frame(loop_frame)
-        controls_frame.pack(fill=tk.X)
-        
-        ttk.Label(controls_frame, text="측정 간격(초):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-        self.interval_entry = ttk.Entry(controls_frame, width=10)
-        self.interval_entry.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
-        self.interval_entry.insert(0, "300") 
-
-        ttk.Label(controls_frame, text="측정 횟수(0=무제한):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
-        self.count_entry = ttk.Entry(controls_frame, width=10)
-        self.count_entry.grid(row=1, column=1, sticky=tk.W, padx=5, pady=5)
-        self.count_entry.insert(0, "0") 
-
-        loop_button_frame = ttk.Frame(loop_frame)
-        loop_button_frame.pack(fill=tk.X, pady=5)
-
-        self.start_loop_button = ttk.Button(
-            loop_button_frame,
-            text="자동 측정 시작",
-            command=self.start_loop_thread
-        )
-        self.start_loop_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
-
-        self.stop_loop_button = ttk.Button(
-            loop_button_frame,
-            text="자동 측정 중지",
-            command=self.stop_loop_thread,
-            state=tk.DISABLED
-        )
-        self.stop_loop_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
-
-
-        # --- 3. 분석 도구 ---
-        analysis_frame = ttk.Frame(main_frame)
-        analysis_frame.pack(fill=tk.X, pady=10)
-        
-        self.plot_button = ttk.Button(
-            analysis_frame,
-            text="그래프 보기 (Plot)",
-            command=self.run_plot
-        )
-        self.plot_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
-
-        self.analyze_button = ttk.Button(
-            analysis_frame,
-            text="로그 분석 (Analyze)",
-            command=self.run_analyze
-        )
-        self.analyze_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
-
-        # --- 4. 상태 및 로그 출력 ---
-        self.status_label = ttk.Label(main_frame, text="대기 중...")
-        self.status_label.pack(pady=5)
-
-        self.result_text = scrolledtext.ScrolledText(main_frame, height=10, wrap=tk.WORD, state=tk.DISABLED)
-        self.result_text.pack(pady=5, fill=tk.BOTH, expand=True)
-        
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-
-    # --- 입력값 getter 헬퍼 함수 (신규) ---
-    def get_host(self) -> str:
-        return self.host_entry.get() or "8.8.8.8"
-
-    def get_log_path(self) -> Path:
-        try:
-            p = Path(self.log_path_entry.get())
-            return p
-        except Exception:
-            return DEFAULT_LOG_PATH # 오류 시 기본값 반환
-
-    def on_closing(self):
-        if self.loop_thread and self.loop_thread.is_alive():
-            if messagebox.askyesno("확인", "자동 측정이 실행 중입니다. 종료하시겠습니까?"):
-                self.stop_loop_thread()
-                self.root.destroy()
+# 측정 중 프로세스(코어 1개 = 100%) 또는 시스템 전체 CPU 사용률이 이 이상이면 호스트 병목 경고
+CPU_BOTTLENECK_PCT = 90
+
+
+def _make_engine(host: str, log_path: Path, interval_sec: int = 0,
+                 count: Optional[int] = None,
+                 config: Optional[EngineConfig] = None) -> MeasureEngine:
+    """ 콘솔 출력용 콜백을 연결한 MeasureEngine을 생성합니다. """
+    config = config or EngineConfig()
+
+    def on_start(i):
+        prefix = f"[{i}/{count}] " if count and count > 1 else ""
+        print(f"{prefix}측정 중... (핑 대상: {host}, 평균 1분 소요)")
+
+    def on_result(i, row):
+        print(f"[OK] logged to {log_path.name}: {row}")
+        if config.cap is not None and pd.notna(row.get("bytes_used")):
+            print(f"  대역폭 측정 사용량: {row['bytes_used'] / 1_000_000:.1f}MB")
+        if "cpu_pct" in row:
+            print(f"  스트림 {row['streams']}개 / 서버 {row['servers']}개, "
+                  f"CPU 프로세스 {row['cpu_pct']:.0f}% (코어 1개 = 100%) / 시스템 {row['sys_cpu_pct']:.0f}%")
+            if row["cpu_pct"] >= CPU_BOTTLENECK_PCT or row["sys_cpu_pct"] >= CPU_BOTTLENECK_PCT:
+                print("  [경고] 측정 호스트의 CPU가 포화되어 결과가 회선 속도보다 낮게 나왔을 수 있습니다.")
+
+    def on_error(i, e):
+        print(f"[ERROR] 측정/저장 실패 ({log_path.name}): {e}")
+
+    def on_probes(i, rows):
+        for r in rows:
+            result = f"{r['ms']:.1f} ms" if not r["error"] else f"실패 ({r['error']})"
+            print(f"  - {r['probe']:<4} {r['target']}: {result}")
+
+    def on_path(i, hops):
+        if hops and hops[0]["path_changed"]:
+            print(f"  [경로 변경] 새 경로 {hops[0]['path_id']}")
+        for h in hops:
+            if h["ip"] == "*":
+                print(f"  {h['hop']:>2}  *")
             else:
-                return 
-        self.root.destroy()
-
-    def _update_status(self, message):
-        self.status_label.config(text=message)
-
-    def _update_result_text(self, message):
-        if self.root.winfo_exists():
-            self.result_text.config(state=tk.NORMAL)
-            self.result_text.insert(tk.END, message + "\n")
-            self.result_text.see(tk.END) 
-            self.result_text.config(state=tk.DISABLED)
-
-    def _lock_ui_for_measurement(self, is_looping=False):
-        # 설정 필드도 비활성화
-        self.host_entry.config(state=tk.DISABLED)
-        self.log_path_entry.config(state=tk.DISABLED)
-        
-        self.measure_button.config(state=tk.DISABLED)
-        self.plot_button.config(state=tk.DISABLED)
-        self.analyze_button.config(state=tk.DISABLED)
-        
-        if is_looping:
-            self.start_loop_button.config(state=tk.DISABLED)
-            self.stop_loop_button.config(state=tk.NORMAL)
-            self.interval_entry.config(state=tk.DISABLED)
-            self.count_entry.config(state=tk.DISABLED)
+                print(f"  {h['hop']:>2}  {h['ip']:<15} {h['rtt_ms']:7.1f} ms  손실 {h['loss_pct']:.0f}%")
+
+    def on_skip(i, reason):
+        print(f"[SKIP] 능동 측정을 건너뜁니다: {reason}")
+
+    waiting = {"announced": False}
+
+    def on_wait(remaining):
+        # 대기 구간이 시작될 때 한 번만 안내 (적응형 모드에서는 간격이 매번 달라짐)
+        if not waiting["announced"]:
+            print(f"{remaining}초 후 다음 측정을 시작합니다.")
+            waiting["announced"] = True
+
+    def on_start_with_reset(i):
+        waiting["announced"] = False
+        on_start(i)
+
+    return MeasureEngine(host=host, log_path=log_path, interval_sec=interval_sec,
+                         count=count, config=config, on_start=on_start_with_reset,
+                         on_result=on_result, on_error=on_error, on_wait=on_wait,
+                         on_probes=on_probes, on_skip=on_skip, on_path=on_path)
+
+
+def make_detector(log_path: Path, alert_log: Optional[Path] = None,
+                  alert_command: Optional[str] = None,
+                  alert_webhook: Optional[str] = None) -> AnomalyDetector:
+    """
+    경보 hook을 연결한 이상 탐지기를 만듭니다.
+    저장된 상태가 없을 때만 전체 로그로 기준선을 학습하고, 이후에는 로그 끝부분만 확인합니다.
+    """
+    hooks = [LogHook(alert_log)]
+    if alert_command:
+        hooks.append(CommandHook(alert_command))
+    if alert_webhook:
+        hooks.append(WebhookHook(alert_webhook))
+
+    detector = AnomalyDetector(state_path=default_state_path(log_path), hooks=hooks)
+    if detector.last_timestamp is None:
+        if log_path.exists():
+            print("이상 탐지 기준선을 로그 전체에서 학습합니다 (최초 1회)...")
+            detector.learn_history(load_logs(log_path=log_path))
+    else:
+        # 다른 프로세스가 추가한 최근 행만 반영
+        detector.learn_history(load_tail(log_path, n_rows=500))
+    return detector
+
+
+def run_once(host: str, log_path: Path, config: Optional[EngineConfig] = None):
+    """ 1회 측정 및 저장을 실행합니다. """
+    engine = _make_engine(host, log_path, count=1, config=config)
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        engine.stop()
+        print("\nStopped.")
+
+def run_loop(interval_sec: int, count: Optional[int], host: str, log_path: Path,
+             config: Optional[EngineConfig] = None):
+    """
+    주기적 측정을 실행합니다. config.scheduler 지정 시 적응형 간격을 사용합니다.
+    config.passive 지정 시 측정 사이에도 인터페이스 사용량을 백그라운드에서 기록합니다.
+    """
+    config = config or EngineConfig()
+    scheduler, passive = config.scheduler, config.passive
+    if scheduler is not None:
+        # 최근 로그로 기준선과 오늘 데이터 사용량을 복원
+        scheduler.seed(load_tail(log_path, n_rows=200))
+        budget = ""
+        if scheduler.daily_budget_mb:
+            budget = (f", 일일 예산 {scheduler.daily_budget_mb:g}MB "
+                      f"(오늘 남은 예산 {max(scheduler.budget_left_mb(), 0):.1f}MB)")
+        if scheduler.min_interval == scheduler.max_interval:
+            print(f"고정 간격 측정: {scheduler.min_interval}초 간격{budget}")
         else:
-            self.start_loop_button.config(state=tk.DISABLED)
-            self.stop_loop_button.config(state=tk.DISABLED)
-
-    def _unlock_ui(self):
-        if not self.root.winfo_exists():
+            print(f"적응형 측정: {scheduler.min_interval}~{scheduler.max_interval}초 간격{budget}")
+    engine = _make_engine(host, log_path, interval_sec=interval_sec, count=count, config=config)
+    if passive is not None:
+        passive.start()
+        print(f"수동 측정: {', '.join(passive.interfaces)} -> {passive.path.name}"
+              + (f", {passive.busy_mbps:g}Mbps 이상 사용 중이면 능동 측정 생략" if passive.busy_mbps else ""))
+    if not count:
+        print("자동 측정을 시작합니다. (중지하려면 Ctrl+C)")
+    try:
+        engine.run()
+        print("Finished.")
+    except KeyboardInterrupt:
+        # 진행 중인 speedtest 스레드도 함께 중단
+        engine.stop()
+        print("\nStopped.")
+    finally:
+        if passive is not None:
+            passive.stop()
+
+
+def run_sla(log_path: Path, tier: str, start: Optional[int] = None, end: Optional[int] = None,
+            export: Optional[Path] = None):
+    """ 상품 기준 준수 리포트를 출력하고 필요하면 파일로 내보냅니다. """
+    print(f"로그 파일({log_path.name})을 {TIERS[tier].name} 기준과 비교합니다...")
+    report = sla_report(log_path, TIERS[tier], start, end)
+    if report is None:
+        print("비교할 데이터가 없습니다.")
+        return
+    report.render_text()
+    if export:
+        try:
+            report.export(export)
+        except (OSError, ValueError) as e:
+            print(f"[ERR] 내보내기 실패: {e}")
             return
-            
-        # 설정 필드 활성화
-        self.host_entry.config(state=tk.NORMAL)
-        self.log_path_entry.config(state=tk.NORMAL)
-
-        self.measure_button.config(state=tk.NORMAL)
-        self.plot_button.config(state=tk.NORMAL)
-        self.analyze_button.config(state=tk.NORMAL)
-        
-        self.start_loop_button.config(state=tk.NORMAL)
-        self.stop_loop_button.config(state=tk.DISABLED)
-        self.interval_entry.config(state=tk.NORMAL)
-        self.count_entry.config(state=tk.NORMAL)
-        
-        self.status_label.config(text="대기 중...")
-        self.loop_thread = None
-        self.measure_thread = None
-
-    # --- 1. 1회 측정 로직 (수정됨) ---
-    def start_measure_thread(self):
-        self._lock_ui_for_measurement()
-        self.status_label.config(text="측정 중... (평균 1분 소요)")
-        
-        # 스레드에 현재 설정값을 전달
-        host = self.get_host()
-        log_path = self.get_log_path()
-
-        self.measure_thread = threading.Thread(
-            target=self.run_measure_once_worker,
-            args=(host, log_path) # 인자 전달
-        )
-        self.measure_thread.daemon = True
-        self.measure_thread.start()
+        print(f"[OK] 준수 리포트를 저장했습니다: {export}")
+
+
+def print_probes():
+    """ 등록된 프로브 플러그인 목록 (기본 프로브 + entry point로 설치된 프로브) """
+    for spec in probe_specs().values():
+        kind = "built-in" if spec.name in BUILTIN_PROBES else spec.factory
+        output = f"-> {spec.table} table" if spec.table else ", ".join(spec.columns) or "-"
+        print(f"{spec.name:<10} {spec.cost:<9} {spec.budget_s:>5g}s  {output}  [{kind}]")
+        if spec.description:
+            print(f"{'':<10} {spec.description}")
+    print("제한 시간은 기본값입니다. ping은 --ping-count/--ping-interval, apps는 --probe-timeout에 따라 늘어나며 "
+          "--budget으로 바꿀 수 있습니다.")
+
+
+def run_passive(monitor: PassiveMonitor):
+    """ 인터페이스 사용량만 수동으로 기록합니다 (능동 측정 없음). flush마다 요약을 출력합니다. """
+    def on_flush(row):
+        util = f", 사용률 {row['util_pct']:.1f}%" if pd.notna(row["util_pct"]) else ""
+        print(f"[passive] 수신 {row['rx_mbps']:.2f} Mbps (최대 {row['rx_max_mbps']:.2f}), "
+              f"송신 {row['tx_mbps']:.2f} Mbps (최대 {row['tx_max_mbps']:.2f}){util}")
+
+    print(f"수동 측정을 시작합니다: {', '.join(monitor.interfaces)}, {monitor.interval_s:g}초 간격 "
+          f"-> {monitor.path.name} (중지하려면 Ctrl+C)")
+    monitor.start(on_flush=on_flush)
+    try:
+        while monitor.thread.is_alive():
+            monitor.thread.join(timeout=1)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        monitor.stop()
+
+
+def print_passive_report(log_path: Path, hours: float = 24):
+    """ 수동 측정 기록이 있으면 최근 hours 시간의 실제 사용량 요약을 출력합니다. """
+    path = passive_path(log_path)
+    if not path.exists():
+        return
+    df = load_logs(log_path=path, start=int(time.time() - hours * 3600))
+    if df is None or df.empty:
+        return
+    # 능동 측정이 섞인 구간은 제외해 speedtest 자체 트래픽이 사용량으로 잡히지 않도록 함
+    idle = df[df["active_pct"] == 0]
+    print(f"\n[Passive Interface Usage (last {hours:g}h, {path.name})]")
+    if idle.empty:
+        print("능동 측정 외 구간의 표본이 없습니다.")
+        return
+    print(f"평균 수신 {idle['rx_mbps'].mean():.2f} Mbps / 송신 {idle['tx_mbps'].mean():.2f} Mbps, "
+          f"최대 수신 {idle['rx_max_mbps'].max():.2f} Mbps / 송신 {idle['tx_max_mbps'].max():.2f} Mbps")
+    if idle["util_pct"].notna().any():
+        print(f"평균 사용률 {idle['util_pct'].mean():.1f}%, 최대 {idle['util_pct'].max():.1f}%")
+
+
+def print_path_report(log_path: Path, hours: float = 24):
+    """ 홉별 경로 측정 기록이 있으면 최근 hours 시간의 홉별 평균 지연/손실을 출력합니다. """
+    path = hops_path(log_path)
+    if not path.exists():
+        return
+    df = load_logs(log_path=path, start=int(time.time() - hours * 3600))
+    if df is None or df.empty:
+        return
+    # 가장 최근 경로 기준으로 요약 (경로 변경 전 홉과 섞이지 않도록)
+    latest = df[df["path_id"] == df["path_id"].iloc[-1]]
+    table = latest.groupby("hop").agg(ip=("ip", "last"), rtt_ms=("rtt_ms", "mean"),
+                                      jitter_ms=("jitter_ms", "mean"), loss_pct=("loss_pct", "mean"))
+    # 앞 홉 대비 증가한 지연: 급등 시 어느 홉에서 늘었는지 확인
+    table["delta_ms"] = table["rtt_ms"] - table["rtt_ms"].ffill().shift().fillna(0)
+    changes = df.drop_duplicates("timestamp")["path_changed"].sum()
+    print(f"\n[Path Hops (last {hours:g}h, {path.name}, 경로 {latest['path_id'].iloc[-1]}, "
+          f"경로 변경 {int(changes)}회)]")
+    print(table.round(2).to_string())
+
+
+def run_latency(host: str, log_path: Path, interval_s: float = 1.0,
+                retention_hours: float = 168):
+    """
+    ping을 interval_s 간격으로 계속 실행해 지연 시간 링 파일(CSV 옆)에 기록합니다.
+    1분마다 최근 구간 요약을 출력합니다.
+    """
+    store_path = default_store_path(log_path)
+    store = LatencyStore(store_path, retention_s=int(retention_hours * 3600),
+                         rate_hz=1.0 / interval_s)
+    print(f"고빈도 지연 측정을 시작합니다: {host}, {interval_s:g}초 간격 -> {store_path.name} (중지하려면 Ctrl+C)")
+    last_report = time.time()
+    try:
+        for ts, rtt in stream_ping(host=host, interval_s=interval_s):
+            store.append(ts, rtt)
+            if ts - last_report >= 60:
+                summary = summarize(store.window(start=int(last_report)))
+                print(_format_latency_summary(summary))
+                store.flush()
+                last_report = ts
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        store.flush()
+        store.close()
+
+
+def _format_latency_summary(summary: dict) -> str:
+    if not summary.get("samples"):
+        return "[latency] 표본 없음"
+    text = f"[latency] {summary['samples']}개, 손실 {summary['loss_pct']:.1f}%"
+    if "avg_ms" in summary:
+        text += (f", 평균 {summary['avg_ms']:.1f}ms (min {summary['min_ms']:.1f} / "
+                 f"p95 {summary['p95_ms']:.1f} / max {summary['max_ms']:.1f}), "
+                 f"지터 {summary['jitter_ms']:.1f}ms")
+    return text
+
+
+def print_latency_report(log_path: Path, hours: float = 24):
+    """ 지연 시간 링 파일이 있으면 최근 hours 시간 요약을 출력합니다. """
+    store_path = default_store_path(log_path)
+    if not store_path.exists():
+        return
+    with LatencyStore(store_path, readonly=True) as store:
+        summary = summarize(store.window(start=int(time.time() - hours * 3600)))
+    print(f"\n[High-frequency Latency (last {hours:g}h, {store_path.name})]")
+    print(_format_latency_summary(summary))
+
+
+def run_analyze(log_path: Path, by: str = "all", workers: Optional[int] = None,
+                export: Optional[Path] = None, use_cache: bool = True):
+    """
+    분석 결과를 출력하고 필요하면 파일로 내보냅니다. by가 'heatmap'이면 히트맵 PNG도 저장합니다.
+    로그가 마지막 분석 이후 바뀌지 않았으면 디스크 캐시(<로그>_analysis.json)의 결과를 재사용하고,
+    바뀌었으면 시간대 x 요일 누적 피벗(<로그>_pivot.json)에 새 행만 합쳐 다시 계산합니다.
+    """
+    fingerprint = log_fingerprint(log_path) # 분석 도중 로그가 바뀌면 캐시에 저장하지 않음
+    result = load_cached(log_path, by) if use_cache else None
+    if result is not None:
+        print(f"(변경 없음: {result.meta.get('generated_at')}에 계산한 결과를 사용합니다)")
+        result.render_text()
+    else:
+        # 피벗을 새로 만들어야 하면 세그먼트/청크별 부분 집계를 workers개 프로세스에서 계산해 합침
+        result = analyze_pivot(log_path, by=by, workers=workers, rebuild=not use_cache)
+        if result is None:
+            return
+        save_cached(log_path, result, fingerprint)
+
+    if by == "heatmap":
+        plot_heatmaps(result, show=False)
 
-    def run_measure_once_worker(self, host: str, log_path: Path):
-        """ (스레드 작업) 1회 측정 및 저장 실행 """
+    if export:
         try:
-            # safe_measure에 host 전달
-            row = safe_measure(host=host) 
-            # append_row에 log_path 전달
-            append_row(row, log_path=log_path) 
-            result_message = f"[측정 완료] {row}"
-        except Exception as e:
-            result_message = f"[오류 발생] {e}"
-        
-        self.root.after(0, self.update_gui_after_measure, result_message)
-
-    def update_gui_after_measure(self, result_message):
-        self._update_result_text(result_message)
-        self._unlock_ui()
-
-    # --- 2. 자동 측정 로직 (수정됨) ---
-    def start_loop_thread(self):
+            result.export(export)
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"[ERR] 내보내기 실패: {e}")
+            return
+        print(f"[OK] 분석 결과를 저장했습니다: {export}")
+
+
+def main():
+    """ CLI 명령어를 파싱하고 해당 기능을 실행합니다. """
+    p = argparse.ArgumentParser(description="NetSpeed Watch CLI")
+
+    # --- 실행 모드 그룹 ---
+    g = p.add_mutually_exclusive_group()
+    g.add_argument("--once", action="store_true", help="Measure once and append to CSV")
+    g.add_argument("--loop", type=int, help="Measure every N seconds (e.g., 300)")
+    g.add_argument("--latency", action="store_true",
+                   help="Sample ping continuously (default 1 Hz) into a binary ring file next to the CSV")
+    g.add_argument("--passive", action="store_true",
+                   help="Linux only: record interface throughput from /proc/net/dev without active tests")
+    g.add_argument("--plot", action="store_true", help="Generate charts from CSV")
+    g.add_argument("--rotate", action="store_true",
+                   help="Move the current CSV log into a compressed segment now")
+    g.add_argument("--compact", action="store_true",
+                   help="Collapse raw rows older than --keep-days into hourly aggregates")
+    g.add_argument("--benchmark-writes", action="store_true",
+                   help="Measure append throughput of 1..N processes writing concurrently to a temporary log "
+                        "next to --output (N = --workers or 8) and check for torn lines")
+    g.add_argument("--sla", choices=list(TIERS), metavar="TIER",
+                   help=f"Check the log against a subscribed tier's minimum speed and maximum ping "
+                        f"({', '.join(TIERS)}): share of measurements and hours in violation, longest "
+                        f"violation streak, worst hours and days")
+    g.add_argument("--list-probes", action="store_true",
+                   help="List registered probe plugins with their cost class, time budget and output columns")
+    g.add_argument("--analyze", nargs='?', const='all', choices=['hourly', 'daily', 'heatmap', 'all'],
+                   help="Analyze logs. Specify 'hourly' or 'daily' for specific reports, or 'heatmap' "
+                        "for the day-of-week x hour grid per metric (also saved as PNGs under data/plots).")
+    g.add_argument("--compare", nargs=2, metavar=("RANGE_A", "RANGE_B"),
+                   help="Compare two periods given as START..END (e.g. 14d..7d 7d..now, "
+                        "2024-05-01..2024-05-08); reports B - A per hour and weekday")
+    g.add_argument("--report", type=Path, metavar="OUT.html",
+                   help="Write a self-contained HTML report (tables, heatmaps, time series)")
+
+    # --- 설정 옵션 그룹 ---
+    s = p.add_argument_group("Configuration Options")
+    s.add_argument("--host", type=str, default="8.8.8.8",
+                   help="Host to ping for latency check (default: 8.8.8.8)")
+    s.add_argument("--output", type=Path, default=DEFAULT_LOG_PATH,
+                   help=f"Path to the CSV log file (default: {DEFAULT_LOG_PATH})")
+    s.add_argument("--count", type=int, help="Number of times to measure with --loop. Runs indefinitely if not specified.")
+
+    s.add_argument("--ping-count", type=int, default=1,
+                   help="Pings per measurement; >1 sends a burst and also logs min/max, jitter and loss (default: 1)")
+    s.add_argument("--ping-interval", type=float, default=0.2,
+                   help="Seconds between burst pings with --ping-count (default: 0.2)")
+
+    s.add_argument("--latency-interval", type=float, default=1.0,
+                   help="Seconds between pings for --latency (default: 1.0)")
+    s.add_argument("--retention-hours", type=float, default=168,
+                   help="Hours of samples kept in the --latency ring file (default: 168)")
+
+    s.add_argument("--rotate-size-mb", type=float,
+                   help="Rotate the CSV into a compressed segment once it reaches this size")
+    s.add_argument("--rotate-days", type=float,
+                   help="Rotate the CSV into a compressed segment once its first row is this old")
+    s.add_argument("--compression", choices=["gzip", "zstd"], default="gzip",
+                   help="Codec for rotated segments (zstd needs the 'zstandard' package)")
+    s.add_argument("--keep-days", type=float, default=30,
+                   help="Days of raw rows kept by --compact (default: 30)")
+    s.add_argument("--workers", type=int,
+                   help="With --analyze, rebuild the cached hour x weekday pivot from segments/chunks "
+                        "in this many processes in parallel; "
+                        "with --report, render charts in this many processes; "
+                        "with --benchmark-writes, the largest writer count (default: 8)")
+    s.add_argument("--benchmark", action="store_true",
+                   help="With --analyze, print 1..N worker scaling of the parallel analysis (N = --workers or CPU count)")
+    s.add_argument("--hours", type=str, metavar="H1-H2",
+                   help="With --compare, only include these local hours (e.g. 18-23, 22-2)")
+    s.add_argument("--range", type=str, metavar="START..END",
+                   help="With --plot or --sla, only use this time range (e.g. 7d..now, 2024-05-01..2024-05-08)")
+    s.add_argument("--width", type=int, metavar="PX",
+                   help="With --plot, target chart width in pixels used to pick the resolution")
+    s.add_argument("--export", type=Path, metavar="PATH",
+                   help="With --analyze, also save the result as .json, .csv or .arrow (Arrow needs pyarrow); "
+                        "with --sla, as .json or .csv")
+    s.add_argument("--no-cache", action="store_true",
+                   help="With --analyze, ignore the cached result and pivot and recompute from the full log")
+    s.add_argument("--watch", action="store_true",
+                   help="With --analyze or --plot, keep running and fold only newly appended rows into the "
+                        "report/charts, refreshing the terminal report and PNGs (Ctrl+C to stop)")
+    s.add_argument("--refresh", type=float, default=DEFAULT_REFRESH_S, metavar="SECONDS",
+                   help=f"With --watch, how often to check the log for new rows (default: {DEFAULT_REFRESH_S:g})")
+
+    # --- 애플리케이션 프로브 옵션 (--once, --loop와 함께 사용) ---
+    pr = p.add_argument_group("Application Probe Options")
+    pr.add_argument("--dns", action="append", default=[], metavar="RESOLVER",
+                    help="Time a DNS lookup against this resolver (IP[:port]); repeatable")
+    pr.add_argument("--dns-name", type=str, default="example.com",
+                    help="Name to resolve with --dns (default: example.com)")
+    pr.add_argument("--tcp", action="append", default=[], metavar="HOST:PORT",
+                    help="Time a TCP handshake to HOST:PORT; repeatable")
+    pr.add_argument("--http", action="append", default=[], metavar="URL",
+                    help="Time to first byte of a GET to URL; repeatable")
+    pr.add_argument("--probe-timeout", type=float, default=5.0,
+                    help="Per-probe timeout in seconds (default: 5)")
+
+    # --- 경로 측정 옵션 (--once, --loop와 함께 사용) ---
+    pp = p.add_argument_group("Path Probe Options")
+    pp.add_argument("--path", action="store_true",
+                    help="Also measure per-hop latency/loss on the route to --host, probing all hops concurrently")
+    pp.add_argument("--max-hops", type=int, default=20,
+                    help="Maximum TTL for --path route discovery (default: 20)")
+    pp.add_argument("--path-timeout", type=float,
+                    help="Give up on the path probe after this many seconds (default: 60)")
+
+    # --- 프로브 플러그인 옵션 (--once, --loop와 함께 사용) ---
+    pl = p.add_argument_group("Probe Plugin Options")
+    pl.add_argument("--probe", action="append", default=[], metavar="NAME",
+                    help="Also run this registered probe plugin every cycle (see --list-probes); repeatable")
+    pl.add_argument("--budget", action="append", default=[], metavar="NAME=SECONDS",
+                    help="Override the time budget of a probe (e.g. ping=3, bandwidth=90); "
+                         "a probe that overruns is cancelled and logged as NaN")
+
+    # --- 수동 측정 옵션 (--passive, --loop와 함께 사용) ---
+    ps = p.add_argument_group("Passive Sampling Options (Linux)")
+    ps.add_argument("--interface", action="append", default=[], metavar="IFACE",
+                    help="Interface to sample (repeatable, default: all but lo). "
+                         "With --loop, also samples usage between active tests")
+    ps.add_argument("--sample-interval", type=float, default=1.0,
+                    help="Seconds between /proc/net/dev samples (default: 1)")
+    ps.add_argument("--link-mbps", type=float,
+                    help="Link capacity for utilization (default: read from /sys/class/net)")
+    ps.add_argument("--busy-mbps", type=float,
+                    help="With --loop, skip an active test while recent rx or tx usage is at least this")
+
+    # --- 적응형 측정 옵션 (--loop와 함께 사용) ---
+    a = p.add_argument_group("Adaptive Sampling Options")
+    a.add_argument("--adaptive", action="store_true",
+                   help="With --loop, back off bandwidth tests while the link is stable "
+                        "and sample densely when it deviates from the recent baseline")
+    a.add_argument("--min-interval", type=int,
+                   help="Shortest interval in seconds for --adaptive (default: --loop value)")
+    a.add_argument("--max-interval", type=int,
+                   help="Longest interval in seconds for --adaptive (default: 12x --loop value)")
+    a.add_argument("--daily-budget-mb", type=float,
+                   help="With --loop, daily data budget in MB for bandwidth tests (uses capped tests, "
+                        "pauses until midnight once spent; works with or without --adaptive)")
+
+    # --- 대역폭 측정 제한 옵션 (--once, --loop와 함께 사용) ---
+    b = p.add_argument_group("Capped Bandwidth Test Options")
+    b.add_argument("--max-mb", type=float,
+                   help="Cap each bandwidth test (download + upload) at this many MB")
+    b.add_argument("--max-seconds", type=float,
+                   help="Cap each test direction at this many seconds (default with caps: 10)")
+    b.add_argument("--converge", type=float, metavar="PCT",
+                   help="Stop a direction early once the 95%% confidence interval of the throughput "
+                        "is within PCT%% of the mean (default with caps: 5, 0 = never)")
+    b.add_argument("--streams", type=int, metavar="N",
+                   help="Parallel connections per server (default: speedtest.net config, 4 with --server)")
+    b.add_argument("--servers", type=int, metavar="N",
+                   help="Aggregate throughput across the N best speedtest.net servers at once")
+    b.add_argument("--server", action="append", default=[], metavar="URL",
+                   help="Use this speedtest server upload URL instead of discovery (repeatable, "
+                        "e.g. http://10.0.0.5/speedtest/upload.php)")
+    b.add_argument("--bandwidth-timeout", type=float,
+                   help="Cancel a bandwidth test after this many seconds, not counting the wait "
+                        "for another test on this machine to finish (default: 180)")
+
+    # --- 이상 탐지 / 경보 옵션 (--once, --loop와 함께 사용) ---
+    d = p.add_argument_group("Anomaly Detection Options")
+    d.add_argument("--detect", action="store_true",
+                   help="Run the online anomaly detector on every measurement and print alerts")
+    d.add_argument("--alert-log", type=Path,
+                   help="Also append alert lines to this file (implies --detect)")
+    d.add_argument("--alert-command", type=str,
+                   help="Shell command to run per alert; alert JSON on stdin (implies --detect)")
+    d.add_argument("--alert-webhook", type=str,
+                   help="URL to POST alert JSON to, e.g. a local endpoint (implies --detect)")
+
+    args = p.parse_args()
+
+    # --output으로 받은 경로를 log_path 변수로 사용
+    log_path = args.output
+
+    # 인자 검증은 모두 하위 시스템(탐지기 학습, 수동 측정, 경로 프로브 등)을 만들기 전에 끝냄
+    if args.loop is not None and args.loop <= 0:
+        p.error("--loop must be a positive integer (seconds)")
+    if args.count and not args.loop:
+        p.error("--count can only be used with --loop.")
+    if args.count and args.count <= 0:
+        p.error("--count must be a positive integer")
+    if args.adaptive and not args.loop:
+        p.error("--adaptive can only be used with --loop.")
+    if (args.min_interval or args.max_interval) and not args.adaptive:
+        p.error("--min-interval and --max-interval require --adaptive.")
+    if args.adaptive:
+        min_interval = args.min_interval or args.loop
+        max_interval = args.max_interval or max(args.loop * 12, min_interval)
+        if min_interval <= 0 or max_interval < min_interval:
+            p.error("--min-interval must be positive and not greater than --max-interval")
+    if args.probe_timeout <= 0:
+        p.error("--probe-timeout must be positive")
+    if args.workers and not (args.analyze or args.report or args.benchmark_writes):
+        p.error("--workers can only be used with --analyze, --report or --benchmark-writes.")
+    if args.hours and not args.compare:
+        p.error("--hours can only be used with --compare.")
+    if args.benchmark and not args.analyze:
+        p.error("--benchmark can only be used with --analyze.")
+    if args.range and not (args.plot or args.sla):
+        p.error("--range can only be used with --plot or --sla.")
+    if args.width and not args.plot:
+        p.error("--width can only be used with --plot.")
+    if args.width is not None and args.width <= 0:
+        p.error("--width must be a positive integer")
+    if args.export and not (args.analyze or args.sla):
+        p.error("--export can only be used with --analyze or --sla.")
+    if args.export and args.sla and args.export.suffix.lower() not in (".json", ".csv"):
+        p.error("--export with --sla must end with .json or .csv")
+    if args.no_cache and not args.analyze:
+        p.error("--no-cache can only be used with --analyze.")
+    if args.watch and not (args.analyze or args.plot):
+        p.error("--watch can only be used with --analyze or --plot.")
+    if args.watch and (args.benchmark or args.export):
+        p.error("--watch cannot be combined with --benchmark or --export.")
+    if args.refresh <= 0:
+        p.error("--refresh must be positive")
+    if args.export and args.export.suffix.lower() not in (".json", ".csv", ".arrow", ".feather", ".ipc"):
+        p.error("--export must end with .json, .csv or .arrow")
+    if args.workers is not None and args.workers <= 0:
+        p.error("--workers must be a positive integer")
+    if args.ping_count <= 0 or args.ping_interval <= 0:
+        p.error("--ping-count and --ping-interval must be positive")
+    if args.keep_days <= 0:
+        p.error("--keep-days must be positive")
+    if args.latency_interval <= 0 or args.retention_hours <= 0:
+        p.error("--latency-interval and --retention-hours must be positive")
+    start = end = None
+    if args.range:
         try:
-            interval_sec = int(self.interval_entry.get())
-            count = int(self.count_entry.get())
-            
-            if interval_sec <= 0:
-                messagebox.showerror("입력 오류", "측정 간격은 0보다 커야 합니다.")
-                return
-            if count < 0:
-                messagebox.showerror("입력 오류", "측정 횟수는 0 이상이어야 합니다.")
-                return
-
+            start, end = parse_range(args.range)
+        except ValueError as e:
+            p.error(str(e))
+    if (args.dns or args.tcp or args.http) and not (args.once or args.loop):
+        p.error("--dns, --tcp and --http can only be used with --once or --loop.")
+    passive_wanted = args.passive or (args.loop and (args.interface or args.busy_mbps))
+    if passive_wanted and args.sample_interval <= 0:
+        p.error("--sample-interval must be positive")
+    if not passive_wanted and (args.interface or args.busy_mbps or args.link_mbps):
+        p.error("--interface, --link-mbps and --busy-mbps can only be used with --passive or --loop.")
+    if args.path and not (args.once or args.loop):
+        p.error("--path can only be used with --once or --loop.")
+    if args.path and not 1 <= args.max_hops <= 64:
+        p.error("--max-hops must be between 1 and 64")
+    if args.daily_budget_mb is not None and not args.loop:
+        p.error("--daily-budget-mb can only be used with --loop.")
+    capped = args.max_mb is not None or args.max_seconds is not None or args.converge is not None \
+        or args.daily_budget_mb is not None
+    if capped and not (args.once or args.loop):
+        p.error("--max-mb, --max-seconds and --converge can only be used with --once or --loop.")
+    if any(v is not None and v <= 0 for v in (args.max_mb, args.max_seconds, args.daily_budget_mb)):
+        p.error("--max-mb, --max-seconds and --daily-budget-mb must be positive")
+    if args.converge is not None and not 0 <= args.converge < 100:
+        p.error("--converge must be between 0 and 100")
+    planned = args.streams is not None or args.servers is not None or args.server
+    if planned and not (args.once or args.loop):
+        p.error("--streams, --servers and --server can only be used with --once or --loop.")
+    if args.servers is not None and args.server:
+        p.error("--servers cannot be combined with --server.")
+    if any(v is not None and v <= 0 for v in (args.streams, args.servers)):
+        p.error("--streams and --servers must be positive integers")
+    budgets = {}
+    for item in args.budget:
+        name, _, seconds = item.partition("=")
+        try:
+            budgets[name.strip()] = float(seconds)
         except ValueError:
-            messagebox.showerror("입력 오류", "간격과 횟수는 숫자여야 합니다.")
-            return
-
-        self.stop_event.clear() 
-        self._lock_ui_for_measurement(is_looping=True)
-        self.status_label.config(text="자동 측정 시작됨...")
-
-        # 스레드에 설정값 전달
-        host = self.get_host()
-        log_path = self.get_log_path()
-
-        self.loop_thread = threading.Thread(
-            target=self.run_loop_worker,
-            args=(interval_sec, count if count > 0 else None, host, log_path)
+            p.error(f"--budget expects NAME=SECONDS, got '{item}'")
+    if args.path_timeout is not None:
+        budgets["path"] = args.path_timeout
+    if args.bandwidth_timeout is not None:
+        budgets["bandwidth"] = args.bandwidth_timeout
+    if any(v <= 0 for v in budgets.values()):
+        p.error("--budget, --path-timeout and --bandwidth-timeout must be positive")
+    specs = probe_specs()
+    for name in list(budgets) + args.probe:
+        if name not in specs:
+            p.error(f"Unknown probe '{name}' (available: {', '.join(specs)})")
+    for name in args.probe:
+        if name in BUILTIN_PROBES:
+            p.error(f"'{name}' is a built-in probe; enable it with its own options instead of --probe")
+    if (args.probe or budgets) and not (args.once or args.loop):
+        p.error("--probe, --budget, --path-timeout and --bandwidth-timeout can only be used with --once or --loop.")
+    if (args.detect or args.alert_log or args.alert_command or args.alert_webhook) \
+            and not (args.once or args.loop):
+        p.error("Anomaly detection options can only be used with --once or --loop.")
+
+    rotation = None
+    if args.rotate_size_mb or args.rotate_days:
+        rotation = RotationPolicy(
+            max_bytes=int(args.rotate_size_mb * 1_000_000) if args.rotate_size_mb else None,
+            max_age_s=int(args.rotate_days * 86400) if args.rotate_days else None,
+            codec=args.compression,
         )
-        self.loop_thread.daemon = True
-        self.loop_thread.start()
-
-    def run_loop_worker(self, interval_sec, count, host: str, log_path: Path):
-        """ (스레드 작업) 주기적 측정 실행 """
-        i = 0
-        while not self.stop_event.is_set():
-            i += 1
-            
-            count_str = f"{i}/{count}" if count else f"{i}회"
-            self.root.after(0, self._update_status, f"자동 측정 중... ({count_str})")
-            
-            try:
-                # safe_measure와 append_row에 설정값 사용
-                row = safe_measure(host=host)
-                append_row(row, log_path=log_path)
-                self.root.after(0, self._update_result_text, f"[자동 측정 {i}회] {row}")
-            except Exception as e:
-                self.root.after(0, self._update_result_text, f"[자동 측정 오류] {e}")
-
-            if count and i >= count:
-                self.root.after(0, self._update_status, f"자동 측정 완료 ({count}회).")
-                break
-            
-            wait_time = 0
-            while wait_time < interval_sec and not self.stop_event.is_set():
-                time.sleep(1) 
-                wait_time += 1
-                
-                remaining = interval_sec - wait_time
-                if remaining > 0 and not self.stop_event.is_set():
-                     self.root.after(0, self._update_status, f"다음 측정까지 {remaining}초...")
-
-        if self.stop_event.is_set():
-            self.root.after(0, self._update_status, "자동 측정이 중지되었습니다.")
-        
-        self.root.after(0, self._unlock_ui) 
-
-    def stop_loop_thread(self):
-        if self.loop_thread and self.loop_thread.is_alive():
-            self.stop_event.set()
-            self.stop_loop_button.config(state=tk.DISABLED)
-            self.status_label.config(text="자동 측정 중지 중...")
-
-    # --- 3. 분석 도구 로직 (수정됨) ---
-    def run_plot(self):
-        """ 그래프 보기 실행 """
-        self.status_label.config(text="그래프 생성 중...")
-        log_path = self.get_log_path() # UI에서 경로 읽기
-        
-        try:
-            df = load_logs(log_path=log_path) # log_path 전달
-            if df is None or df.empty:
-                self._update_result_text(f"[{log_path.name}] 표시할 데이터가 없습니다.")
-            else:
-                plot_logs(df, show=True) 
-                self._update_result_text("[알림] 그래프 창을 확인하세요. (그래프 창을 닫아야 프로그램이 다시 반응합니다)")
-        except Exception as e:
-            self._update_result_text(f"[오류] {e}")
-        self.status_label.config(text="대기 중...")
 
-    def run_analyze(self):
-        """ 로그 분석 실행 (새 창) """
-        self.status_label.config(text="로그 분석 중...")
-        log_path = self.get_log_path() # UI에서 경로 읽기
+    probes = ProbeSet(dns=args.dns, tcp=args.tcp, http=args.http,
+                      dns_name=args.dns_name, timeout_s=args.probe_timeout)
 
+    passive = None
+    if passive_wanted:
         try:
-            df = load_logs(log_path=log_path) # log_path 전달
-            if df is None or df.empty:
-                self._update_result_text(f"[{log_path.name}] 분석할 데이터가 없습니다.")
-                self.status_label.config(text="대기 중...")
-                return
-
-            f = io.StringIO()
-            with redirect_stdout(f):
-                analyze_logs(df, by='all') 
-            analysis_result = f.getvalue() 
-
-            self.show_analysis_window(analysis_result, log_path.name) # 제목에 파일 이름 표시
-            self._update_result_text(f"[{log_path.name}] 분석 결과(새 창)를 확인하세요.")
-        except Exception as e:
-            self._update_result_text(f"[오류] {e}")
-            
-        self.status_label.config(text="대기 중...")
-
-    def show_analysis_window(self, content, filename=""):
-        """ 분석 결과를 새 창(Toplevel)에 표시 """
-        top = tk.Toplevel(self.root)
-        top.title(f"분석 리포트 ({filename})") # 창 제목에 파일 이름 추가
-        top.geometry("600x600")
-        
-        txt_area = scrolledtext.ScrolledText(top, wrap=tk.WORD, font=("Consolas", 10))
-        txt_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        txt_area.insert(tk.INSERT, content)
-        txt_area.config(state=tk.DISABLED)
-        top.transient(self.root) 
-        top.grab_set() 
-
+            passive = PassiveMonitor(log_path, interfaces=args.interface or None,
+                                     interval_s=args.sample_interval, link_mbps=args.link_mbps,
+                                     busy_mbps=args.busy_mbps)
+        except (OSError, ValueError) as e: # 인터페이스 존재 여부는 만들어 봐야 알 수 있음
+            p.error(str(e))
+
+    path_probe = PathProbe(args.host, log_path, max_hops=args.max_hops) if args.path else None
+
+    cap = None
+    if capped:
+        cap = BandwidthCap(
+            max_bytes=None if args.max_mb is None else int(args.max_mb * 1_000_000),
+            max_seconds=args.max_seconds or BandwidthCap.max_seconds,
+            tolerance=BandwidthCap.tolerance if args.converge is None else args.converge / 100)
+    plan = StreamPlan(streams=args.streams, servers=args.servers or 1, urls=args.server) if planned else None
+
+    if args.once or args.loop:
+        scheduler = None
+        if args.adaptive:
+            scheduler = AdaptiveScheduler(min_interval=min_interval, max_interval=max_interval,
+                                          daily_budget_mb=args.daily_budget_mb)
+        elif args.daily_budget_mb:
+            # 고정 간격이지만 일일 예산은 적용 (간격이 변하지 않는 스케줄러)
+            scheduler = AdaptiveScheduler(min_interval=args.loop, max_interval=args.loop,
+                                          daily_budget_mb=args.daily_budget_mb)
+        detector = None
+        if args.detect or args.alert_log or args.alert_command or args.alert_webhook:
+            detector = make_detector(log_path, args.alert_log, args.alert_command, args.alert_webhook)
+        config = EngineConfig(scheduler=scheduler, detector=detector, rotation=rotation,
+                              probes=probes or None, passive=passive,
+                              path_probe=path_probe, cap=cap, plan=plan,
+                              ping_count=args.ping_count, ping_interval_s=args.ping_interval,
+                              extra_probes=args.probe, budgets=budgets)
+
+    if args.once:
+        run_once(host=args.host, log_path=log_path, config=config)
+    elif args.loop:
+        run_loop(args.loop, args.count, host=args.host, log_path=log_path, config=config)
+    elif args.passive:
+        run_passive(passive)
+    elif args.rotate:
+        seg = rotate_log(log_path, RotationPolicy(codec=args.compression), force=True)
+        if seg:
+            print(f"[OK] {log_path.name} -> {seg['file']} ({seg['rows']}행, {seg['bytes']:,} bytes)")
+        else:
+            print(f"회전할 로그가 없습니다: {log_path}")
+    elif args.benchmark_writes:
+        benchmark_writers(log_path, max_writers=args.workers or 8)
+    elif args.list_probes:
+        print_probes()
+    elif args.sla:
+        run_sla(log_path, args.sla, start, end, args.export)
+    elif args.compact:
+        moved = compact(log_path, keep_days=args.keep_days)
+        print(f"[OK] {args.keep_days:g}일보다 오래된 원시 행 {moved}개를 시간별 집계로 옮겼습니다.")
+    elif args.latency:
+        run_latency(args.host, log_path, args.latency_interval, args.retention_hours)
+    elif args.plot:
+        print(f"로그 파일({log_path.name})을 불러와 그래프를 생성합니다...")
+        # 구간 길이에 맞는 해상도(1분/10분/1시간/1일 버킷)를 피라미드에서 읽음
+        if args.watch:
+            # 이후에는 새 행만 읽어 시계열 끝에 합침 ('now' 기준 구간은 함께 이동)
+            watch_plot(log_path, args.range, width_px=args.width, refresh_s=args.refresh)
+        else:
+            plot_range(log_path, start, end, width_px=args.width, show=True)
+    elif args.analyze:
+        print(f"로그 파일({log_path.name})을 불러와 리포트를 생성합니다...")
+        if args.watch:
+            watch_analysis(log_path, args.analyze, refresh_s=args.refresh, workers=args.workers,
+                           rebuild=args.no_cache)
+            return
+        if args.benchmark:
+            benchmark(log_path, max_workers=args.workers)
+        else:
+            run_analyze(log_path, args.analyze, args.workers, args.export, use_cache=not args.no_cache)
+        print_latency_report(log_path)
+        print_passive_report(log_path)
+        print_path_report(log_path)
+    elif args.compare:
+        try:
+            run_compare(log_path, args.compare[0], args.compare[1], hours=args.hours)
+        except ValueError as e:
+            p.error(str(e))
+    elif args.report:
+        print(f"로그 파일({log_path.name})을 불러와 HTML 리포트를 생성합니다...")
+        t0 = time.perf_counter()
+        result = build_report(args.report, log_path=log_path, workers=args.workers)
+        if result:
+            total, reused = result
+            print(f"[OK] {args.report} ({total}개 섹션, 변경 없는 {reused}개 재사용, "
+                  f"{time.perf_counter() - t0:.1f}초)")
+    else:
+        p.print_help()
 
 if __name__ == "__main__":
-    main_root = tk.Tk()
-    app = NetSpeedApp(main_root)
-    main_root.mainloop()
\ No newline at end of file
+    main()
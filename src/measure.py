@@ -1,31 +1,169 @@
 # src/measure.py
 from __future__ import annotations
+import asyncio
+import importlib
+import locale
+import random
+import socket
+import ssl
+import struct
 import subprocess
 import platform
 import time
 import re
-from typing import Tuple
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Tuple, Optional, Callable, TypeVar, Iterator, List, Dict, Union, TYPE_CHECKING
+from urllib.parse import urlsplit
 
-import speedtest
+if TYPE_CHECKING:
+    from .bandwidth import BandwidthCap, StreamPlan
 
+T = TypeVar("T")
 
-def measure_ping(host: str = "8.8.8.8", count: int = 1, timeout_s: int = 2) -> float:
+
+class StageTimeout(Exception):
+    """ 측정 단계가 제한 시간을 넘겨 취소되었을 때 발생합니다 (run_in_thread, MeasureCore.run_probe). """
+
+
+class ProbeError(Exception):
+    """ 프로브 하나가 실패했을 때 MeasureCore가 원래 예외를 감싸 전달합니다 (메시지에 프로브 이름 포함). """
+
+
+# --- 프로브 플러그인 ---
+# 비용 등급: LATENCY 프로브는 한 주기 안에서 모두 동시에 실행하고, BANDWIDTH 프로브는 회선을 독점하므로
+# 지연 측정이 끝난 뒤 순번(core.bandwidth_slot)을 받아 하나씩 실행합니다.
+LATENCY = "latency"
+BANDWIDTH = "bandwidth"
+# 설치된 패키지가 프로브를 등록하는 entry point 그룹 (값은 ProbeSpec 객체, 예: 'mypkg.specs:SPEC')
+ENTRY_POINT_GROUP = "netspeed_watch.probes"
+
+
+@dataclass(frozen=True)
+class ProbeSpec:
     """
-    (기존과 동일 - 수정 없음)
+    측정 종류(프로브) 선언. 구현 모듈은 create_probe로 실제로 켤 때 처음 임포트합니다.
+    - factory: 'module:callable' (.으로 시작하면 이 패키지 기준, 예: '.path_probe:PathProbe')
+    - columns: 메인 로그 행에 항상 기록하는 컬럼 (실패 시 NaN). table이 있으면 비워 둠
+    - cost: LATENCY | BANDWIDTH
+    - budget_s: 기본 제한 시간(초). 넘기면 그 프로브만 취소 (MeasureCore의 budgets로 바꿀 수 있음).
+      설정에 따라 시간이 달라지는 프로브(ping, apps)는 Probe.budget_s를 재정의하며, 여기에는 기본 설정일 때의 값을 등록
+    - table: 결과를 메인 행 대신 보조 테이블(<로그 이름>_<table>.csv)에 여러 행으로 기록
     """
-    system = platform.system().lower()
-    if system == "windows":
-        cmd = ["ping", "-n", str(count), "-w", str(timeout_s * 1000), host]
-    else:
-        cmd = ["ping", "-c", str(count), "-W", str(timeout_s), host]
+    name: str
+    factory: str
+    columns: Tuple[str, ...] = ()
+    cost: str = LATENCY
+    budget_s: float = 10.0
+    table: Optional[str] = None
+    description: str = ""
+
+
+@dataclass
+class ProbeContext:
+    """ 한 측정 주기에서 모든 프로브가 받는 값. cap은 이번 주기의 대역폭 측정 제한 (일일 예산 반영). """
+    timestamp: int
+    host: str
+    log_path: Path
+    cap: Optional[BandwidthCap] = None
+
+
+class Probe:
+    """
+    프로브 플러그인 기반 클래스. name으로 등록된 ProbeSpec을 찾습니다.
+    measure(ctx)는 spec.table이 없으면 메인 행에 더할 {컬럼: 값}을, 있으면 보조 테이블 행 목록을 반환합니다.
+    columns 외의 키도 돌려줄 수 있으며 (예: 버스트 핑의 jitter_ms) 로그 헤더가 자동으로 늘어납니다.
+    제한 시간이 되면 작업이 취소되므로, 블로킹 작업은 run_in_thread로 감싸 stop을 확인해야 합니다.
+    """
+    name = ""
 
+    @property
+    def spec(self) -> ProbeSpec:
+        return get_probe_spec(self.name)
+
+    @property
+    def budget_s(self) -> float:
+        """ 제한 시간 기본값. 설정에 따라 달라지는 프로브는 재정의합니다. """
+        return self.spec.budget_s
+
+    async def measure(self, ctx: ProbeContext) -> Union[dict, List[dict]]:
+        raise NotImplementedError
+
+    def failed(self) -> dict:
+        """ 실패하거나 시간을 넘겼을 때 메인 행에 기록할 값 """
+        return {c: float("nan") for c in self.spec.columns}
+
+
+_PROBES: Dict[str, ProbeSpec] = {}
+_entry_points_loaded = False
+
+
+def register_probe(spec: ProbeSpec) -> ProbeSpec:
+    """ 프로브 종류를 등록합니다 (같은 이름은 덮어씀). """
+    _PROBES[spec.name] = spec
+    return spec
+
+
+def probe_specs() -> Dict[str, ProbeSpec]:
+    """ 등록된 모든 프로브. 처음 호출할 때 entry point로 설치된 프로브도 읽어 옵니다. """
+    global _entry_points_loaded
+    if not _entry_points_loaded:
+        _entry_points_loaded = True
+        _load_entry_points()
+    return dict(_PROBES)
+
+
+def get_probe_spec(name: str) -> ProbeSpec:
+    spec = _PROBES.get(name) or probe_specs().get(name)
+    if spec is None:
+        raise ValueError(f"등록되지 않은 프로브입니다: {name} (사용 가능: {', '.join(sorted(_PROBES))})")
+    return spec
+
+
+def _load_entry_points():
     try:
-        out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True)
-    except subprocess.CalledProcessError as e:
-        out = e.output
-    except Exception:
-        return float("nan")
+        from importlib.metadata import entry_points
+    except ImportError:
+        return
+    try:
+        found = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError: # Python 3.9 이하
+        found = entry_points().get(ENTRY_POINT_GROUP, [])
+    for ep in found:
+        try:
+            spec = ep.load()
+        except Exception as e:
+            print(f"[경고] 프로브 플러그인 '{ep.name}'을(를) 불러오지 못했습니다: {e}")
+            continue
+        if isinstance(spec, ProbeSpec):
+            register_probe(spec)
+        else:
+            print(f"[경고] 프로브 플러그인 '{ep.name}'이(가) ProbeSpec이 아닙니다.")
+
+
+def create_probe(name: str, **options) -> Probe:
+    """ name 프로브의 구현 모듈을 임포트하고 factory(**options)로 인스턴스를 만듭니다. """
+    spec = get_probe_spec(name)
+    module, _, attr = spec.factory.partition(":")
+    factory = getattr(importlib.import_module(module, __package__), attr)
+    probe = factory(**options)
+    if probe.name != name: # 다른 이름으로 다시 등록된 구현
+        probe.name = name
+    return probe
 
+
+def _ping_cmd(host: str, count: int, timeout_s: int, interval_s: Optional[float] = None) -> List[str]:
+    """ 플랫폼별 ping 명령 (Windows ping은 간격을 지정할 수 없음) """
+    if platform.system().lower() == "windows":
+        return ["ping", "-n", str(count), "-w", str(timeout_s * 1000), host]
+    if interval_s is None:
+        return ["ping", "-c", str(count), "-W", str(timeout_s), host]
+    return ["ping", "-c", str(count), "-i", str(interval_s), "-W", str(timeout_s), host]
+
+
+def parse_ping_avg(out: str) -> float:
+    """ ping 출력에서 평균 RTT(ms)를 찾습니다. 첫 응답의 time=, 없으면 요약 줄의 avg. """
     m = re.search(r"(time|시간)\s*=\s*([0-9]+(?:\.[0-9]+)?)\s*ms", out, re.IGNORECASE)
     if m:
         try:
@@ -46,33 +184,382 @@ def measure_ping(host: str = "8.8.8.8", count: int = 1, timeout_s: int = 2) -> f
     return float("nan")
 
 
-def measure_bandwidth() -> Tuple[float, float]:
+# 응답 없음 줄: Linux(-O) 'no answer yet', macOS 'Request timeout', Windows 영어/한글
+_LOST_RE = re.compile(r"no answer yet|request timeout|request timed out|시간이 만료|destination host unreachable",
+                      re.IGNORECASE)
+_TIME_RE = re.compile(r"(time|시간)\s*[=<]\s*([0-9]+(?:\.[0-9]+)?)\s*ms", re.IGNORECASE)
+
+
+_LOSS_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)%\s*(packet loss|loss|손실)", re.IGNORECASE)
+
+
+def measure_ping_burst(host: str = "8.8.8.8", count: int = 10, interval_s: float = 0.2,
+                       timeout_s: int = 2) -> dict:
+    """
+    ping 한 번 실행으로 count개 패킷을 interval_s 간격으로 보내고 모든 응답 RTT를 파싱합니다.
+    반환: ping_ms(평균), ping_min_ms, ping_max_ms, jitter_ms(평균 편차), loss_pct
+    - Linux 비관리자 계정은 interval_s 0.2초 미만을 허용하지 않음
+    - Windows ping은 간격을 지정할 수 없어 약 1초 고정
+    """
+    cmd = _ping_cmd(host, count, timeout_s, interval_s)
+    try:
+        out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True,
+                                      timeout=burst_timeout(count, interval_s, timeout_s))
+    except subprocess.CalledProcessError as e:
+        out = e.output # 일부 손실 시에도 종료 코드가 0이 아닐 수 있음
+    except Exception:
+        return _empty_burst()
+    return parse_ping_burst(out, count)
+
+
+def burst_timeout(count: int, interval_s: float, timeout_s: int) -> float:
+    """ 버스트 핑 전체에 허용하는 시간(초) """
+    return count * max(interval_s, 1.0) + timeout_s + 5
+
+
+def _empty_burst() -> dict:
+    nan = float("nan")
+    return {"ping_ms": nan, "ping_min_ms": nan, "ping_max_ms": nan, "jitter_ms": nan, "loss_pct": nan}
+
+
+def parse_ping_burst(out: str, count: int) -> dict:
+    """ 버스트 ping 출력에서 평균/최소/최대, 지터(평균 편차), 손실률을 계산합니다. """
+    result = _empty_burst()
+    rtts = parse_ping_rtts(out)
+    m = _LOSS_RE.search(out)
+    if m:
+        result["loss_pct"] = float(m.group(1))
+    else:
+        result["loss_pct"] = 100.0 * max(count - len(rtts), 0) / count
+
+    if rtts:
+        avg = sum(rtts) / len(rtts)
+        result.update({
+            "ping_ms": avg,
+            "ping_min_ms": min(rtts),
+            "ping_max_ms": max(rtts),
+            "jitter_ms": sum(abs(r - avg) for r in rtts) / len(rtts),
+        })
+    return result
+
+
+def parse_ping_rtts(out: str) -> list:
+    """ ping 출력에서 응답마다 찍힌 time=/시간= 값(ms)을 모두 추출합니다. """
+    return [float(m.group(2)) for m in _TIME_RE.finditer(out)]
+
+
+async def ping_async(host: str = "8.8.8.8", count: int = 1, interval_s: float = 0.2,
+                     timeout_s: int = 2) -> dict:
     """
-    (기존과 동일 - 수정 없음)
+    measure_ping_burst의 asyncio 버전. ping 프로세스를 이벤트 루프에서 기다리므로
+    다른 프로브와 동시에 실행할 수 있고, 취소되면 ping 프로세스를 종료합니다.
+    반환: count가 1이면 {"ping_ms"}, 2 이상이면 measure_ping_burst와 같은 키
     """
-    s = speedtest.Speedtest()
+    cmd = _ping_cmd(host, count, timeout_s, interval_s if count > 1 else None)
+    try:
+        proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.STDOUT)
+    except OSError:
+        return _empty_burst() if count > 1 else {"ping_ms": float("nan")}
+    try:
+        out, _ = await proc.communicate()
+    finally:
+        if proc.returncode is None:
+            proc.kill() # 취소/시간 초과
+    text = out.decode(locale.getpreferredencoding(False), errors="replace")
+    if count > 1:
+        return parse_ping_burst(text, count)
+    return {"ping_ms": parse_ping_avg(text)}
+
+
+class PingProbe(Probe):
+    """ 측정 대상(ctx.host)으로 핑 1개, count가 2 이상이면 버스트 (ping_min_ms, ping_max_ms, jitter_ms, loss_pct 추가) """
+    name = "ping"
+
+    def __init__(self, count: int = 1, interval_s: float = 0.2):
+        self.count = count
+        self.interval_s = interval_s
+
+    @property
+    def budget_s(self) -> float:
+        return burst_timeout(self.count, self.interval_s, 2)
+
+    async def measure(self, ctx: ProbeContext) -> dict:
+        return await ping_async(ctx.host, self.count, self.interval_s)
+
+    def failed(self) -> dict:
+        return _empty_burst() if self.count > 1 else {"ping_ms": float("nan")}
+
+
+def stream_ping(host: str = "8.8.8.8", interval_s: float = 1.0,
+                stop_event: Optional[threading.Event] = None) -> Iterator[Tuple[int, float]]:
+    """
+    ping 프로세스 하나를 계속 실행하며 응답마다 (timestamp, rtt_ms)를 내보냅니다.
+    표본마다 프로세스를 새로 띄우지 않으므로 1Hz 수집에도 부담이 적습니다.
+    응답이 없으면 rtt_ms는 NaN. stop_event가 설정되면 프로세스를 종료하고 끝냅니다.
+    (Windows ping -t는 간격을 지정할 수 없어 약 1초 고정)
+    """
+    system = platform.system().lower()
+    if system == "windows":
+        cmd = ["ping", "-t", host]
+    elif system == "linux":
+        # -O: 응답이 없을 때도 줄을 출력해 손실을 바로 기록
+        cmd = ["ping", "-O", "-i", str(interval_s), host]
+    else:
+        cmd = ["ping", "-i", str(interval_s), host]
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, bufsize=1)
+    try:
+        for line in proc.stdout:
+            if stop_event is not None and stop_event.is_set():
+                break
+            m = _TIME_RE.search(line)
+            if m:
+                yield int(time.time()), float(m.group(2))
+            elif _LOST_RE.search(line):
+                yield int(time.time()), float("nan")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# --- 애플리케이션 계층 프로브 (DNS / TCP 연결 / HTTP TTFB) ---
+def _split_host_port(target: str, default_port: int) -> Tuple[str, int]:
+    """ 'host', 'host:port', '[v6]:port' 형식을 (host, port)로 나눕니다. """
+    if target.startswith("["):
+        host, _, rest = target[1:].partition("]")
+        return host, int(rest[1:]) if rest.startswith(":") else default_port
+    if target.count(":") == 1:
+        host, port = target.split(":")
+        return host, int(port)
+    return target, default_port
+
+
+def _dns_query(name: str, qid: int) -> bytes:
+    """ A 레코드 재귀 질의 패킷 (RFC 1035) """
+    header = struct.pack(">HHHHHH", qid, 0x0100, 1, 0, 0, 0)
+    qname = b"".join(bytes([len(label)]) + label.encode("idna")
+                     for label in name.rstrip(".").split(".")) + b"\0"
+    return header + qname + struct.pack(">HH", 1, 1)
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self, qid: int, done: asyncio.Future):
+        self.qid = qid
+        self.done = done
+
+    def datagram_received(self, data, addr):
+        if len(data) >= 12 and struct.unpack(">H", data[:2])[0] == self.qid and not self.done.done():
+            self.done.set_result(data)
+
+    def error_received(self, exc):
+        if not self.done.done():
+            self.done.set_exception(exc)
+
+
+async def probe_dns(resolver: str, name: str = "example.com") -> float:
+    """ resolver(IP[:포트])에 name의 A 레코드를 UDP로 질의해 응답까지 걸린 시간(ms) """
+    loop = asyncio.get_running_loop()
+    host, port = _split_host_port(resolver, 53)
+    qid = random.randrange(0x10000)
+    done = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _DnsProtocol(qid, done),
+                                                       remote_addr=(host, port))
+    try:
+        t0 = time.perf_counter()
+        transport.sendto(_dns_query(name, qid))
+        data = await done
+        elapsed = (time.perf_counter() - t0) * 1000
+    finally:
+        transport.close()
+    rcode = data[3] & 0x0F
+    if rcode != 0:
+        raise OSError(f"DNS 응답 코드 {rcode}")
+    return elapsed
+
+
+async def probe_tcp(target: str) -> float:
+    """ host:port로 TCP 3-way handshake에 걸린 시간(ms). 이름 해석 시간은 제외합니다. """
+    loop = asyncio.get_running_loop()
+    host, port = _split_host_port(target, 443)
+    infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    family, _, _, _, addr = infos[0]
+    t0 = time.perf_counter()
+    _, writer = await asyncio.open_connection(addr[0], addr[1], family=family)
+    elapsed = (time.perf_counter() - t0) * 1000
+    writer.close()
+    return elapsed
+
+
+async def probe_http(url: str) -> float:
+    """
+    url에 GET 요청을 보내 응답 첫 바이트까지 걸린 시간(ms, TTFB).
+    브라우저 체감과 맞추기 위해 이름 해석/연결/TLS 시간을 포함합니다.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise ValueError(f"지원하지 않는 URL: {url}")
+    secure = parts.scheme == "https"
+    host = parts.hostname
+    port = parts.port or (443 if secure else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    t0 = time.perf_counter()
+    reader, writer = await asyncio.open_connection(
+        host, port, ssl=ssl.create_default_context() if secure else None)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                     f"User-Agent: netspeed-watch\r\nConnection: close\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        first = await reader.read(1)
+        elapsed = (time.perf_counter() - t0) * 1000
+    finally:
+        writer.close()
+    if not first:
+        raise ConnectionError("응답 없이 연결이 닫혔습니다")
+    return elapsed
+
+
+@dataclass
+class ProbeSet(Probe):
+    """
+    한 측정 주기에 실행할 애플리케이션 프로브 목록 (프로브 플러그인 'apps', 결과는 <로그 이름>_probes.csv).
+    dns: 질의할 리졸버 (예: '1.1.1.1', '9.9.9.9:53'), dns_name: 질의할 이름
+    tcp: 연결할 'host:port', http: TTFB를 잴 URL
+    모든 프로브는 하나의 asyncio 이벤트 루프에서 동시에 실행되므로
+    한 주기의 소요 시간은 가장 느린 프로브 하나(최대 timeout_s)에 가깝습니다.
+    """
+    dns: List[str] = field(default_factory=list)
+    tcp: List[str] = field(default_factory=list)
+    http: List[str] = field(default_factory=list)
+    dns_name: str = "example.com"
+    timeout_s: float = 5.0
+
+    name = "apps"
+
+    def __bool__(self) -> bool:
+        return bool(self.dns or self.tcp or self.http)
+
+    @property
+    def budget_s(self) -> float:
+        return self.timeout_s + 1.0 # 개별 프로브는 각자 timeout_s로 끝남
+
+    async def measure(self, ctx: ProbeContext) -> List[dict]:
+        return await self.run_async(ctx.timestamp)
+
+    def _jobs(self) -> List[Tuple[str, str, Callable]]:
+        return ([("dns", r, lambda r=r: probe_dns(r, self.dns_name)) for r in self.dns]
+                + [("tcp", t, lambda t=t: probe_tcp(t)) for t in self.tcp]
+                + [("http", u, lambda u=u: probe_http(u)) for u in self.http])
+
+    async def run_async(self, timestamp: Optional[int] = None) -> List[dict]:
+        """ 모든 프로브를 동시에 실행하고 프로브별 결과 행 목록을 반환합니다. """
+        ts = timestamp if timestamp is not None else int(time.time())
+        jobs = self._jobs()
+
+        async def one(make):
+            return await asyncio.wait_for(make(), self.timeout_s)
+
+        results = await asyncio.gather(*(one(make) for _, _, make in jobs), return_exceptions=True)
+        rows = []
+        for (kind, target, _), res in zip(jobs, results):
+            failed = isinstance(res, BaseException)
+            rows.append({
+                "timestamp": ts,
+                "probe": kind,
+                "target": target,
+                "ms": float("nan") if failed else round(res, 3),
+                "error": (str(res) or type(res).__name__) if failed else "",
+            })
+        return rows
+
+
+def run_bandwidth(stop_event: Optional[threading.Event] = None,
+                  cap: Optional[BandwidthCap] = None,
+                  plan: Optional[StreamPlan] = None) -> dict:
+    """
+    Speedtest.net 기반 다운로드/업로드 속도(Mbps)와 사용한 바이트 수 측정 (현재 스레드에서 실행).
+    반환: download_mbps, upload_mbps, bytes_used (+ cap/plan 사용 시 servers, streams, cpu_pct, sys_cpu_pct)
+    cap 지정 시 데이터량/시간 제한 안에서 측정하고 처리량이 수렴하면 일찍 끝냅니다 (bandwidth.measure_capped).
+    plan(StreamPlan) 지정 시 서버당 스트림 수와 동시에 사용할 서버 수를 바꿔 처리량을 합산합니다
+    (cap이 없으면 기본 BandwidthCap으로 측정).
+    stop_event가 설정되면 진행 중인 다운로드/업로드 전송을 멈춥니다.
+    """
+    from .bandwidth import BandwidthCap, measure_capped # 대역폭 측정을 켤 때만 임포트 (speedtest 포함)
+    if cap is not None or plan is not None:
+        return measure_capped(cap or BandwidthCap(), stop_event, plan)
+    import speedtest
+    # speedtest 내부 다운로더/업로더 스레드는 shutdown_event가 설정되면 전송을 멈춤
+    s = speedtest.Speedtest(shutdown_event=stop_event)
     s.get_best_server()
     down_bps = s.download()
     up_bps = s.upload()
-    return (down_bps / 1_000_000, up_bps / 1_000_000)
+    return {"download_mbps": down_bps / 1_000_000, "upload_mbps": up_bps / 1_000_000,
+            "bytes_used": int(s.results.bytes_received + s.results.bytes_sent)}
 
 
-def safe_measure(host: str = "8.8.8.8") -> dict: # <-- host 인자 추가
+async def run_in_thread(fn: Callable[[threading.Event], T], timeout_s: Optional[float] = None) -> T:
     """
-    단일 측정 묶음(핑 + 대역폭). 대역폭 실패 시 NaN 기록.
+    fn(stop)을 데몬 스레드에서 실행하고 결과를 기다립니다.
+    취소되거나 timeout_s를 넘기면 stop을 설정해 스레드 쪽 전송도 멈추게 하고
+    CancelledError / StageTimeout을 발생시킵니다 (fn이 낸 예외는 그대로 전달). 기본 실행기 대신 데몬 스레드를 쓰므로
+    멈추지 않는 작업이 있어도 이벤트 루프 종료를 막지 않습니다.
     """
-    ts = int(time.time())
-    ping_ms = measure_ping(host=host) # <-- host 인자 전달
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    stop = threading.Event()
+
+    def deliver(value, error):
+        if not done.done():
+            if error is not None:
+                done.set_exception(error)
+            else:
+                done.set_result(value)
+
+    def target():
+        value, error = None, None
+        try:
+            value = fn(stop)
+        except BaseException as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(deliver, value, error)
+        except RuntimeError:
+            pass # 이벤트 루프가 이미 닫힘 (취소된 작업)
+
+    # 취소된 뒤 늦게 도착한 예외는 아무도 기다리지 않으므로 여기서 확인만 함
+    done.add_done_callback(lambda f: f.cancelled() or f.exception())
+    threading.Thread(target=target, daemon=True).start()
     try:
-        down_mbps, up_mbps = measure_bandwidth()
-    except speedtest.SpeedtestException: 
-        down_mbps, up_mbps = float("nan"), float("nan")
-    except Exception:
-        down_mbps, up_mbps = float("nan"), float("nan")
-        
-    return {
-        "timestamp": ts,
-        "ping_ms": ping_ms,
-        "download_mbps": down_mbps,
-        "upload_mbps": up_mbps,
-    }
\ No newline at end of file
+        return await asyncio.wait_for(asyncio.shield(done), timeout_s)
+    except asyncio.TimeoutError:
+        stop.set()
+        if done.done():
+            raise # fn 자체가 낸 시간 초과 (소켓 등)
+        raise StageTimeout(f"{timeout_s:g}초 안에 끝나지 않았습니다.") from None
+    except BaseException:
+        stop.set()
+        raise
+
+
+# --- 기본 프로브 ---
+register_probe(ProbeSpec(
+    "ping", ".measure:PingProbe", columns=("ping_ms",), budget_s=PingProbe().budget_s,
+    description="ICMP ping to --host (burst columns with --ping-count > 1)"))
+register_probe(ProbeSpec(
+    "apps", ".measure:ProbeSet", table="probes", budget_s=ProbeSet().budget_s,
+    description="DNS lookup / TCP connect / HTTP TTFB (--dns, --tcp, --http)"))
+register_probe(ProbeSpec(
+    "path", ".path_probe:PathProbe", table="hops", budget_s=60.0,
+    description="Per-hop latency/loss on the route to --host (--path)"))
+register_probe(ProbeSpec(
+    "bandwidth", ".bandwidth:BandwidthProbe", columns=("download_mbps", "upload_mbps", "bytes_used"),
+    cost=BANDWIDTH, budget_s=180.0,
+    description="Download/upload throughput via speedtest.net or --server"))
+BUILTIN_PROBES = tuple(_PROBES)
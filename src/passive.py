@@ -0,0 +1,189 @@
+# src/passive.py
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, Deque
+
+from .storage import append_row
+
+NET_DEV = Path("/proc/net/dev")
+SYS_NET = Path("/sys/class/net")
+
+
+def passive_path(log_path: Path) -> Path:
+    """ 수동 측정 결과를 기록하는 보조 테이블 경로 (예: data/logs_passive.csv) """
+    return log_path.with_name(f"{log_path.stem}_passive.csv")
+
+
+def read_net_dev(path: Path = NET_DEV) -> Dict[str, Tuple[int, int]]:
+    """
+    /proc/net/dev를 읽어 {인터페이스: (수신 바이트, 송신 바이트)}를 반환합니다.
+    파일 하나를 읽고 파싱하는 것뿐이라 1Hz 이상으로 호출해도 부담이 거의 없습니다.
+    """
+    counters = {}
+    with open(path, encoding="ascii") as f:
+        for line in f.readlines()[2:]: # 앞의 두 줄은 헤더
+            name, _, data = line.partition(":")
+            fields = data.split()
+            if len(fields) >= 9:
+                counters[name.strip()] = (int(fields[0]), int(fields[8]))
+    return counters
+
+
+def link_speed_mbps(iface: str) -> Optional[float]:
+    """ 인터페이스 링크 속도(Mbps). 알 수 없으면(무선, 가상 인터페이스 등) None. """
+    try:
+        speed = int((SYS_NET / iface / "speed").read_text().strip())
+    except (OSError, ValueError):
+        return None
+    return float(speed) if speed > 0 else None
+
+
+def default_interfaces(path: Path = NET_DEV) -> List[str]:
+    """ 루프백을 제외한 모든 인터페이스 """
+    return [name for name in read_net_dev(path) if name != "lo"]
+
+
+class PassiveMonitor:
+    """
+    /proc/net/dev 카운터를 주기적으로 읽어 선택한 인터페이스의 실제 사용량을 기록합니다 (Linux 전용).
+
+    - interval_s마다 카운터 차이로 rx/tx 속도(Mbps)를 계산 (카운터 리셋/랩어라운드 표본은 버림)
+    - flush_s마다 구간 평균/최대 속도와 사용률을 보조 테이블(passive_path)에 한 행으로 기록
+    - 사용률 = max(rx, tx) / 링크 속도. link_mbps 미지정 시 /sys/class/net/*/speed 합계 사용
+    - 능동 측정(speedtest) 중인 표본은 active 비율로 표시해 자체 트래픽과 구분
+    - is_busy()로 최근 사용량을 확인해, 회선이 이미 바쁠 때 능동 측정을 건너뛸 수 있음
+    """
+
+    def __init__(self, log_path: Path, interfaces: Optional[List[str]] = None,
+                 interval_s: float = 1.0, flush_s: float = 60.0,
+                 link_mbps: Optional[float] = None, busy_mbps: Optional[float] = None,
+                 net_dev: Path = NET_DEV):
+        self.net_dev = net_dev
+        if not net_dev.exists():
+            raise OSError(f"{net_dev}가 없습니다 (수동 측정은 Linux 전용)")
+        available = read_net_dev(net_dev)
+        self.interfaces = interfaces or default_interfaces(net_dev)
+        missing = [i for i in self.interfaces if i not in available]
+        if missing:
+            raise ValueError(f"인터페이스를 찾을 수 없습니다: {', '.join(missing)} "
+                             f"(사용 가능: {', '.join(available)})")
+
+        self.path = passive_path(log_path)
+        self.interval_s = interval_s
+        self.flush_s = flush_s
+        if link_mbps is None:
+            speeds = [link_speed_mbps(i) for i in self.interfaces]
+            link_mbps = sum(speeds) if speeds and None not in speeds else None
+        self.link_mbps = link_mbps
+        self.busy_mbps = busy_mbps
+
+        # (timestamp, rx_mbps, tx_mbps, active) 최근 표본 (is_busy/recent용, flush_s 분량)
+        self.samples: Deque[Tuple[float, float, float, bool]] = deque(
+            maxlen=max(int(flush_s / interval_s) + 1, 2))
+        self._pending: List[Tuple[float, float, float, bool]] = []
+        self._last: Optional[Tuple[float, int, int]] = None
+        self._lock = threading.Lock()
+        self.active = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    # --- 표본 ---
+    def _totals(self) -> Tuple[int, int]:
+        counters = read_net_dev(self.net_dev)
+        rx = sum(counters[i][0] for i in self.interfaces if i in counters)
+        tx = sum(counters[i][1] for i in self.interfaces if i in counters)
+        return rx, tx
+
+    def sample(self, now: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """
+        카운터를 한 번 읽고 직전 표본 이후의 (rx_mbps, tx_mbps)를 반환합니다.
+        첫 호출이거나 카운터가 줄어든 경우(리셋, 32비트 랩어라운드)는 None.
+        """
+        now = now if now is not None else time.time()
+        rx, tx = self._totals()
+        last, self._last = self._last, (now, rx, tx)
+        if last is None or now <= last[0] or rx < last[1] or tx < last[2]:
+            return None
+        dt_s = now - last[0]
+        rates = ((rx - last[1]) * 8 / dt_s / 1_000_000, (tx - last[2]) * 8 / dt_s / 1_000_000)
+        with self._lock:
+            record = (now, rates[0], rates[1], self.active.is_set())
+            self.samples.append(record)
+            self._pending.append(record)
+        return rates
+
+    def recent(self, seconds: float = 10.0) -> Optional[Tuple[float, float]]:
+        """ 최근 seconds 동안 능동 측정이 아닌 표본의 평균 (rx_mbps, tx_mbps). 표본이 없으면 None. """
+        cutoff = time.time() - seconds
+        with self._lock:
+            window = [s for s in self.samples if s[0] >= cutoff and not s[3]]
+        if not window:
+            return None
+        return (sum(s[1] for s in window) / len(window), sum(s[2] for s in window) / len(window))
+
+    def utilization(self, rx_mbps: float, tx_mbps: float) -> float:
+        """ 링크 속도 대비 사용률(%). 링크 속도를 모르면 NaN. """
+        if not self.link_mbps:
+            return float("nan")
+        return 100.0 * max(rx_mbps, tx_mbps) / self.link_mbps
+
+    def is_busy(self, seconds: float = 10.0) -> bool:
+        """ 최근 사용량(rx 또는 tx)이 busy_mbps 이상이면 True. busy_mbps 미지정 시 항상 False. """
+        if self.busy_mbps is None:
+            return False
+        rates = self.recent(seconds)
+        return rates is not None and max(rates) >= self.busy_mbps
+
+    # --- 기록 ---
+    def flush(self) -> Optional[dict]:
+        """ 기록되지 않은 표본을 한 행으로 요약해 보조 테이블에 추가합니다. """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return None
+        n = len(pending)
+        rx = [s[1] for s in pending]
+        tx = [s[2] for s in pending]
+        row = {
+            "timestamp": int(pending[-1][0]),
+            "seconds": round(pending[-1][0] - pending[0][0] + self.interval_s, 1),
+            "rx_mbps": round(sum(rx) / n, 3),
+            "tx_mbps": round(sum(tx) / n, 3),
+            "rx_max_mbps": round(max(rx), 3),
+            "tx_max_mbps": round(max(tx), 3),
+            "util_pct": round(self.utilization(sum(rx) / n, sum(tx) / n), 2),
+            "active_pct": round(100.0 * sum(s[3] for s in pending) / n, 1),
+        }
+        append_row(row, log_path=self.path)
+        return row
+
+    # --- 실행 ---
+    def run(self, on_flush=None):
+        """ stop()이 호출될 때까지 interval_s마다 표본을 읽고 flush_s마다 기록합니다. """
+        next_flush = time.time() + self.flush_s
+        self.sample()
+        try:
+            while not self.stop_event.wait(self.interval_s):
+                self.sample()
+                if time.time() >= next_flush:
+                    row = self.flush()
+                    if row and on_flush:
+                        on_flush(row)
+                    next_flush += self.flush_s
+        finally:
+            self.flush()
+
+    def start(self, on_flush=None) -> threading.Thread:
+        """ 백그라운드 데몬 스레드에서 run()을 시작합니다. """
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, args=(on_flush,), daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.interval_s + 2)
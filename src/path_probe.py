@@ -0,0 +1,194 @@
+# src/path_probe.py
+from __future__ import annotations
+import hashlib
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Tuple
+
+from .measure import measure_ping_burst, run_in_thread, Probe, ProbeContext, _TIME_RE
+from .storage import append_row
+
+# TTL 초과 응답을 보낸 라우터 주소
+# Linux 'From 10.0.0.1 icmp_seq=1 Time to live exceeded', macOS '36 bytes from 10.0.0.1: Time to live exceeded'
+# Windows 'Reply from 10.0.0.1: TTL expired in transit.', 한글 Windows '10.0.0.1의 응답: ... TTL이 만료'
+_FROM_RE = re.compile(r"from\s+([0-9a-fA-F:.]*[0-9a-fA-F])|([0-9a-fA-F:.]*[0-9a-fA-F])의 응답", re.IGNORECASE)
+
+
+def path_cache_path(log_path: Path) -> Path:
+    """ 마지막으로 찾은 경로를 저장하는 캐시 파일 경로 (예: data/logs_path.json) """
+    return log_path.with_name(f"{log_path.stem}_path.json")
+
+
+def hops_path(log_path: Path) -> Path:
+    """ 홉별 측정 결과를 기록하는 보조 테이블 경로 (예: data/logs_hops.csv) """
+    return log_path.with_name(f"{log_path.stem}_hops.csv")
+
+
+def probe_ttl(target_ip: str, ttl: int, timeout_s: int = 1) -> Tuple[Optional[str], bool]:
+    """
+    TTL을 제한한 핑 1개를 보내 (응답한 주소, 목적지 도달 여부)를 반환합니다.
+    응답이 없으면 (None, False).
+    """
+    system = platform.system().lower()
+    if system == "windows":
+        cmd = ["ping", "-n", "1", "-i", str(ttl), "-w", str(timeout_s * 1000), target_ip]
+    elif system == "darwin":
+        cmd = ["ping", "-n", "-c", "1", "-m", str(ttl), "-t", str(timeout_s + 1), target_ip]
+    else:
+        cmd = ["ping", "-n", "-c", "1", "-t", str(ttl), "-W", str(timeout_s), target_ip]
+
+    try:
+        out = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                             timeout=timeout_s + 5).stdout
+    except Exception:
+        return None, False
+
+    for line in out.splitlines():
+        m = _FROM_RE.search(line)
+        if not m:
+            continue
+        addr = m.group(1) or m.group(2)
+        if addr == target_ip and _TIME_RE.search(line):
+            return addr, True
+        if addr != target_ip:
+            return addr, False
+    return None, False
+
+
+def path_id(hops: List[Optional[str]]) -> str:
+    """ 홉 주소 목록의 짧은 식별자 (경로가 같으면 같은 값) """
+    text = ",".join(h or "*" for h in hops)
+    return hashlib.sha1(text.encode("ascii")).hexdigest()[:8]
+
+
+class PathProbe(Probe):
+    """
+    --host까지의 경로를 찾고 홉별 지연/손실을 동시에 측정합니다.
+
+    - 탐색: TTL 1..max_hops 핑을 한꺼번에 보내 각 TTL에서 응답한 라우터를 찾음
+      (traceroute처럼 TTL을 하나씩 늘리지 않으므로 전체 소요 시간은 약 timeout_s)
+    - 측정: 캐시된 경로의 모든 홉에 버스트 핑(measure_ping_burst)을 동시에 보냄
+    - 경로 변경 확인: 매 주기 verify_hops개의 TTL만 순서대로 다시 확인해 캐시와 다르면
+      그 주기에 바로 재탐색. 캐시가 max_age_s보다 오래되어도 재탐색
+    - 결과는 hops_path(홉당 한 행, timestamp/path_id로 측정 행과 연결)에 기록
+    프로브 플러그인 'path'로 MeasureCore에서 실행할 때는 데몬 스레드에서 run을 호출합니다.
+    """
+    name = "path"
+
+    def __init__(self, host: str, log_path: Path, max_hops: int = 20, ping_count: int = 5,
+                 ping_interval_s: float = 0.2, timeout_s: int = 1, verify_hops: int = 2,
+                 max_age_s: float = 3600):
+        self.host = host
+        self.log_path = log_path
+        self.cache_path = path_cache_path(log_path)
+        self.max_hops = max_hops
+        self.ping_count = ping_count
+        self.ping_interval_s = ping_interval_s
+        self.timeout_s = timeout_s
+        self.verify_hops = verify_hops
+        self.max_age_s = max_age_s
+        self.path: Optional[dict] = self._load()
+        self._verify_pos = 0
+
+    # --- 캐시 ---
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                path = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return path if path.get("host") == self.host else None
+
+    def _save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.path, f)
+        os.replace(tmp, self.cache_path)
+
+    # --- 탐색 ---
+    def discover(self) -> dict:
+        """ 모든 TTL을 동시에 확인해 경로를 찾고 캐시에 저장합니다. """
+        target_ip = socket.getaddrinfo(self.host, None)[0][4][0]
+        ttls = range(1, self.max_hops + 1)
+        with ThreadPoolExecutor(max_workers=self.max_hops) as pool:
+            answers = list(pool.map(lambda t: probe_ttl(target_ip, t, self.timeout_s), ttls))
+
+        hops: List[Optional[str]] = []
+        for addr, reached in answers:
+            hops.append(addr)
+            if reached:
+                break
+        # 목적지에 도달하지 못했으면 끝의 무응답 홉은 버림
+        while hops and hops[-1] is None:
+            hops.pop()
+        self.path = {"host": self.host, "target_ip": target_ip, "hops": hops,
+                     "path_id": path_id(hops), "discovered": int(time.time())}
+        self._save()
+        return self.path
+
+    def _verify(self) -> bool:
+        """ 캐시된 경로 중 verify_hops개 TTL을 다시 확인합니다. 달라졌으면 False. """
+        hops = self.path["hops"]
+        known = [ttl for ttl, h in enumerate(hops, start=1) if h is not None]
+        if not known:
+            return False
+        picks = [known[(self._verify_pos + k) % len(known)] for k in range(min(self.verify_hops, len(known)))]
+        self._verify_pos += len(picks)
+        with ThreadPoolExecutor(max_workers=len(picks)) as pool:
+            answers = list(pool.map(lambda t: probe_ttl(self.path["target_ip"], t, self.timeout_s), picks))
+        # 응답이 없는 것은 ICMP 제한일 수 있으므로 다른 주소가 응답한 경우만 변경으로 봄
+        return all(addr is None or addr == hops[ttl - 1] for ttl, (addr, _) in zip(picks, answers))
+
+    # --- 측정 ---
+    def run(self, timestamp: Optional[int] = None) -> List[dict]:
+        """
+        경로를 (필요 시) 갱신하고 모든 홉을 동시에 측정해 홉별 결과 행을 반환합니다.
+        각 행의 path_changed는 이번 주기에 경로가 바뀌었으면 1.
+        """
+        ts = timestamp if timestamp is not None else int(time.time())
+        old_id = self.path["path_id"] if self.path else None
+        if self.path is None or ts - self.path.get("discovered", 0) > self.max_age_s \
+                or not self._verify():
+            self.discover()
+        changed = int(old_id is not None and old_id != self.path["path_id"])
+
+        hops = self.path["hops"]
+        targets = [h for h in hops if h is not None]
+        with ThreadPoolExecutor(max_workers=max(len(targets), 1)) as pool:
+            stats = dict(zip(targets, pool.map(
+                lambda h: measure_ping_burst(h, count=self.ping_count, interval_s=self.ping_interval_s,
+                                             timeout_s=self.timeout_s), targets)))
+
+        nan = float("nan")
+        rows = []
+        for ttl, addr in enumerate(hops, start=1):
+            s = stats.get(addr, {})
+            rows.append({
+                "timestamp": ts,
+                "path_id": self.path["path_id"],
+                "hop": ttl,
+                "ip": addr or "*",
+                "rtt_ms": round(s.get("ping_ms", nan), 3),
+                "jitter_ms": round(s.get("jitter_ms", nan), 3),
+                "loss_pct": s.get("loss_pct", nan),
+                "path_changed": changed,
+            })
+        return rows
+
+    async def measure(self, ctx: ProbeContext) -> List[dict]:
+        return await run_in_thread(lambda stop: self.run(ctx.timestamp))
+
+    def run_and_log(self, timestamp: Optional[int] = None) -> List[dict]:
+        """ run() 결과를 hops_path에 추가합니다. """
+        rows = self.run(timestamp)
+        for row in rows:
+            append_row(row, log_path=hops_path(self.log_path))
+        return rows
@@ -0,0 +1,223 @@
+# src/pyramid.py
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from typing import Optional, List, Tuple
+
+import pandas as pd
+
+from .storage import log_lock, log_cursor, read_since, _read_active_range, DEFAULT_LOG_PATH
+from .rollup import load_combined, hourly_stat, as_weighted, weight_col, METRICS
+
+# (이름, 버킷 길이 초) - 가는 해상도부터
+LEVELS: List[Tuple[str, int]] = [("1m", 60), ("10m", 600), ("1h", 3600), ("1d", 86400)]
+
+
+def pyramid_path(log_path: Path, level: str) -> Path:
+    """ 해상도별 버킷 테이블 경로 (예: data/logs_pyramid_1h.csv) """
+    return log_path.with_name(f"{log_path.stem}_pyramid_{level}.csv")
+
+
+def pyramid_state_path(log_path: Path) -> Path:
+    """ 읽은 위치(커서)와 아직 닫히지 않은 버킷을 저장하는 파일 (예: data/logs_pyramid.json) """
+    return log_path.with_name(f"{log_path.stem}_pyramid.json")
+
+
+def choose_level(start: int, end: int, width_px: int) -> Tuple[str, int]:
+    """ 구간의 버킷 수가 width_px 이하가 되는 가장 가는 해상도 (없으면 가장 거친 해상도) """
+    span = max(end - start, 1)
+    for name, seconds in LEVELS:
+        if span / seconds <= width_px:
+            return name, seconds
+    return LEVELS[-1]
+
+
+def bucketize(df: pd.DataFrame, seconds: int) -> pd.DataFrame:
+    """
+    행을 seconds 길이 버킷으로 묶어 지표별 count/mean/min/max를 계산합니다.
+    원시 행과 시간별 집계 행(가중치/최솟값/최댓값 컬럼이 있는 load_combined 결과)을 모두 받습니다.
+    """
+    if weight_col(METRICS[0]) not in df.columns:
+        df = as_weighted(df)
+    bucket = (df["timestamp"].astype("int64") // seconds) * seconds
+    out = pd.DataFrame(index=pd.Index(sorted(bucket.unique()), name="timestamp"))
+    for m in METRICS:
+        if m not in df.columns:
+            continue
+        w = df[weight_col(m)].fillna(0)
+        x = df[m].where(w > 0)
+        lo = df[f"{m}_min"].fillna(x) if f"{m}_min" in df.columns else x
+        hi = df[f"{m}_max"].fillna(x) if f"{m}_max" in df.columns else x
+        count = w.groupby(bucket).sum()
+        out[f"{m}_count"] = count
+        out[f"{m}_mean"] = (x.fillna(0) * w).groupby(bucket).sum() / count.where(count > 0)
+        out[f"{m}_min"] = lo.groupby(bucket).min()
+        out[f"{m}_max"] = hi.groupby(bucket).max()
+    return out.reset_index()
+
+
+def merge_buckets(df: pd.DataFrame) -> pd.DataFrame:
+    """ 같은 버킷이 여러 행이면 하나로 합칩니다 (count 합, 가중 평균, min/max). """
+    df = df.astype({"timestamp": "int64"})
+    if df.empty or not df["timestamp"].duplicated().any():
+        return df.sort_values("timestamp").reset_index(drop=True)
+    grouped = df.groupby("timestamp")
+    out = pd.DataFrame(index=grouped.size().index)
+    for m in METRICS:
+        if f"{m}_count" not in df.columns:
+            continue
+        n = df[f"{m}_count"].fillna(0)
+        count = n.groupby(df["timestamp"]).sum()
+        out[f"{m}_count"] = count
+        out[f"{m}_mean"] = (df[f"{m}_mean"].fillna(0) * n).groupby(df["timestamp"]).sum() \
+            / count.where(count > 0)
+        out[f"{m}_min"] = grouped[f"{m}_min"].min()
+        out[f"{m}_max"] = grouped[f"{m}_max"].max()
+    return out.reset_index()
+
+
+def _read_state(log_path: Path) -> Optional[dict]:
+    try:
+        with open(pyramid_state_path(log_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(log_path: Path, state: dict):
+    path = pyramid_state_path(log_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _clean(value):
+    return None if pd.isna(value) else float(value)
+
+
+def _ingest(log_path: Path, df: pd.DataFrame, state: dict):
+    """
+    새 행을 모든 해상도에 반영합니다. 해상도마다 마지막(열린) 버킷은 상태 파일에 두고
+    그보다 이전 버킷만 CSV에 추가하므로, CSV의 각 버킷은 한 번만 기록됩니다.
+    """
+    for name, seconds in LEVELS:
+        buckets = bucketize(df, seconds)
+        opened = state["open"].get(name)
+        if opened:
+            buckets = merge_buckets(pd.concat([pd.DataFrame([opened], dtype="float64"), buckets],
+                                              ignore_index=True))
+        closed, last = buckets.iloc[:-1], buckets.iloc[-1]
+        if not closed.empty:
+            path = pyramid_path(log_path, name)
+            closed.to_csv(path, mode="a", header=not path.exists(), index=False)
+        state["open"][name] = {k: _clean(v) for k, v in last.items()}
+    state["first_ts"] = int(min(state.get("first_ts") or df["timestamp"].min(), df["timestamp"].min()))
+    state["last_ts"] = int(max(state.get("last_ts") or 0, df["timestamp"].max()))
+
+
+def build_pyramid(log_path: Path = DEFAULT_LOG_PATH) -> Optional[dict]:
+    """ 원시 로그와 시간별 집계 전체로 피라미드를 처음부터 다시 만듭니다. """
+    with log_lock(pyramid_state_path(log_path)):
+        return _build_locked(log_path)
+
+
+def _build_locked(log_path: Path) -> Optional[dict]:
+    for name, _ in LEVELS:
+        pyramid_path(log_path, name).unlink(missing_ok=True)
+    pyramid_state_path(log_path).unlink(missing_ok=True)
+    for _ in range(3):
+        # 커서 시점까지 읽은 뒤, 읽는 동안 회전/압축이 없었는지(커서가 이어지는지) 확인
+        cursor, hourly = log_cursor(log_path), hourly_stat(log_path)
+        df = load_combined(log_path=log_path, cursor=cursor)
+        new, nxt = read_since(log_path, cursor)
+        if nxt is not None and hourly == hourly_stat(log_path):
+            break
+    else:
+        print("[경고] 로그가 계속 바뀌어 피라미드를 확정하지 못했습니다. 다음 조회 때 다시 만듭니다.")
+        return None
+    if df is None or df.empty:
+        if new is None or new.empty:
+            return None
+        df, new = new, None
+    state = {"version": 2, "open": {}, "cursor": nxt, "hourly": hourly}
+    _ingest(log_path, df.sort_values("timestamp"), state)
+    if new is not None and not new.empty:
+        _ingest(log_path, new, state)
+    _write_state(log_path, state)
+    return state
+
+
+def update_pyramid(log_path: Path = DEFAULT_LOG_PATH, build: bool = True) -> Optional[dict]:
+    """
+    마지막으로 읽은 위치(storage.read_since 커서) 이후 활성 CSV에 추가된 행만 읽어 피라미드를 갱신합니다.
+    timestamp가 아니라 바이트 위치를 기준으로 하므로 같은 초에 기록된 행이나 늦게 들어온 행도 빠짐없이 반영합니다.
+    피라미드가 없거나 회전/헤더 확장/압축으로 커서를 이어 갈 수 없으면 build=True일 때만 처음부터 다시 만들고,
+    build=False면 아무것도 하지 않고 None을 반환합니다 (측정 루프는 build=False로 호출해 전체 재구성을
+    다음 그래프 조회에 맡김).
+    측정 엔진과 그래프 조회가 다른 프로세스에서 동시에 갱신할 수 있으므로 잠금 안에서 실행합니다.
+    """
+    with log_lock(pyramid_state_path(log_path)):
+        state = _read_state(log_path)
+        if state is None or state.get("version") != 2 or any(n not in state["open"] for n, _ in LEVELS) \
+                or state["hourly"] != hourly_stat(log_path):
+            return _build_locked(log_path) if build else None
+        new, cursor = read_since(log_path, state["cursor"])
+        if cursor is None:
+            return _build_locked(log_path) if build else None
+        if cursor == state["cursor"]:
+            return state
+        if new is not None and not new.empty:
+            _ingest(log_path, new, state)
+        state["cursor"] = cursor
+        _write_state(log_path, state)
+        return state
+
+
+def read_buckets(log_path: Path, state: dict, start: Optional[int] = None, end: Optional[int] = None,
+                 width_px: int = 640) -> Tuple[pd.DataFrame, str, int]:
+    """
+    갱신된 피라미드(state)에서 [start, end) 구간을 width_px에 맞는 해상도의 버킷 형식
+    (timestamp, {지표}_count/_mean/_min/_max)으로 읽습니다. 반환: (버킷, 해상도 이름, 버킷 길이 초)
+    해상도 파일은 희소 인덱스로 구간과 겹치는 블록만 읽습니다.
+    """
+    start = state["first_ts"] if start is None else start
+    end = state["last_ts"] + 1 if end is None else end
+    name, seconds = choose_level(start, end, width_px)
+    lo = start // seconds * seconds
+
+    frames = []
+    path = pyramid_path(log_path, name)
+    if path.exists():
+        frames.append(_read_active_range(path, lo, end))
+    frames.append(pd.DataFrame([state["open"][name]], dtype="float64"))
+    df = merge_buckets(pd.concat(frames, ignore_index=True))
+    return df[(df["timestamp"] >= lo) & (df["timestamp"] < end)].reset_index(drop=True), name, seconds
+
+
+def buckets_as_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """ 버킷을 rollup.hourly_as_rows와 같은 모양(timestamp, 지표 평균, {지표}_n/_min/_max)으로 바꿉니다. """
+    rows = pd.DataFrame({"timestamp": df["timestamp"].astype("int64")})
+    for m in METRICS:
+        if f"{m}_mean" not in df.columns:
+            continue
+        rows[m] = df[f"{m}_mean"]
+        rows[weight_col(m)] = df[f"{m}_count"].fillna(0).astype("int64")
+        rows[f"{m}_min"] = df[f"{m}_min"]
+        rows[f"{m}_max"] = df[f"{m}_max"]
+    return rows.reset_index(drop=True)
+
+
+def query(log_path: Path = DEFAULT_LOG_PATH, start: Optional[int] = None, end: Optional[int] = None,
+          width_px: int = 640) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    [start, end) 구간을 width_px 픽셀 폭에 맞는 해상도로 읽습니다.
+    피라미드가 없거나 낡았으면(측정 루프는 다시 만들지 않음) 여기서 처음부터 만듭니다.
+    반환: (buckets_as_rows 형식의 행, 해상도 이름)
+    """
+    state = update_pyramid(log_path)
+    if state is None:
+        return None, None
+    df, name, _ = read_buckets(log_path, state, start, end, width_px)
+    return buckets_as_rows(df), name
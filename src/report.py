@@ -0,0 +1,261 @@
+# src/report.py
+from __future__ import annotations
+import base64
+import datetime as dt
+import hashlib
+import html
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import local_time_parts, update_pivot, heatmap_from_partial
+from .rollup import load_combined, weighted_mean, total_measurements, METRICS, QUALITY_METRICS
+from .storage import DEFAULT_LOG_PATH
+
+# 차트 그리는 방식이 바뀌면 올려서 이전 캐시를 무효화
+RENDER_VERSION = 2
+
+LABELS = {
+    "ping_ms": "Ping (ms)",
+    "download_mbps": "Download (Mbps)",
+    "upload_mbps": "Upload (Mbps)",
+    "ping_min_ms": "Ping min (ms)",
+    "ping_max_ms": "Ping max (ms)",
+    "jitter_ms": "Jitter (ms)",
+    "loss_pct": "Loss (%)",
+}
+PERCENTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def report_cache_path(out_path: Path) -> Path:
+    """ 섹션별 렌더링 결과 캐시 경로 (예: report.html -> report.cache.json) """
+    return out_path.with_suffix(".cache.json")
+
+
+# --- 섹션 입력 계산 ---
+def _weights(df: pd.DataFrame, m: str) -> np.ndarray:
+    """ 지표 m의 행별 표본 수 (시간별 집계 행은 {지표}_n, 원시 행은 값이 있으면 1) """
+    if f"{m}_n" in df.columns:
+        return df[f"{m}_n"].fillna(0).to_numpy(dtype="float64")
+    return df[m].notna().to_numpy(dtype="float64")
+
+
+def weighted_quantiles(values: np.ndarray, weights: np.ndarray, qs: List[float]) -> np.ndarray:
+    """
+    가중 분위수. 시간별 집계 행은 평균값 하나가 표본 수만큼 있는 것으로 보므로
+    오래된 구간의 분위수는 근사값입니다.
+    """
+    mask = ~np.isnan(values) & (weights > 0)
+    v, w = values[mask], weights[mask]
+    if len(v) == 0:
+        return np.full(len(qs), np.nan)
+    order = np.argsort(v, kind="stable")
+    v, w = v[order], w[order]
+    cum = (np.cumsum(w) - 0.5 * w) / w.sum()
+    return np.interp(qs, cum, v)
+
+
+def _local_buckets(ts: np.ndarray, daily: bool) -> np.ndarray:
+    """ 유닉스 시각을 로컬 시간대의 날짜(daily) 또는 정시 시작 시각으로 내림합니다. """
+    quarters, inverse = np.unique(ts // 900, return_inverse=True)
+    starts = []
+    for q in quarters:
+        t = dt.datetime.fromtimestamp(int(q) * 900)
+        starts.append(t.replace(hour=0 if daily else t.hour, minute=0, second=0, microsecond=0))
+    return np.array(starts, dtype="datetime64[s]")[inverse]
+
+
+def build_sections(df: pd.DataFrame, pivot: Optional[dict] = None) -> List[dict]:
+    """
+    리포트 섹션 목록을 만듭니다. 각 섹션은 id/title/kind와 렌더링 입력(data)만 담고,
+    HTML 변환은 render_section에서 합니다 (입력이 같으면 캐시된 HTML 재사용).
+    pivot: aggregate.update_pivot의 누적 부분 집계 (히트맵은 여기서 만듦, 없으면 히트맵 생략)
+    """
+    df = df.copy()
+    ts = df["timestamp"].to_numpy(dtype="int64")
+    hours, _ = local_time_parts(ts)
+    df["hour"] = hours
+    metrics = [m for m in METRICS if m in df.columns]
+    quality = [m for m in QUALITY_METRICS if m in df.columns]
+
+    sections = []
+
+    # 요약
+    overall = weighted_mean(df)
+    first, last = (dt.datetime.fromtimestamp(int(t)).strftime("%Y-%m-%d %H:%M") for t in (ts.min(), ts.max()))
+    summary = pd.DataFrame({
+        "value": [total_measurements(df), first, last]
+                 + [round(float(overall[m]), 2) for m in metrics + quality],
+    }, index=["Total Measurements", "First", "Last"] + [LABELS[m] for m in metrics + quality])
+    sections.append({"id": "summary", "title": "Summary", "kind": "table", "data": summary})
+
+    # 분위수 표
+    rows = {}
+    for m in metrics + quality:
+        w = _weights(df, m)
+        values = df[m].to_numpy(dtype="float64")
+        q = weighted_quantiles(values, w, PERCENTILES)
+        rows[LABELS[m]] = [int(w.sum())] + list(np.round(q, 2))
+    pct = pd.DataFrame.from_dict(rows, orient="index",
+                                 columns=["count"] + [f"p{int(p * 100):02d}" for p in PERCENTILES])
+    sections.append({"id": "percentiles", "title": "Percentiles", "kind": "table", "data": pct})
+
+    # 요일 x 시간대 히트맵 (--analyze, --plot과 같은 피벗 캐시의 격자)
+    for m, grid in (heatmap_from_partial(pivot) if pivot else {}).items():
+        sections.append({"id": f"heatmap_{m}", "title": f"{LABELS[m]} by Hour and Weekday",
+                         "kind": "heatmap", "data": grid, "higher_is_better": m.endswith("_mbps")})
+
+    # 시간대별 평균 표
+    hourly = weighted_mean(df, "hour")[metrics + quality].round(2)
+    hourly.index.name = "hour"
+    sections.append({"id": "hourly", "title": "Hourly Average", "kind": "table", "data": hourly})
+
+    # 시계열 (2주보다 길면 일 단위, 아니면 시간 단위로 내려 그림)
+    daily = ts.max() - ts.min() > 14 * 86400
+    df["bucket"] = _local_buckets(ts, daily)
+    bucket_avg = weighted_mean(df, "bucket")
+    for m in metrics:
+        lo = df[f"{m}_min"] if f"{m}_min" in df.columns else df[m]
+        hi = df[f"{m}_max"] if f"{m}_max" in df.columns else df[m]
+        series = pd.DataFrame({
+            "mean": bucket_avg[m],
+            "min": lo.fillna(df[m]).groupby(df["bucket"]).min(),
+            "max": hi.fillna(df[m]).groupby(df["bucket"]).max(),
+        })
+        sections.append({"id": f"series_{m}", "title": f"{LABELS[m]} ({'daily' if daily else 'hourly'})",
+                         "kind": "series", "data": series})
+    return sections
+
+
+def section_hash(section: dict) -> str:
+    """ 섹션 입력의 해시. 이전 리포트와 같으면 렌더링을 건너뜁니다. """
+    h = hashlib.sha1(f"{RENDER_VERSION}|{section['kind']}|{section['title']}|"
+                     f"{section.get('higher_is_better')}".encode("utf-8"))
+    data: pd.DataFrame = section["data"]
+    h.update(",".join(map(str, data.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(data.astype(str), index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+# --- 렌더링 (워커 프로세스에서 실행) ---
+def _png_tag(fig) -> str:
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100)
+    return f'<img alt="" src="data:image/png;base64,{base64.b64encode(buf.getvalue()).decode("ascii")}">'
+
+
+def render_section(section: dict) -> str:
+    """
+    섹션 하나를 HTML 조각으로 변환합니다.
+    pyplot 대신 Figure 객체를 직접 사용하므로 GUI 백엔드 설정과 상관없이 워커에서 동작합니다.
+    """
+    kind, data = section["kind"], section["data"]
+    if kind == "table":
+        return data.to_html(classes="table", border=0, na_rep="-", float_format=lambda v: f"{v:.2f}")
+
+    from matplotlib.figure import Figure
+    if kind == "heatmap":
+        fig = Figure(figsize=(10, 3.5))
+        ax = fig.subplots()
+        cmap = "RdYlGn" if section.get("higher_is_better") else "RdYlGn_r"
+        im = ax.imshow(data.to_numpy(dtype="float64"), aspect="auto", cmap=cmap)
+        ax.set_xticks(range(0, 24, 2), [str(h) for h in range(0, 24, 2)])
+        ax.set_yticks(range(len(data.index)), [d[:3] for d in data.index])
+        ax.set_xlabel("Hour")
+        fig.colorbar(im, ax=ax)
+        fig.tight_layout()
+        return _png_tag(fig)
+    if kind == "series":
+        fig = Figure(figsize=(10, 3.5))
+        ax = fig.subplots()
+        ax.plot(data.index, data["mean"], linewidth=1)
+        ax.fill_between(data.index, data["min"], data["max"], alpha=0.2)
+        ax.grid(True)
+        fig.autofmt_xdate()
+        fig.tight_layout()
+        return _png_tag(fig)
+    raise ValueError(f"알 수 없는 섹션 종류: {kind}")
+
+
+# --- 리포트 ---
+_STYLE = """
+body { font-family: sans-serif; margin: 2em; color: #222; }
+h1 { margin-bottom: 0; }
+.meta { color: #777; margin-top: 0.3em; }
+section { margin: 2em 0; }
+table.table { border-collapse: collapse; }
+table.table th, table.table td { padding: 3px 10px; text-align: right; border-bottom: 1px solid #ddd; }
+img { max-width: 100%; }
+"""
+
+
+def _load_cache(path: Path) -> Dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_report(out_path: Path, log_path: Path = DEFAULT_LOG_PATH,
+                 workers: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """
+    요약/분위수 표, 시간대x요일 히트맵, 시계열 차트를 담은 단일 HTML 파일을 만듭니다.
+    차트는 이미지(base64)로 포함되어 파일 하나로 볼 수 있습니다.
+    - 차트는 프로세스 풀에서 병렬로 렌더링 (matplotlib은 프로세스당 단일 스레드)
+    - 섹션 입력이 이전 리포트와 같으면 캐시(report_cache_path)에 저장된 HTML을 재사용
+    반환: (전체 섹션 수, 재사용한 섹션 수). 데이터가 없으면 None.
+    """
+    df = load_combined(log_path=log_path)
+    if df is None or df.empty or "timestamp" not in df.columns:
+        print("No data to report.")
+        return None
+
+    sections = build_sections(df, update_pivot(log_path, workers=workers))
+    cache_path = report_cache_path(out_path)
+    cache = _load_cache(cache_path)
+
+    hashes = [section_hash(s) for s in sections]
+    fragments: Dict[str, str] = {}
+    todo = []
+    for s, h in zip(sections, hashes):
+        cached = cache.get(s["id"])
+        if cached and cached.get("hash") == h:
+            fragments[s["id"]] = cached["html"]
+        else:
+            todo.append(s)
+
+    workers = workers or os.cpu_count() or 1
+    charts = [s for s in todo if s["kind"] != "table"]
+    if workers > 1 and len(charts) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(charts))) as pool:
+            fragments.update(zip((s["id"] for s in charts), pool.map(render_section, charts)))
+    else:
+        fragments.update((s["id"], render_section(s)) for s in charts)
+    fragments.update((s["id"], render_section(s)) for s in todo if s["kind"] == "table")
+
+    generated = dt.datetime.now().strftime("%Y-%m-%d %H:%M")
+    body = "\n".join(f"<section><h2>{html.escape(s['title'])}</h2>\n{fragments[s['id']]}\n</section>"
+                     for s in sections)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                f"<title>NetSpeed Report</title><style>{_STYLE}</style></head><body>\n"
+                f"<h1>NetSpeed Report</h1><p class=\"meta\">{html.escape(log_path.name)}, "
+                f"generated {generated}</p>\n{body}\n</body></html>\n")
+    os.replace(tmp, out_path)
+
+    # 현재 섹션만 캐시에 남김
+    new_cache = {s["id"]: {"hash": h, "html": fragments[s["id"]]} for s, h in zip(sections, hashes)}
+    tmp = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(new_cache, f)
+    os.replace(tmp, cache_path)
+    return len(sections), len(sections) - len(todo)
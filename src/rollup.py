@@ -0,0 +1,254 @@
+# src/rollup.py
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Callable, List
+
+import pandas as pd
+
+from .storage import load_logs, read_until, drop_before, log_lock, segments_dir, DEFAULT_LOG_PATH
+
+# 모든 측정 행에 있는 기본 지표 (다른 모듈은 여기서 가져다 씀)
+METRICS = ["ping_ms", "download_mbps", "upload_mbps"]
+# 버스트 핑(--ping-count > 1)일 때만 기록되는 회선 품질 지표
+QUALITY_METRICS = ["ping_min_ms", "ping_max_ms", "jitter_ms", "loss_pct"]
+HOUR = 3600
+
+
+def hourly_path(log_path: Path) -> Path:
+    """ 시간별 집계 저장소 경로 (예: data/logs_hourly.csv) """
+    return log_path.with_name(f"{log_path.stem}_hourly.csv")
+
+
+def hourly_stat(log_path: Path) -> List[int]:
+    """ 시간별 집계 저장소의 [크기, 수정 시각 ns] (없으면 [-1, -1]). 누적 집계가 입력이 바뀌었는지 확인할 때 사용 """
+    try:
+        st = hourly_path(log_path).stat()
+        return [st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [-1, -1]
+
+
+def weight_col(metric: str) -> str:
+    """ 결합 프레임에서 지표별 표본 수(가중치)를 담는 컬럼 이름 """
+    return f"{metric}_n"
+
+
+def aggregate_hourly(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    원시 행을 시간(정시) 단위로 묶어 지표별 count/mean/min/max/p05/p50/p95를 계산합니다.
+    결과는 hour_start(유닉스 시각) 하나의 행이 한 시간을 나타냅니다.
+    """
+    hour_start = (df["timestamp"].astype("int64") // HOUR) * HOUR
+    grouped = df.groupby(hour_start)
+    out = pd.DataFrame(index=grouped.size().index)
+    out.index.name = "hour_start"
+    for m in METRICS + QUALITY_METRICS:
+        if m not in df.columns:
+            continue
+        g = grouped[m]
+        out[f"{m}_count"] = g.count()
+        out[f"{m}_mean"] = g.mean()
+        out[f"{m}_min"] = g.min()
+        out[f"{m}_max"] = g.max()
+        q = g.quantile([0.05, 0.5, 0.95]).unstack()
+        out[f"{m}_p05"], out[f"{m}_p50"], out[f"{m}_p95"] = q[0.05], q[0.5], q[0.95]
+    return out.reset_index()
+
+
+def _merge_hourly(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    같은 시간대가 양쪽에 있으면 합칩니다 (늦게 들어온 행 등).
+    count/mean/min/max는 정확히 합치고, 백분위는 표본 수 가중 평균으로 근사합니다.
+    """
+    both = pd.concat([old, new], ignore_index=True)
+    if not both["hour_start"].duplicated().any():
+        return both.sort_values("hour_start").reset_index(drop=True)
+
+    def combine(g: pd.DataFrame) -> pd.Series:
+        row = {}
+        for m in METRICS + QUALITY_METRICS:
+            if f"{m}_count" not in g.columns:
+                continue
+            n = g[f"{m}_count"].fillna(0)
+            total = n.sum()
+            row[f"{m}_count"] = total
+            row[f"{m}_min"] = g[f"{m}_min"].min()
+            row[f"{m}_max"] = g[f"{m}_max"].max()
+            for stat in ("mean", "p05", "p50", "p95"):
+                col = g[f"{m}_{stat}"]
+                row[f"{m}_{stat}"] = (col * n).sum() / total if total else float("nan")
+        return pd.Series(row)
+
+    merged = both.groupby("hour_start").apply(combine, include_groups=False)
+    return merged.reset_index()
+
+
+def load_hourly(log_path: Path = DEFAULT_LOG_PATH, start: Optional[int] = None,
+                end: Optional[int] = None) -> Optional[pd.DataFrame]:
+    """ 시간별 집계 저장소를 불러옵니다. 없으면 None. """
+    path = hourly_path(log_path)
+    if not path.exists():
+        return None
+    df = pd.read_csv(path)
+    if start is not None:
+        df = df[df["hour_start"] + HOUR > start]
+    if end is not None:
+        df = df[df["hour_start"] < end]
+    return df
+
+
+def _journal_path(log_path: Path) -> Path:
+    """ 압축 진행 기록 (예: data/logs_hourly.pending.json). 있으면 직전 compact가 중간에 멈춘 것 """
+    return log_path.with_name(f"{log_path.stem}_hourly.pending.json")
+
+
+def _finish_compact(log_path: Path):
+    """
+    기록(journal)이 남아 있으면 멈춘 compact를 끝까지 다시 실행합니다.
+    집계 임시 파일이 남아 있으면 제자리로 옮기고, 기록된 cutoff 이전 원시 행을 삭제합니다 (여러 번 실행해도 결과 동일).
+    """
+    journal = _journal_path(log_path)
+    try:
+        cutoff = int(json.loads(journal.read_text(encoding="utf-8"))["cutoff"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return
+    path = hourly_path(log_path)
+    tmp = path.with_name(path.name + ".tmp")
+    if tmp.exists():
+        os.replace(tmp, path)
+    drop_before(log_path, cutoff)
+    journal.unlink()
+
+
+def compact(log_path: Path = DEFAULT_LOG_PATH, keep_days: float = 30,
+            now: Optional[float] = None) -> int:
+    """
+    keep_days보다 오래된 원시 행을 시간별 집계로 옮기고 원시 로그(세그먼트 포함)에서 삭제합니다.
+    기준 시각은 정시로 내림해 한 시간이 두 계층에 나뉘지 않게 합니다. 옮긴 행 수를 반환합니다.
+    읽기부터 삭제까지 log_lock 안에서 실행하므로 그 사이에 기록된 오래된 행(늦게 들어온 행)이 지워지지 않습니다.
+    새 집계를 임시 파일로 쓴 뒤 journal을 남기는 것이 확정 시점이며, 중간에 멈추면 다음 compact가
+    journal대로 마저 끝내므로 같은 행이 집계에 두 번 들어가지 않습니다.
+    """
+    now = now if now is not None else time.time()
+    cutoff = int(now - keep_days * 86400) // HOUR * HOUR
+    path = hourly_path(log_path)
+    tmp = path.with_name(path.name + ".tmp")
+    journal = _journal_path(log_path)
+    with log_lock(log_path):
+        _finish_compact(log_path)
+        tmp.unlink(missing_ok=True) # journal 없이 남은 임시 파일은 확정 전에 멈춘 것
+        old = load_logs(log_path=log_path, end=cutoff)
+        if old is None or old.empty:
+            return 0
+
+        agg = aggregate_hourly(old)
+        existing = load_hourly(log_path)
+        merged = agg if existing is None or existing.empty else _merge_hourly(existing, agg)
+        merged.to_csv(tmp, index=False)
+
+        # 확정: 이후 어디서 멈춰도 _finish_compact가 같은 결과로 마무리
+        journal_tmp = journal.with_name(journal.name + ".tmp")
+        journal_tmp.write_text(json.dumps({"cutoff": cutoff}), encoding="utf-8")
+        os.replace(journal_tmp, journal)
+        _finish_compact(log_path)
+    return int(len(old))
+
+
+def as_weighted(df: pd.DataFrame) -> pd.DataFrame:
+    """ 원시 행에 지표별 가중치 컬럼(값이 있으면 1, NaN이면 0)을 붙입니다. """
+    df = df.copy()
+    for m in METRICS + QUALITY_METRICS:
+        if m in df.columns:
+            df[weight_col(m)] = df[m].notna().astype("int64")
+    return df
+
+
+def hourly_as_rows(hourly: pd.DataFrame) -> pd.DataFrame:
+    """
+    시간별 집계를 원시 로그와 같은 모양(timestamp + 지표 평균)으로 바꾸고,
+    지표별 표본 수를 가중치 컬럼에, 최솟값/최댓값을 {지표}_min/_max 컬럼에 둡니다.
+    """
+    rows = pd.DataFrame({"timestamp": hourly["hour_start"].astype("int64")})
+    for m in METRICS + QUALITY_METRICS:
+        if f"{m}_mean" not in hourly.columns:
+            continue
+        rows[m] = hourly[f"{m}_mean"].to_numpy()
+        rows[weight_col(m)] = hourly[f"{m}_count"].fillna(0).astype("int64").to_numpy()
+        rows[f"{m}_min"] = hourly[f"{m}_min"].to_numpy()
+        rows[f"{m}_max"] = hourly[f"{m}_max"].to_numpy()
+    return rows
+
+
+def load_combined(log_path: Path = DEFAULT_LOG_PATH, start: Optional[int] = None,
+                  end: Optional[int] = None,
+                  progress: Optional[Callable[[float], None]] = None,
+                  stop_event: Optional[threading.Event] = None,
+                  cursor: Optional[dict] = None) -> Optional[pd.DataFrame]:
+    """
+    시간별 집계(오래된 구간)와 원시 로그(최근 구간)를 하나의 프레임으로 불러옵니다.
+    집계가 없으면 load_logs 결과를 그대로 반환합니다 (가중치 컬럼 없음).
+    집계 행은 지표별 가중치 컬럼({지표}_n)에 표본 수를 담고 있어, analyze_logs가
+    가중 평균으로 원시 행과 동일한 결과를 냅니다. 비용은 오래된 구간의 '시간 수'에 비례합니다.
+    cursor(storage.log_cursor)를 주면 원시 로그는 그 시점까지만 읽습니다 (누적 집계를 처음부터 만들 때).
+    """
+    def load_raw() -> Optional[pd.DataFrame]:
+        if cursor is None:
+            return load_logs(log_path=log_path, progress=progress, stop_event=stop_event,
+                             start=start, end=end)
+        df = read_until(log_path, cursor)
+        if df is not None and start is not None:
+            df = df[df["timestamp"] >= start]
+        if df is not None and end is not None:
+            df = df[df["timestamp"] < end]
+        return df
+
+    hourly = load_hourly(log_path, start, end)
+    if hourly is None or hourly.empty:
+        return load_raw()
+
+    frames: List[pd.DataFrame] = [hourly_as_rows(hourly)]
+    if log_path.exists() or segments_dir(log_path).exists():
+        raw = load_raw()
+        if stop_event is not None and stop_event.is_set():
+            return None
+        if raw is not None and not raw.empty:
+            frames.append(as_weighted(raw))
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def _is_weighted(df: pd.DataFrame) -> bool:
+    """ load_combined 결과처럼 지표별 가중치 컬럼({지표}_n)이 있는지 확인 """
+    return all(weight_col(m) in df.columns for m in METRICS if m in df.columns)
+
+
+def weighted_mean(df: pd.DataFrame, by: Optional[str] = None):
+    """
+    지표별 평균 (by가 있으면 그 컬럼별). 가중치 컬럼이 있으면(시간별 집계 행 포함) 표본 수 가중 평균을
+    계산해 원시 행만으로 계산한 평균과 같은 값을 냅니다.
+    """
+    cols = [m for m in METRICS + QUALITY_METRICS if m in df.columns]
+    if not _is_weighted(df):
+        return df[cols].mean() if by is None else df.groupby(by)[cols].mean()
+
+    sums, counts = {}, {}
+    for m in cols:
+        w = df[weight_col(m)].fillna(0)
+        weighted = df[m].fillna(0) * w
+        sums[m] = weighted.sum() if by is None else weighted.groupby(df[by]).sum()
+        counts[m] = w.sum() if by is None else w.groupby(df[by]).sum()
+    if by is None:
+        return pd.Series({m: sums[m] / counts[m] if counts[m] else float("nan") for m in cols})
+    return pd.DataFrame({m: sums[m] / counts[m].where(counts[m] > 0) for m in cols})
+
+
+def total_measurements(df: pd.DataFrame) -> int:
+    """ 측정 횟수. 집계 행은 지표별 표본 수 중 최댓값만큼 센다. """
+    if not _is_weighted(df):
+        return len(df)
+    weights = [df[weight_col(m)] for m in METRICS if m in df.columns]
+    return int(pd.concat(weights, axis=1).max(axis=1).sum())
@@ -0,0 +1,291 @@
+# src/sla.py
+from __future__ import annotations
+import datetime as dt
+import json
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional, Dict, TextIO, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import local_time_parts
+from .rollup import load_hourly, HOUR
+from .storage import load_logs, DEFAULT_LOG_PATH
+
+
+@dataclass(frozen=True)
+class Tier:
+    """
+    인터넷 상품 기준. 다운로드/업로드는 최저 속도(이 값 미만이면 위반), 핑은 상한(이 값 초과면 위반).
+    speed_range/ping_range는 기준표에 표시하는 일반적인 범위입니다.
+    """
+    name: str
+    download_mbps: float
+    upload_mbps: float
+    ping_ms: float
+    speed_range: str
+    ping_range: str
+
+
+# 일반적인 인터넷 상품별 속도 기준 (대칭형 기준)
+TIERS: Dict[str, Tier] = {
+    "100M": Tier("100M 광랜", 80, 80, 10, "80 - 100", "1 - 10"),
+    "500M": Tier("500M 기가라이트", 400, 400, 5, "400 - 500", "1 - 5"),
+    "1G": Tier("1G 기가", 850, 850, 5, "850 - 950", "1 - 5"),
+}
+
+# (지표, 위반 방향) - 속도는 기준 미만, 핑은 기준 초과가 위반
+CHECKS = [("download_mbps", "below"), ("upload_mbps", "below"), ("ping_ms", "above")]
+
+# 시간별 집계 행의 분포를 근사할 때 쓰는 (최솟값, p05, p50, p95, 최댓값)의 누적 비율
+_KNOT_PROBS = np.array([0.0, 0.05, 0.5, 0.95, 1.0])
+
+
+def print_tier_table(out: Optional[TextIO] = None):
+    """ 상품별 속도 기준표 (분석 리포트에 참고용으로 표시) """
+    print("\n[참고: 일반적인 인터넷 상품별 속도 기준 (대칭형 기준)]", file=out)
+    print("---------------------------------------------------------", file=out)
+    print("| 상품명       | 다운로드/업로드 (Mbps) | 핑 (ms)      |", file=out)
+    print("---------------------------------------------------------", file=out)
+    for key, tier in TIERS.items():
+        print(f"| {tier.name:<12} | {tier.speed_range:<20} | {tier.ping_range:<12} |  (--sla {key})", file=out)
+    print("---------------------------------------------------------", file=out)
+
+
+def fraction_below(knots: np.ndarray, x: float) -> np.ndarray:
+    """
+    시간별 집계 행마다 (최솟값, p05, p50, p95, 최댓값)을 구간 선형 분포로 보고 x 미만인 측정의 비율을 추정합니다.
+    knots: (행 수, 5) 배열. 값이 없는 행(NaN)은 0.
+    """
+    # 합쳐진 시간대의 백분위는 근사값이라 순서가 어긋날 수 있으므로 단조 증가로 맞춤
+    knots = np.fmax.accumulate(knots, axis=1)
+    below = np.where(x > knots[:, -1], 1.0, 0.0)
+    for k in range(len(_KNOT_PROBS) - 1):
+        lo, hi = knots[:, k], knots[:, k + 1]
+        width = hi - lo
+        inside = (x > lo) & (x <= hi)
+        step = np.divide(x - lo, width, out=np.ones_like(width), where=width > 0)
+        below = np.where(inside, _KNOT_PROBS[k] + step * (_KNOT_PROBS[k + 1] - _KNOT_PROBS[k]), below)
+    return below
+
+
+def _raw_buckets(raw: pd.DataFrame, tier: Tier) -> pd.DataFrame:
+    """ 원시 행을 시간(정시)별로 묶어 지표별 측정 수(_n), 합계(_sum), 위반 수(_bad)를 구합니다. """
+    hour_start = raw["timestamp"].to_numpy(dtype="int64") // HOUR * HOUR
+    cols = {}
+    for m, direction in CHECKS:
+        if m not in raw.columns:
+            continue
+        x = pd.to_numeric(raw[m], errors="coerce").to_numpy(dtype="float64")
+        valid = ~np.isnan(x)
+        bad = (x < getattr(tier, m)) if direction == "below" else (x > getattr(tier, m))
+        cols[f"{m}_n"] = valid.astype("float64")
+        cols[f"{m}_sum"] = np.where(valid, x, 0.0)
+        cols[f"{m}_bad"] = (bad & valid).astype("float64")
+    return pd.DataFrame(cols).groupby(hour_start).sum()
+
+
+def _rollup_buckets(hourly: pd.DataFrame, tier: Tier) -> pd.DataFrame:
+    """ 시간별 집계를 같은 모양으로 바꿉니다. 위반 수는 백분위로 추정한 값입니다 (fraction_below). """
+    cols = {}
+    for m, direction in CHECKS:
+        if f"{m}_count" not in hourly.columns:
+            continue
+        n = hourly[f"{m}_count"].fillna(0).to_numpy(dtype="float64")
+        knots = hourly[[f"{m}_{s}" for s in ("min", "p05", "p50", "p95", "max")]].to_numpy(dtype="float64")
+        below = fraction_below(knots, getattr(tier, m))
+        if direction == "above":
+            below = np.where(n > 0, 1.0 - below, 0.0)
+        cols[f"{m}_n"] = n
+        cols[f"{m}_sum"] = np.nan_to_num(hourly[f"{m}_mean"].to_numpy(dtype="float64")) * n
+        cols[f"{m}_bad"] = below * n
+    return pd.DataFrame(cols, index=hourly["hour_start"].to_numpy(dtype="int64"))
+
+
+def longest_run(hours: np.ndarray, bad: np.ndarray) -> Tuple[int, Optional[int], Optional[int]]:
+    """
+    위반 시간이 빈 시간 없이 연속된 최장 구간의 (시간 수, 시작, 끝) - 끝은 마지막 시간의 다음 정시.
+    hours는 정렬된 hour_start, bad는 같은 길이의 불리언 배열.
+    """
+    if not bad.any():
+        return 0, None, None
+    # 직전 시간이 위반이 아니거나 바로 이어지지 않으면 새 구간
+    starts = np.ones(len(hours), dtype=bool)
+    starts[1:] = (np.diff(hours) != HOUR) | ~bad[:-1]
+    run_id = np.cumsum(starts)
+    best = np.bincount(run_id[bad]).argmax()
+    pos = np.flatnonzero((run_id == best) & bad)
+    return len(pos), int(hours[pos[0]]), int(hours[pos[-1]]) + HOUR
+
+
+def _local_dates(hour_starts: np.ndarray) -> np.ndarray:
+    """ hour_start 배열을 로컬 날짜 문자열로 변환 (고유 값만 변환) """
+    unique, inverse = np.unique(hour_starts, return_inverse=True)
+    names = np.array([dt.datetime.fromtimestamp(int(h)).strftime("%Y-%m-%d") for h in unique])
+    return names[inverse]
+
+
+def _fmt_time(ts: Optional[int]) -> str:
+    return "" if ts is None else dt.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+
+
+@dataclass
+class SlaReport:
+    """
+    상품 기준 대비 준수 리포트 (compute_sla).
+    - summary: 지표별 기준값, 측정/시간 수, 기준 위반 비율, 최장 연속 위반 구간
+    - by_hour: 로컬 시각(0~23)별 위반 측정 비율 (%)
+    - worst_hours / worst_days: rank_metric 기준으로 가장 나빴던 시간 / 날짜
+    - meta: 상품, 구간, 시간별 집계 사용 여부 등
+    """
+    tier: Tier
+    summary: pd.DataFrame
+    by_hour: pd.DataFrame
+    worst_hours: pd.DataFrame
+    worst_days: pd.DataFrame
+    meta: Dict[str, object] = field(default_factory=dict)
+
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        return {"summary": self.summary, "by_hour": self.by_hour,
+                "worst_hours": self.worst_hours, "worst_days": self.worst_days}
+
+    def export(self, path: Path):
+        """ .json(표 이름 -> 레코드 목록 + meta) 또는 .csv(section 컬럼을 붙인 긴 형식)로 저장합니다. """
+        suffix = path.suffix.lower()
+        if suffix == ".json":
+            doc = {"tier": asdict(self.tier), "meta": self.meta}
+            for name, table in self.tables().items():
+                doc[name] = json.loads(table.reset_index().to_json(orient="records", force_ascii=False))
+            path.write_text(json.dumps(doc, ensure_ascii=False, indent=1), encoding="utf-8")
+        elif suffix == ".csv":
+            parts = []
+            for name, table in self.tables().items():
+                long = table.rename_axis("key").reset_index().astype({"key": str}).melt(
+                    id_vars="key", var_name="field", value_name="value")
+                long.insert(0, "section", name)
+                parts.append(long)
+            pd.concat(parts, ignore_index=True).to_csv(path, index=False)
+        else:
+            raise ValueError(f"지원하지 않는 형식입니다: {path.name} (.json, .csv)")
+
+    def render_text(self, out: Optional[TextIO] = None):
+        tier, meta = self.tier, self.meta
+        print(f"\n--- SLA Compliance Report: {tier.name} ---", file=out)
+        print(f"기준: 다운로드/업로드 {tier.download_mbps:g}/{tier.upload_mbps:g} Mbps 이상, "
+              f"핑 {tier.ping_ms:g} ms 이하", file=out)
+        print(f"구간: {meta['first']} ~ {meta['last']}", file=out)
+        if meta.get("rollup_hours"):
+            print(f"(시간별 집계 {meta['rollup_hours']}시간은 분위수로 위반 측정 수를 추정)", file=out)
+
+        print("\n[Summary]", file=out)
+        with pd.option_context("display.width", 160, "display.max_columns", 20):
+            print(self.summary.to_string(float_format=lambda v: f"{v:.1f}"), file=out)
+            print("\n[Measurements Violating by Local Hour (%)]", file=out)
+            print(self.by_hour.to_string(float_format=lambda v: f"{v:.1f}"), file=out)
+            print(f"\n[Worst Hours ({meta['rank_metric']})]", file=out)
+            print(self.worst_hours.to_string(float_format=lambda v: f"{v:.1f}"), file=out)
+            print(f"\n[Worst Days ({meta['rank_metric']})]", file=out)
+            print(self.worst_days.to_string(float_format=lambda v: f"{v:.1f}"), file=out)
+        print("\n--- End of Report ---", file=out)
+
+
+def compute_sla(tier: Tier, raw: Optional[pd.DataFrame] = None, hourly: Optional[pd.DataFrame] = None,
+                rank_metric: str = "download_mbps", top: int = 5) -> Optional[SlaReport]:
+    """
+    원시 행(raw)과 시간별 집계(hourly, rollup.compact 결과)를 함께 받아 기준 준수 리포트를 계산합니다.
+    두 입력을 시간(정시) 버킷 하나의 표로 합친 뒤 모든 통계를 그 표에서 벡터 연산으로 구하므로,
+    비용은 원시 행 수 + 전체 시간 수에 비례합니다.
+    - 측정 위반 비율: 기준을 벗어난 측정 수 / 측정 수
+    - 시간 위반 비율: 시간 평균이 기준을 벗어난 시간 수 / 측정이 있는 시간 수
+    - 최장 연속 위반: 시간 평균이 위반인 시간이 빈틈없이 이어진 최장 구간
+    """
+    frames = []
+    if raw is not None and not raw.empty:
+        frames.append(_raw_buckets(raw, tier))
+    if hourly is not None and not hourly.empty:
+        frames.append(_rollup_buckets(hourly, tier))
+    if not frames:
+        return None
+    buckets = pd.concat(frames).groupby(level=0).sum().sort_index() # 같은 시간이 양쪽에 있으면 합침
+    hours = buckets.index.to_numpy(dtype="int64")
+
+    summary_rows, by_hour, means, bads = {}, {}, {}, {}
+    local_hour, _ = local_time_parts(hours)
+    for m, direction in CHECKS:
+        if f"{m}_n" not in buckets.columns:
+            continue
+        n = buckets[f"{m}_n"].to_numpy()
+        bad = buckets[f"{m}_bad"].to_numpy()
+        has = n > 0
+        mean = np.divide(buckets[f"{m}_sum"].to_numpy(), n, out=np.full(len(n), np.nan), where=has)
+        limit = getattr(tier, m)
+        bad_hour = has & ((mean < limit) if direction == "below" else (mean > limit))
+        streak, s_start, s_end = longest_run(hours[has], bad_hour[has])
+        total = n.sum()
+        summary_rows[m] = {
+            "limit": limit,
+            "rule": "min" if direction == "below" else "max",
+            "measurements": int(round(total)),
+            "violating_pct": bad.sum() / total * 100 if total else np.nan,
+            "hours": int(has.sum()),
+            "violating_hours_pct": bad_hour.sum() / has.sum() * 100 if has.any() else np.nan,
+            "longest_streak_h": streak,
+            "streak_start": _fmt_time(s_start),
+            "streak_end": _fmt_time(s_end),
+        }
+        by_hour[m] = (pd.Series(bad).groupby(local_hour).sum()
+                      / pd.Series(n).groupby(local_hour).sum().replace(0, np.nan) * 100)
+        means[m], bads[m] = mean, (n, bad)
+
+    if not summary_rows:
+        return None
+    summary = pd.DataFrame.from_dict(summary_rows, orient="index")
+    summary.index.name = "metric"
+    by_hour_df = pd.DataFrame(by_hour).reindex(range(24))
+    by_hour_df.index.name = "hour"
+
+    if rank_metric not in means:
+        rank_metric = next(iter(means))
+    n, bad = bads[rank_metric]
+    mean = means[rank_metric]
+    ascending = dict(CHECKS)[rank_metric] == "below" # 속도는 낮을수록, 핑은 높을수록 나쁨
+    hour_table = pd.DataFrame({
+        "hour": [_fmt_time(int(h)) for h in hours],
+        "measurements": n.round().astype("int64"),
+        "mean": mean,
+        "violating_pct": np.divide(bad, n, out=np.full(len(n), np.nan), where=n > 0) * 100,
+    })
+    worst_hours = (hour_table[n > 0].sort_values("mean", ascending=ascending).head(top)
+                   .set_index("hour"))
+
+    day = pd.DataFrame({"n": n, "sum": buckets[f"{rank_metric}_sum"].to_numpy(), "bad": bad}) \
+        .groupby(_local_dates(hours)).sum()
+    day = day[day["n"] > 0]
+    worst_days = pd.DataFrame({
+        "measurements": day["n"].round().astype("int64"),
+        "mean": day["sum"] / day["n"],
+        "violating_pct": day["bad"] / day["n"] * 100,
+    }).sort_values(["violating_pct", "mean"], ascending=[False, ascending]).head(top)
+    worst_days.index.name = "day"
+
+    meta = {
+        "rank_metric": rank_metric,
+        "first": _fmt_time(int(hours[0])),
+        "last": _fmt_time(int(hours[-1]) + HOUR),
+        "rollup_hours": 0 if hourly is None else int(len(hourly)),
+        "generated_at": dt.datetime.now().isoformat(timespec="seconds"),
+    }
+    return SlaReport(tier, summary, by_hour_df, worst_hours, worst_days, meta)
+
+
+def sla_report(log_path: Path = DEFAULT_LOG_PATH, tier: Tier = TIERS["100M"],
+               start: Optional[int] = None, end: Optional[int] = None,
+               rank_metric: str = "download_mbps") -> Optional[SlaReport]:
+    """
+    로그에서 기준 준수 리포트를 만듭니다. 시간별 집계(logs_hourly.csv)가 있으면 오래된 구간은
+    원시 행 대신 집계를 읽으므로 여러 해 분량도 한 번에 처리합니다 (compact로 옮긴 행은 원시 로그에 없음).
+    """
+    hourly = load_hourly(log_path, start, end)
+    raw = load_logs(log_path=log_path, start=start, end=end)
+    return compute_sla(tier, raw, hourly, rank_metric=rank_metric)
@@ -1,10 +1,33 @@
 # src/storage.py
 from __future__ import annotations
 from pathlib import Path, PurePath
-from typing import Optional, Dict
+from typing import Optional, Dict, Callable, Tuple, List, TextIO
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+import multiprocessing
+import tempfile
+import threading
+import numpy as np
 import pandas as pd
 import sys
 import csv
+import io
+import os
+import gzip
+import json
+import time
+
+try:
+    import zstandard  # 선택 의존성: zstd 압축 세그먼트
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl  # POSIX 권고 잠금
+except ImportError:
+    fcntl = None
+    import msvcrt  # Windows
 
 if getattr(sys, 'frozen', False):
     ROOT = Path(sys.executable).parent
@@ -15,36 +38,865 @@ DATA_DIR = ROOT / "data"
 # 기본 로그 경로를 상수로 정의
 DEFAULT_LOG_PATH = DATA_DIR / "logs.csv"
 
-def append_row(row: Dict, log_path: Path = DEFAULT_LOG_PATH):
+@dataclass
+class RotationPolicy:
+    """
+    로그 회전 정책. 활성 CSV가 max_bytes를 넘거나 첫 행이 max_age_s보다 오래되면
+    압축 세그먼트(codec: 'gzip' 또는 'zstd')로 옮기고 새 파일에 기록합니다.
+    """
+    max_bytes: Optional[int] = None
+    max_age_s: Optional[int] = None
+    codec: str = "gzip"
+
+
+# --- 여러 프로세스의 기록 직렬화 ---
+# GUI와 cron으로 실행한 CLI가 같은 로그에 쓸 수 있으므로, 로그를 바꾸는 작업(행 추가, 헤더 확장,
+# 회전, 오래된 행 삭제)은 옆의 잠금 파일에 권고 잠금을 잡고 실행합니다. 로그 자체는 교체/삭제되므로
+# 잠금은 항상 그대로 남는 별도 파일에 겁니다. 같은 프로세스 안에서는 재진입할 수 있습니다.
+_held: Dict[str, list] = {} # 경로 -> [RLock, 깊이, 잠금 파일]
+_held_guard = threading.Lock()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_held.clear) # 자식 프로세스는 부모의 잠금을 갖지 않음
+
+
+def table_path(log_path: Path, table: str) -> Path:
+    """ 프로브 결과를 기록하는 보조 테이블 경로 (예: table='hops' -> data/logs_hops.csv) """
+    return log_path.with_name(f"{log_path.stem}_{table}.csv")
+
+
+def lock_path(log_path: Path) -> Path:
+    """ 기록 잠금 파일 경로 (예: data/logs.lock) """
+    return log_path.with_name(f"{log_path.stem}.lock")
+
+
+def _lock_file(f, blocking: bool = True):
+    """ 잠금 파일 f에 배타적 잠금을 겁니다. blocking=False면 이미 잠겨 있을 때 BlockingIOError. """
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            if not blocking:
+                raise BlockingIOError("잠금을 다른 프로세스가 사용 중입니다.")
+            # LK_LOCK은 약 10초 재시도 후 실패하므로 다시 기다림
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def log_lock(log_path: Path, blocking: bool = True):
+    """
+    log_path에 대한 배타적 기록 잠금 (여러 프로세스/스레드 사이). 잠금을 잡을 때까지 기다립니다.
+    blocking=False면 기다리지 않고, 다른 프로세스나 스레드가 잡고 있으면 BlockingIOError를 발생시킵니다.
+    다른 프로그램이 잠금 없이 쓰는 것까지 막지는 않는 권고 잠금입니다.
+    """
+    key = str(log_path.resolve())
+    with _held_guard:
+        entry = _held.setdefault(key, [threading.RLock(), 0, None])
+    if not entry[0].acquire(blocking):
+        raise BlockingIOError("잠금을 다른 스레드가 사용 중입니다.")
+    try:
+        if entry[1] == 0:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            f = open(lock_path(log_path), "a+b")
+            try:
+                _lock_file(f, blocking)
+            except BaseException:
+                f.close()
+                raise
+            entry[2] = f
+        entry[1] += 1
+        try:
+            yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                f, entry[2] = entry[2], None
+                try:
+                    _unlock_file(f)
+                finally:
+                    f.close()
+    finally:
+        entry[0].release()
+
+
+def append_row(row: Dict, log_path: Path = DEFAULT_LOG_PATH,
+               rotation: Optional[RotationPolicy] = None):
     """
     지정된 log_path에 한 행을 추가합니다.
+    rotation 지정 시 기록 전에 회전 조건을 확인합니다.
+    헤더 확인부터 기록까지 log_lock 안에서 실행하고, 행은 한 번의 write로 추가하므로
+    여러 프로세스가 동시에 써도 줄이 섞이거나 헤더가 두 번 기록되지 않습니다.
     """
-    # DATA_DIR 대신 log_path.parent를 기준으로 디렉토리 생성
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    file_exists = log_path.exists()
-    
-    with open(log_path, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=row.keys())
-        if not file_exists:
-            writer.writeheader() # 파일이 없으면 헤더 작성
+    with log_lock(log_path):
+        if rotation is not None and log_path.exists():
+            rotate_log(log_path, rotation)
+
+        # DATA_DIR 대신 log_path.parent를 기준으로 디렉토리 생성
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        header = read_header(log_path)
+
+        fieldnames = list(row.keys())
+        if header:
+            # 기존 컬럼 순서를 유지하고, 새 컬럼이 생기면 헤더를 확장
+            new_cols = [k for k in fieldnames if k not in header]
+            if new_cols:
+                _extend_header(log_path, header + new_cols)
+            fieldnames = header + new_cols
+
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=fieldnames, restval="")
+        if not header:
+            writer.writeheader() # 파일이 없거나 비어 있으면 헤더 작성
         writer.writerow(row)
+        data = buf.getvalue().encode("utf-8")
+
+        with open(log_path, mode="a+b", buffering=0) as f:
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data # 중단된 쓰기가 남긴 찢어진 줄을 닫아 새 행과 섞이지 않게 함
+            f.write(data)
 
 
-def load_logs(log_path: Path = DEFAULT_LOG_PATH) -> Optional[pd.DataFrame]:
+def read_header(log_path: Path) -> Optional[List[str]]:
+    """ CSV 헤더(컬럼 목록)를 반환합니다. 파일이 없거나 비어 있으면 None. """
+    try:
+        with open(log_path, mode="r", newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), None) or None
+    except OSError:
+        return None
+
+
+def _extend_header(log_path: Path, columns: List[str]):
     """
-    지정된 log_path에서 로그를 불러옵니다.
+    새 컬럼(예: 버스트 핑의 jitter_ms)이 추가되면 기존 행은 빈 값으로 두고 헤더를 확장해
+    파일 전체를 다시 씁니다. 스키마가 바뀔 때 한 번만 일어납니다.
     """
-    if not log_path.exists():
+    df = read_csv_file(log_path)
+    df = df.reindex(columns=columns)
+    tmp = log_path.with_name(log_path.name + ".tmp")
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, log_path)
+
+
+# --- 찢어진 줄 건너뛰기 ---
+def drop_torn_lines(header: bytes, body: bytes) -> Tuple[bytes, int]:
+    """
+    CSV 본문(헤더 제외)에서 찢어진 줄을 걸러냅니다. 반환: (정상 줄만 남은 본문, 건너뛴 줄 수)
+    - 필드 수가 헤더와 다른 줄 (기록 도중 끊긴 줄, 두 줄이 한 줄로 붙은 줄)
+    - 개행으로 끝나지 않은 마지막 줄 (중단되었거나 진행 중인 쓰기)
+    - 본문 중간에 다시 나온 헤더 줄
+    쉼표/개행 위치를 NumPy로 세므로 정상 파일에서는 복사 없이 거의 그대로 반환합니다.
+    """
+    if not body:
+        return body, 0
+    hdr = header.rstrip(b"\r\n")
+    fields = next(csv.reader([hdr.decode("utf-8")]), [])
+    if b'"' in body or b'"' in hdr:
+        return _drop_torn_quoted(hdr, len(fields), body)
+
+    buf = np.frombuffer(body, dtype=np.uint8)
+    ends = np.flatnonzero(buf == 0x0A)
+    tail = len(body) - (int(ends[-1]) + 1 if len(ends) else 0)
+    starts = np.concatenate(([0], ends[:-1] + 1)).astype(np.int64)
+    commas = np.searchsorted(np.flatnonzero(buf == 0x2C), ends)
+    per_line = np.diff(commas, prepend=0)
+    length = ends - starts
+    if len(ends):
+        length = length - ((length > 0) & (buf[np.maximum(ends - 1, 0)] == 0x0D))
+    bad = (per_line != len(fields) - 1) & (length > 0) # 빈 줄은 pandas가 건너뜀
+    for k in np.flatnonzero(~bad & (length == len(hdr))):
+        if body[starts[k]:starts[k] + len(hdr)] == hdr:
+            bad[k] = True
+    skipped = int(bad.sum()) + (1 if body[len(body) - tail:].strip() else 0)
+    if not skipped:
+        return body, 0
+    # 연속된 정상 줄은 한 번에 복사
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], (~bad).astype(np.int8), [0])))).reshape(-1, 2)
+    return b"".join(body[starts[a]:ends[b - 1] + 1] for a, b in edges), skipped
+
+
+def _drop_torn_quoted(hdr: bytes, n_fields: int, body: bytes) -> Tuple[bytes, int]:
+    """ 따옴표로 감싼 필드가 있는 본문 (프로브 오류 메시지 등): 줄마다 csv 모듈로 확인 """
+    kept, skipped = [], 0
+    for line in body.splitlines(keepends=True):
+        content = line.rstrip(b"\r\n")
+        if not content.strip():
+            continue
+        try:
+            ok = line.endswith(b"\n") and content != hdr \
+                and len(next(csv.reader([content.decode("utf-8")]))) == n_fields
+        except (UnicodeDecodeError, csv.Error):
+            ok = False
+        if ok:
+            kept.append(line)
+        else:
+            skipped += 1
+    return b"".join(kept), skipped
+
+
+def read_csv_bytes(header: bytes, body: bytes, source: str = "",
+                   skip_torn: bool = True, **kwargs) -> pd.DataFrame:
+    """
+    헤더 줄과 본문 바이트를 DataFrame으로 읽습니다.
+    skip_torn이면 찢어진 줄(drop_torn_lines)을 건너뛰고 몇 줄을 건너뛰었는지 알립니다.
+    """
+    if skip_torn:
+        body, skipped = drop_torn_lines(header, body)
+        if skipped:
+            print(f"[경고] {source or 'CSV'}: 손상된 줄 {skipped}개를 건너뛰었습니다.")
+    if not header.endswith(b"\n"):
+        header += b"\n"
+    return pd.read_csv(io.BytesIO(header + body), **kwargs)
+
+
+def read_csv_file(path: Path, skip_torn: bool = True, **kwargs) -> pd.DataFrame:
+    """ CSV 파일 전체를 읽습니다 (skip_torn이면 찢어진 줄을 건너뜀). """
+    if not skip_torn:
+        return pd.read_csv(path, **kwargs)
+    with open(path, "rb") as f:
+        header = f.readline()
+        body = f.read()
+    return read_csv_bytes(header, body, path.name, **kwargs)
+
+
+def log_fingerprint(log_path: Path = DEFAULT_LOG_PATH) -> Optional[tuple]:
+    """
+    로그의 지문(절대 경로, 크기, 수정 시각 ns, 세그먼트 manifest의 크기/수정 시각)을 반환합니다.
+    파일 내용이 바뀌지 않았는지 확인하는 캐시 키로 사용합니다. 로그가 없으면 None.
+    """
+    stats = []
+    for path in (log_path, manifest_path(log_path)):
+        try:
+            st = path.stat()
+            stats += [st.st_size, st.st_mtime_ns]
+        except OSError:
+            stats += [-1, -1]
+    if stats[0] < 0 and stats[2] < 0:
+        return None
+    return (str(log_path.resolve()), *stats)
+
+
+def load_logs(log_path: Path = DEFAULT_LOG_PATH,
+              progress: Optional[Callable[[float], None]] = None,
+              stop_event: Optional[threading.Event] = None,
+              chunksize: int = 100_000,
+              start: Optional[int] = None,
+              end: Optional[int] = None,
+              skip_torn: bool = True) -> Optional[pd.DataFrame]:
+    """
+    지정된 log_path에서 로그를 불러옵니다. 회전된 압축 세그먼트도 함께 읽습니다.
+    - start/end(유닉스 시각) 지정 시 start <= timestamp < end 행만 반환하며,
+      manifest의 시간 범위로 필요 없는 세그먼트는 열지 않음
+    - 필요한 세그먼트는 스레드 풀에서 병렬로 압축 해제
+    - progress 지정 시 chunksize 행 단위로 읽으면서 진행률(0.0~1.0)을 전달
+    - stop_event가 설정되면 읽기를 중단하고 None 반환
+    - skip_torn이면 활성 CSV의 찢어진 줄(중단된 쓰기, 잠금 없이 동시에 쓴 줄)을 건너뜀.
+      False면 그대로 파싱해 오류를 드러냄
+    """
+    segments = select_segments(log_path, start, end)
+    if not log_path.exists() and not segments:
         # 로그 파일이 없을 때 사용자에게 명확히 알려줌
         print(f"로그 파일을 찾을 수 없습니다: {log_path}")
         return None
     
     try:
-        return pd.read_csv(log_path)
+        frames = []
+        seg_bytes = sum(seg["bytes"] for seg in segments)
+        active_bytes = log_path.stat().st_size if log_path.exists() else 0
+        total = max(seg_bytes + active_bytes, 1)
+
+        if segments:
+            frames.extend(_read_segments(log_path, segments, stop_event,
+                                         None if progress is None else
+                                         lambda done: progress(done / total)))
+            if stop_event is not None and stop_event.is_set():
+                return None
+
+        if active_bytes:
+            if (start is not None or end is not None) and progress is None and stop_event is None:
+                # 희소 인덱스로 구간과 겹치는 블록만 읽음
+                frames.append(_read_active_range(log_path, start, end, skip_torn))
+            elif progress is None and stop_event is None:
+                frames.append(read_csv_file(log_path, skip_torn))
+            else:
+                active_progress = None if progress is None else \
+                    lambda f: progress((seg_bytes + f * active_bytes) / total)
+                df = _load_chunked(log_path, active_progress, stop_event, chunksize, skip_torn)
+                if df is None:
+                    return None
+                frames.append(df)
+
+        nonempty = [f for f in frames if not f.empty]
+        if not nonempty and (start is not None or end is not None) \
+                and frames and len(frames[0].columns):
+            return frames[0] # 구간에 해당하는 행 없음 (빈 프레임)
+        frames = nonempty
+        if not frames:
+            raise pd.errors.EmptyDataError("No columns to parse from file")
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        if start is not None:
+            df = df[df["timestamp"] >= start]
+        if end is not None:
+            df = df[df["timestamp"] < end]
+        return df.reset_index(drop=True) if (start is not None or end is not None) else df
     except pd.errors.EmptyDataError:
         # 파일은 있지만 비어있을 경우
         print(f"로그 파일이 비어있습니다: {log_path}")
         return None
     except Exception as e:
         print(f"로그 파일 로드 중 오류 발생: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+# --- 활성 CSV 희소 인덱스 ---
+# 블록(약 INDEX_BLOCK_BYTES)마다 (시작 오프셋, 끝 오프셋, 최소/최대 timestamp)를 기록해
+# 시간 구간 조회 시 겹치는 블록만 읽습니다. 행이 시간순이 아니어도 결과는 정확합니다.
+INDEX_BLOCK_BYTES = 256 * 1024
+
+
+def index_path(log_path: Path) -> Path:
+    """ 활성 CSV의 희소 인덱스 경로 (예: data/logs_index.json) """
+    return log_path.with_name(f"{log_path.stem}_index.json")
+
+
+def _timestamp_of(line: bytes, col: int) -> Optional[int]:
+    try:
+        if col == 0:
+            return int(float(line.split(b",", 1)[0]))
+        return int(float(next(csv.reader([line.decode("utf-8")]))[col]))
+    except (ValueError, IndexError, StopIteration):
+        return None
+
+
+def update_index(log_path: Path, block_bytes: int = INDEX_BLOCK_BYTES) -> Optional[dict]:
+    """
+    희소 인덱스를 최신 상태로 만듭니다. 이전 인덱스 이후에 추가된 바이트만 읽으며,
+    헤더나 첫 행이 바뀌었으면(회전, 헤더 확장, 오래된 행 삭제) 처음부터 다시 만듭니다.
+    반환: {"header", "first", "bytes"(인덱스된 끝), "blocks": [[시작, 끝, 최소, 최대], ...]}
+    """
+    if not log_path.exists():
+        return None
+    with open(log_path, "rb") as f:
+        header = f.readline()
+        body_start = f.tell()
+        first = f.readline()
+        cols = next(csv.reader([header.decode("utf-8")]), [])
+        if "timestamp" not in cols:
+            return None
+        col = cols.index("timestamp")
+
+        path = index_path(log_path)
+        index = None
+        try:
+            with open(path, encoding="utf-8") as idx:
+                index = json.load(idx)
+        except (OSError, ValueError):
+            pass
+        size = os.fstat(f.fileno()).st_size
+        if not index or index.get("header") != header.decode("utf-8") \
+                or index.get("first") != first.decode("utf-8") or index.get("bytes", 0) > size:
+            index = {"header": header.decode("utf-8"), "first": first.decode("utf-8"),
+                     "bytes": body_start, "blocks": []}
+        if size - index["bytes"] < block_bytes:
+            return index # 새 블록을 만들 만큼 늘지 않음
+
+        f.seek(index["bytes"])
+        pos = block_start = index["bytes"]
+        lo = hi = None
+        for line in f:
+            if not line.endswith(b"\n"):
+                break # 기록 중인 마지막 줄
+            pos += len(line)
+            ts = _timestamp_of(line, col)
+            if ts is not None:
+                lo = ts if lo is None else min(lo, ts)
+                hi = ts if hi is None else max(hi, ts)
+            if pos - block_start >= block_bytes:
+                index["blocks"].append([block_start, pos, lo, hi])
+                block_start, lo, hi = pos, None, None
+        index["bytes"] = block_start
+
+    # 여러 프로세스가 동시에 다시 만들 수 있으므로(조회는 잠금 없이 실행) 프로세스마다 다른 임시 파일에 쓰고,
+    # 교체에 실패하면 이번에는 저장하지 않음 (방금 만든 인덱스로 조회는 그대로 진행)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as idx:
+            json.dump(index, idx)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+    return index
+
+
+def _read_active_range(log_path: Path, start: Optional[int], end: Optional[int],
+                       skip_torn: bool = True) -> pd.DataFrame:
+    """ 희소 인덱스로 [start, end)와 겹치는 블록과 인덱스되지 않은 끝부분만 읽습니다. """
+    index = update_index(log_path)
+    if index is None:
+        return read_csv_file(log_path, skip_torn)
+
+    size = log_path.stat().st_size
+    runs: List[List[int]] = []
+    for lo_off, hi_off, lo, hi in index["blocks"]:
+        if lo is None or (start is not None and hi < start) or (end is not None and lo >= end):
+            continue
+        if runs and runs[-1][1] == lo_off:
+            runs[-1][1] = hi_off # 이어지는 블록은 한 번에 읽음
+        else:
+            runs.append([lo_off, hi_off])
+    if index["bytes"] < size:
+        if runs and runs[-1][1] == index["bytes"]:
+            runs[-1][1] = size
+        else:
+            runs.append([index["bytes"], size])
+
+    header = index["header"].encode("utf-8")
+    with open(log_path, "rb") as f:
+        parts = []
+        for lo_off, hi_off in runs:
+            f.seek(lo_off)
+            parts.append(f.read(hi_off - lo_off))
+    return read_csv_bytes(header, b"".join(parts), log_path.name, skip_torn)
+
+
+def _load_chunked(log_path: Path,
+                  progress: Optional[Callable[[float], None]],
+                  stop_event: Optional[threading.Event],
+                  chunksize: int, skip_torn: bool = True) -> Optional[pd.DataFrame]:
+    """
+    CSV를 청크 단위로 읽어 진행률 보고와 중단을 지원합니다.
+    진행률은 파일 내 읽은 바이트 위치 기준의 근사값입니다.
+    skip_torn이면 찢어진 줄을 먼저 걸러낸 본문을 청크 단위로 파싱합니다.
+    """
+    if skip_torn:
+        with open(log_path, "rb") as raw:
+            header = raw.readline()
+            body, skipped = drop_torn_lines(header, raw.read())
+        if skipped:
+            print(f"[경고] {log_path.name}: 손상된 줄 {skipped}개를 건너뛰었습니다.")
+        source = io.BytesIO(header + body)
+    else:
+        source = open(log_path, mode="rb")
+    total = max(len(source.getvalue()) if skip_torn else log_path.stat().st_size, 1)
+    chunks = []
+    with source as f:
+        for chunk in pd.read_csv(f, chunksize=chunksize):
+            if stop_event is not None and stop_event.is_set():
+                return None
+            chunks.append(chunk)
+            if progress is not None:
+                progress(min(f.tell() / total, 1.0))
+    if not chunks:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    if progress is not None:
+        progress(1.0)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def load_tail(log_path: Path = DEFAULT_LOG_PATH, n_rows: int = 100,
+              block_size: int = 64 * 1024) -> Optional[pd.DataFrame]:
+    """
+    로그 파일의 마지막 n_rows 행만 불러옵니다 (파일 끝에서부터 블록 단위로 읽음).
+    긴 로그에서 최근 기준값만 필요할 때 전체를 읽지 않기 위해 사용합니다.
+    (회전 직후라 활성 파일이 없으면 가장 최근 세그먼트에서 읽음)
+    """
+    if not log_path.exists() or log_path.stat().st_size == 0:
+        segments = read_manifest(log_path)
+        if not segments:
+            return None
+        return _read_segment(log_path, segments[-1]).tail(n_rows).reset_index(drop=True)
+
+    with open(log_path, mode="rb") as f:
+        header = f.readline()
+        header_end = f.tell()
+        f.seek(0, 2)
+        pos = f.tell()
+        data = b""
+        # 헤더 이후 구간에서 개행이 n_rows + 1개 이상 모일 때까지 뒤에서부터 읽음
+        while pos > header_end and data.count(b"\n") <= n_rows:
+            step = min(block_size, pos - header_end)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+
+    if pos > header_end:
+        data = data[data.find(b"\n") + 1:] # 블록 경계에서 잘린 첫 줄 제외
+    lines = [l for l in data.splitlines(keepends=True) if l.strip()][-n_rows:]
+    if not header.strip():
+        return None
+    try:
+        # 개행 없는 마지막 줄 등 찢어진 줄은 read_csv_bytes가 건너뜀
+        return read_csv_bytes(header, b"".join(lines), log_path.name)
+    except pd.errors.EmptyDataError:
+        return None
+
+
+# --- 로그 회전 / 압축 세그먼트 ---
+def segments_dir(log_path: Path) -> Path:
+    """ 회전된 세그먼트 폴더 (예: data/logs_segments/) """
+    return log_path.with_name(f"{log_path.stem}_segments")
+
+
+def manifest_path(log_path: Path) -> Path:
+    return segments_dir(log_path) / "manifest.json"
+
+
+def read_manifest(log_path: Path) -> List[dict]:
+    """
+    세그먼트 목록을 시간순으로 반환합니다.
+    각 항목: {"file", "start", "end", "rows", "bytes", "codec"} (start/end는 포함 범위의 유닉스 시각)
+    """
+    try:
+        with open(manifest_path(log_path), encoding="utf-8") as f:
+            return json.load(f)["segments"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def _write_manifest(log_path: Path, segments: List[dict]):
+    path = manifest_path(log_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"segments": sorted(segments, key=lambda s: s["start"])}, f, indent=1)
+    os.replace(tmp, path)
+
+
+def select_segments(log_path: Path, start: Optional[int] = None,
+                    end: Optional[int] = None) -> List[dict]:
+    """ [start, end) 구간과 겹치는 세그먼트만 manifest에서 골라냅니다. """
+    return [
+        seg for seg in read_manifest(log_path)
+        if (start is None or seg["end"] >= start) and (end is None or seg["start"] < end)
+    ]
+
+
+def _open_compressed(path: Path, codec: str, mode: str):
+    if codec == "gzip":
+        return gzip.open(path, mode)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd 세그먼트를 다루려면 'zstandard' 패키지가 필요합니다.")
+        if "r" in mode:
+            return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return zstandard.ZstdCompressor(level=10).stream_writer(open(path, "wb"), closefd=True)
+    raise ValueError(f"지원하지 않는 압축 형식입니다: {codec}")
+
+
+def _read_segment(log_path: Path, seg: dict) -> pd.DataFrame:
+    with _open_compressed(segments_dir(log_path) / seg["file"], seg["codec"], "rb") as f:
+        return pd.read_csv(f)
+
+
+def _read_segments(log_path: Path, segments: List[dict],
+                   stop_event: Optional[threading.Event] = None,
+                   progress_bytes: Optional[Callable[[int], None]] = None,
+                   max_workers: Optional[int] = None) -> List[pd.DataFrame]:
+    """
+    세그먼트들을 스레드 풀에서 병렬로 압축 해제 및 파싱합니다 (zlib/zstd와 pandas 파서는 GIL을 놓음).
+    결과는 시간순으로 반환합니다.
+    """
+    if len(segments) == 1:
+        frames = [_read_segment(log_path, segments[0])]
+        if progress_bytes is not None:
+            progress_bytes(segments[0]["bytes"])
+        return frames
+
+    workers = max_workers or min(len(segments), os.cpu_count() or 1)
+    frames: List[Optional[pd.DataFrame]] = [None] * len(segments)
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_read_segment, log_path, seg): i for i, seg in enumerate(segments)}
+        for future in futures:
+            if stop_event is not None and stop_event.is_set():
+                for f in futures:
+                    f.cancel()
+                return []
+            i = futures[future]
+            frames[i] = future.result()
+            done += segments[i]["bytes"]
+            if progress_bytes is not None:
+                progress_bytes(done)
+    return frames
+
+
+def _first_timestamp(log_path: Path) -> Optional[int]:
+    """ 활성 CSV의 첫 데이터 행 타임스탬프 (헤더 다음 줄만 읽음) """
+    with open(log_path, mode="r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        first = next(reader, None)
+    if not header or not first or "timestamp" not in header:
+        return None
+    try:
+        return int(float(first[header.index("timestamp")]))
+    except (ValueError, IndexError):
+        return None
+
+
+def needs_rotation(log_path: Path, policy: RotationPolicy, now: Optional[float] = None) -> bool:
+    try:
+        size = log_path.stat().st_size
+    except OSError:
+        return False
+    if policy.max_bytes is not None and size >= policy.max_bytes:
+        return True
+    if policy.max_age_s is not None:
+        first = _first_timestamp(log_path)
+        now = now if now is not None else time.time()
+        if first is not None and now - first >= policy.max_age_s:
+            return True
+    return False
+
+
+def rotate_log(log_path: Path = DEFAULT_LOG_PATH, policy: Optional[RotationPolicy] = None,
+               force: bool = False) -> Optional[dict]:
+    """
+    회전 조건을 만족하면(force=True면 항상) 활성 CSV를 압축 세그먼트로 옮기고
+    manifest에 시간 범위를 기록합니다. 새로 만든 세그먼트 항목을 반환합니다 (회전 안 했으면 None).
+    """
+    policy = policy or RotationPolicy()
+    with log_lock(log_path):
+        return _rotate_locked(log_path, policy, force)
+
+
+def _rotate_locked(log_path: Path, policy: RotationPolicy, force: bool) -> Optional[dict]:
+    if not log_path.exists() or (not force and not needs_rotation(log_path, policy)):
+        return None
+
+    with open(log_path, "rb") as f:
+        header = f.readline()
+        body, skipped = drop_torn_lines(header, f.read()) # 세그먼트에는 정상 줄만 보관
+    if skipped:
+        print(f"[경고] {log_path.name}: 손상된 줄 {skipped}개를 빼고 회전합니다.")
+    df = read_csv_bytes(header, body, skip_torn=False, usecols=["timestamp"])
+    if df.empty:
+        return None
+
+    seg_dir = segments_dir(log_path)
+    seg_dir.mkdir(parents=True, exist_ok=True)
+    start, end = int(df["timestamp"].min()), int(df["timestamp"].max())
+    ext = {"gzip": "gz", "zstd": "zst"}.get(policy.codec, policy.codec)
+    name = f"{log_path.stem}-{start}-{end}.csv.{ext}"
+    tmp = seg_dir / (name + ".tmp")
+
+    with _open_compressed(tmp, policy.codec, "wb") as dst:
+        dst.write(header + body)
+    os.replace(tmp, seg_dir / name)
+
+    seg = {
+        "file": name,
+        "start": start,
+        "end": end,
+        "rows": int(len(df)),
+        "bytes": (seg_dir / name).stat().st_size,
+        "codec": policy.codec,
+    }
+    segments = [s for s in read_manifest(log_path) if s["file"] != name] + [seg]
+    _write_manifest(log_path, segments)
+    # manifest 기록 후 활성 파일 제거 (다음 append_row가 헤더부터 새로 씀)
+    log_path.unlink()
+    return seg
+
+
+def drop_before(log_path: Path, cutoff: int):
+    """
+    timestamp < cutoff인 원시 행을 삭제합니다.
+    - 전부 오래된 세그먼트는 파일째 삭제, 경계에 걸친 세그먼트는 남길 행만 다시 압축
+    - 활성 CSV는 첫 행이 cutoff보다 오래된 경우에만 다시 씀
+    세그먼트 재작성, manifest 갱신, 활성 CSV 재작성을 모두 log_lock 안에서 실행하므로
+    그 사이에 회전(append_row/rotate_log)이 끼어들어 manifest를 덮어쓰지 않습니다.
+    """
+    with log_lock(log_path):
+        segments = read_manifest(log_path)
+        kept = []
+        for seg in segments:
+            path = segments_dir(log_path) / seg["file"]
+            if seg["end"] < cutoff:
+                path.unlink(missing_ok=True)
+                continue
+            if seg["start"] < cutoff:
+                df = _read_segment(log_path, seg)
+                df = df[df["timestamp"] >= cutoff]
+                tmp = path.with_name(path.name + ".tmp")
+                with _open_compressed(tmp, seg["codec"], "wb") as f:
+                    f.write(df.to_csv(index=False).encode("utf-8"))
+                os.replace(tmp, path)
+                seg = dict(seg, start=int(df["timestamp"].min()), rows=int(len(df)),
+                           bytes=path.stat().st_size)
+            kept.append(seg)
+        if segments:
+            _write_manifest(log_path, kept)
+
+        if log_path.exists():
+            first = _first_timestamp(log_path)
+            if first is not None and first < cutoff:
+                df = read_csv_file(log_path)
+                df = df[df["timestamp"] >= cutoff]
+                tmp = log_path.with_name(log_path.name + ".tmp")
+                df.to_csv(tmp, index=False)
+                os.replace(tmp, log_path)
+
+
+# --- 증분 읽기 커서 ---
+# 누적 집계(피라미드, 피벗, --watch)가 '어디까지 읽었는지'를 timestamp가 아니라 활성 CSV의 바이트 위치로
+# 기억합니다. timestamp 기준이면 같은 초에 기록된 행이나 늦게 들어온(이전 시각의) 행을 놓칩니다.
+# 커서: segments(읽은 시점의 manifest), header/first(활성 CSV의 헤더와 첫 데이터 줄), offset(읽은 끝 위치)
+_TAIL_SCAN_BYTES = 64 * 1024
+
+
+def _line_text(line: bytes) -> str:
+    """ 커서에 저장할 줄 (완전한 줄만, JSON으로 쓸 수 있게 문자열로) """
+    return line.decode("utf-8", "replace") if line.endswith(b"\n") else ""
+
+
+def log_cursor(log_path: Path = DEFAULT_LOG_PATH) -> dict:
+    """ 지금까지 기록된 원시 로그 전체(마지막 완전한 줄까지)를 읽은 것으로 보는 커서 """
+    cursor = {"segments": read_manifest(log_path), "header": "", "first": "", "offset": 0}
+    try:
+        f = open(log_path, "rb")
+    except FileNotFoundError:
+        return cursor
+    with f:
+        header = f.readline()
+        if not header.endswith(b"\n"):
+            return cursor
+        first = f.readline()
+        size = f.seek(0, os.SEEK_END)
+        pos = max(size - _TAIL_SCAN_BYTES, len(header))
+        f.seek(pos)
+        tail = f.read(size - pos)
+    cursor.update(header=_line_text(header), first=_line_text(first), offset=pos + tail.rfind(b"\n") + 1)
+    return cursor
+
+
+def read_since(log_path: Path, cursor: dict) -> Tuple[Optional[pd.DataFrame], Optional[dict]]:
+    """
+    cursor 이후 활성 CSV 끝에 추가된 행만 읽습니다 (timestamp와 관계없이 늦게 들어온 행도 포함).
+    기록 중인 마지막 줄은 다음 호출에서 읽습니다. 반환: (새 행, 없으면 None; 다음 커서)
+    회전, 헤더 확장, 압축(drop_before) 등으로 이어 읽을 수 없으면 다음 커서가 None이며,
+    호출한 쪽은 log_cursor/read_until로 처음부터 다시 계산해야 합니다.
+    """
+    if read_manifest(log_path) != cursor["segments"]:
+        return None, None
+    try:
+        f = open(log_path, "rb")
+    except FileNotFoundError:
+        # 읽던 활성 CSV가 사라짐 = 회전 중 (manifest가 곧 바뀜)
+        return None, (None if cursor["header"] else cursor)
+    with f:
+        header = f.readline()
+        if not header.endswith(b"\n"):
+            return None, (None if cursor["header"] else cursor)
+        first = f.readline()
+        if cursor["header"]:
+            if _line_text(header) != cursor["header"] or \
+                    (cursor["first"] and _line_text(first) != cursor["first"]):
+                return None, None # 다시 쓴 파일
+            offset = cursor["offset"]
+        else:
+            offset = len(header)
+        size = f.seek(0, os.SEEK_END)
+        if size < offset:
+            return None, None
+        f.seek(offset)
+        body = f.read(size - offset)
+    body = body[:body.rfind(b"\n") + 1]
+    nxt = dict(cursor, header=_line_text(header), first=_line_text(first), offset=offset + len(body))
+    if not body:
+        return None, nxt
+    return read_csv_bytes(header, body, log_path.name), nxt
+
+
+def read_until(log_path: Path, cursor: dict) -> Optional[pd.DataFrame]:
+    """
+    cursor 시점까지의 원시 로그 전체(cursor의 세그먼트 + 활성 CSV의 offset까지)를 읽습니다. 없으면 None.
+    읽는 도중 회전 등으로 파일이 바뀌었을 수 있으므로, 결과를 쓰기 전에 read_since(cursor)로 커서가
+    아직 이어지는지 확인해야 합니다.
+    """
+    frames = _read_segments(log_path, cursor["segments"]) if cursor["segments"] else []
+    if cursor["offset"]:
+        try:
+            with open(log_path, "rb") as f:
+                header = f.readline()
+                body = f.read(max(cursor["offset"] - len(header), 0))
+            frames.append(read_csv_bytes(header, body, log_path.name))
+        except FileNotFoundError:
+            pass
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return None
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+# --- 동시 기록 벤치마크 ---
+def _bench_writer(log_path: str, writer_id: int, rows: int, ready, start, done):
+    """ 벤치마크 워커 프로세스: 시작 신호 후 rows행을 append_row로 기록하고 끝난 시각을 보고 """
+    path = Path(log_path)
+    ready.put(writer_id)
+    start.wait()
+    for seq in range(rows):
+        append_row({"timestamp": int(time.time()), "writer": writer_id, "seq": seq,
+                    "ping_ms": 12.345, "download_mbps": 512.25, "upload_mbps": 98.5}, log_path=path)
+    done.put(time.time())
+
+
+def benchmark_writers(log_path: Path = DEFAULT_LOG_PATH, max_writers: int = 8, rows: int = 500,
+                      out: Optional[TextIO] = None) -> List[Tuple[int, float]]:
+    """
+    프로세스 1, 2, 4, ... max_writers개가 동시에 append_row로 rows행씩 기록할 때의 처리량(행/초)을 측정하고,
+    결과 로그에 빠진 행, 찢어진 줄, 중복 헤더가 없는지 확인합니다.
+    log_path와 같은 폴더(같은 파일 시스템)의 임시 로그에 기록하며 실제 로그는 건드리지 않습니다.
+    """
+    counts, w = [], 1
+    while w < max_writers:
+        counts.append(w)
+        w *= 2
+    counts.append(max_writers)
+
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    print(f"\n[Concurrent Write Benchmark] 프로세스당 {rows}행, 임시 로그 위치: {log_path.parent}", file=out)
+    print(f"{'writers':>8} {'rows':>7} {'seconds':>9} {'rows/s':>9} {'torn':>5}", file=out)
+    results = []
+    with tempfile.TemporaryDirectory(dir=log_path.parent) as tmp_dir:
+        for n in counts:
+            path = Path(tmp_dir) / f"bench_{n}.csv"
+            ready, start, done = multiprocessing.Queue(), multiprocessing.Event(), multiprocessing.Queue()
+            procs = [multiprocessing.Process(target=_bench_writer,
+                                             args=(str(path), k, rows, ready, start, done))
+                     for k in range(n)]
+            for proc in procs:
+                proc.start()
+            for _ in procs:
+                ready.get() # 프로세스 기동 시간은 제외하고 모두 준비된 뒤 동시에 시작
+            t0 = time.time()
+            start.set()
+            ends = [done.get() for _ in procs]
+            for proc in procs:
+                proc.join()
+            elapsed = max(max(ends) - t0, 1e-6)
+
+            with open(path, "rb") as f:
+                header = f.readline()
+                body, torn = drop_torn_lines(header, f.read())
+            written = len(read_csv_bytes(header, body, skip_torn=False))
+            results.append((n, elapsed))
+            print(f"{n:>8} {written:>7} {elapsed:>9.3f} {written / elapsed:>9.0f} {torn:>5}", file=out)
+            if written != n * rows or torn:
+                print(f"[경고] writers={n}: 기대 {n * rows}행, 기록 {written}행, 손상 {torn}줄", file=out)
+    return results
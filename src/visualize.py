@@ -4,6 +4,7 @@ import os
 import sys
 from pathlib import Path
 import datetime as dt
+from typing import Optional, TextIO
 
 # GUI 없는 서버에서도 저장 가능하도록 Agg 백엔드 사용
 import matplotlib
@@ -13,11 +14,25 @@ if os.environ.get("DISPLAY", "") == "":
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from .aggregate import partial_aggregate, update_pivot, means_from_partial, heatmap_from_partial
+from .rollup import total_measurements
+from .analysis import AnalysisResult, new_meta
+from . import pyramid
+
 
 def _ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
 
+def _default_plot_dir() -> Path:
+    # .exe로 실행 시 data 폴더 경로를 ROOT 기준으로 찾음
+    if getattr(sys, 'frozen', False):
+        ROOT = Path(sys.executable).parent
+    else:
+        ROOT = Path.cwd()
+    return ROOT / "data" / "plots"
+
+
 def plot_logs(df: pd.DataFrame, save_dir: Path | None = None, show: bool = True):
     """
     df를 시간축 기준으로 정렬하여 ping/download/upload 각각 라인 차트 생성.
@@ -37,13 +52,8 @@ def plot_logs(df: pd.DataFrame, save_dir: Path | None = None, show: bool = True)
     df["time"] = df["timestamp"].apply(lambda t: dt.datetime.fromtimestamp(int(t)))
     df = df.sort_values("time")
 
-    # .exe로 실행 시 data 폴더 경로를 ROOT 기준으로 찾음
     if save_dir is None:
-        if getattr(sys, 'frozen', False):
-            ROOT = Path(sys.executable).parent
-        else:
-            ROOT = Path.cwd()
-        save_dir = ROOT / "data" / "plots"
+        save_dir = _default_plot_dir()
         
     _ensure_dir(save_dir)
 
@@ -59,6 +69,9 @@ def plot_logs(df: pd.DataFrame, save_dir: Path | None = None, show: bool = True)
             continue
         plt.figure()
         plt.plot(df["time"], df[col])
+        # 시간별 집계 구간(rollup.load_combined)은 최솟값~최댓값 범위를 함께 표시
+        if f"{col}_min" in df.columns:
+            plt.fill_between(df["time"], df[f"{col}_min"], df[f"{col}_max"], alpha=0.2)
         plt.title(title)
         plt.xlabel("Time")
         plt.ylabel(title)
@@ -78,55 +91,108 @@ def plot_logs(df: pd.DataFrame, save_dir: Path | None = None, show: bool = True)
         for p in outputs:
             print(f" - {p}")
 
-def analyze_logs(df: pd.DataFrame, by: str = "all"):
+def plot_range(log_path: Path, start: Optional[int] = None, end: Optional[int] = None,
+               width_px: Optional[int] = None, save_dir: Path | None = None, show: bool = True):
     """
-    df를 분석하여 시간대별, 요일별 평균 속도 등 통계 리포트를 출력합니다.
-    by: 'hourly', 'daily', 'all' 중 선택
+    [start, end) 구간(기본: 전체)을 해상도 피라미드에서 읽어 plot_logs로 그립니다.
+    구간 길이와 그림 폭(width_px, 기본: matplotlib 기본 그림 폭)에 맞는 해상도를 자동으로 고릅니다.
     """
+    if width_px is None:
+        width_px = int(plt.rcParams["figure.figsize"][0] * plt.rcParams["figure.dpi"])
+    df, level = pyramid.query(log_path, start, end, width_px)
     if df is None or df.empty:
-        print("No data to analyze.")
+        print("No data to plot.")
         return
+    print(f"해상도 {level} 버킷 {len(df)}개를 사용합니다.")
+    plot_logs(df, save_dir=save_dir, show=show)
 
-    df = df.copy()
-    if "timestamp" not in df.columns:
-        print("'timestamp' 컬럼이 없습니다.")
+
+def plot_heatmaps(result: AnalysisResult, save_dir: Path | None = None, show: bool = True):
+    """
+    AnalysisResult.heatmap의 지표별 요일 x 시간대 격자를 heatmap_{지표}.png로 저장합니다 (기본: data/plots/).
+    속도는 높을수록, 지연/손실은 낮을수록 초록색입니다.
+    """
+    if not result.heatmap:
+        print("No heatmap to plot.")
         return
+    if save_dir is None:
+        save_dir = _default_plot_dir()
+    _ensure_dir(save_dir)
 
-    df["time"] = df["timestamp"].apply(lambda t: dt.datetime.fromtimestamp(int(t)))
-    df["hour"] = df["time"].dt.hour
-    df["day_of_week"] = df["time"].dt.day_name()
-
-    print("\n--- NetSpeed Analysis Report ---")
-
-    # 전체 평균 (항상 표시)
-    print("\n[Overall Average]")
-    print(f"Total Measurements: {len(df)}")
-    print(f"Ping: {df['ping_ms'].mean():.2f} ms")
-    print(f"Download: {df['download_mbps'].mean():.2f} Mbps")
-    print(f"Upload: {df['upload_mbps'].mean():.2f} Mbps")
-
-    # === [4차 발표 내용] 인터넷 상품별 속도 기준표 ===
-    print("\n[참고: 일반적인 인터넷 상품별 속도 기준 (대칭형 기준)]")
-    print("---------------------------------------------------------")
-    print("| 상품명       | 다운로드/업로드 (Mbps) | 핑 (ms)      |")
-    print("---------------------------------------------------------")
-    print("| 100M 광랜    | 80 - 100             | 1 - 10       |")
-    print("| 500M 기가라이트| 400 - 500           | 1 - 5        |")
-    print("| 1G 기가      | 850 - 950            | 1 - 5        |")
-    print("---------------------------------------------------------")
-    # === [여기까지] ===
-
-    if by in ["hourly", "all"]:
-        # 시간대별 평균
-        print("\n[Hourly Average]")
-        hourly_avg = df.groupby("hour")[["ping_ms", "download_mbps", "upload_mbps"]].mean()
-        print(hourly_avg.to_string()) # .to_string() for better alignment
-
-    if by in ["daily", "all"]:
-        # 요일별 평균
-        print("\n[Day of Week Average]")
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        daily_avg = df.groupby("day_of_week")[["ping_ms", "download_mbps", "upload_mbps"]].mean().reindex(days)
-        print(daily_avg.to_string())
-
-    print("\n--- End of Report ---")
\ No newline at end of file
+    outputs = []
+    for m, grid in result.heatmap.items():
+        plt.figure(figsize=(10, 3.5))
+        cmap = "RdYlGn" if m.endswith("_mbps") else "RdYlGn_r"
+        plt.imshow(grid.to_numpy(dtype="float64"), aspect="auto", cmap=cmap)
+        plt.colorbar(label=m)
+        plt.xticks(range(24), [str(h) for h in grid.columns])
+        plt.yticks(range(len(grid.index)), [d[:3] for d in grid.index])
+        plt.title(f"{m} by Day of Week x Hour")
+        plt.xlabel("Hour")
+        plt.tight_layout()
+
+        out = save_dir / f"heatmap_{m}.png"
+        plt.savefig(out)
+
+        outputs.append(out)
+        if matplotlib.get_backend().lower() != "agg" and show:
+            plt.show()
+        plt.close()
+
+    print("Saved heatmaps:")
+    for p in outputs:
+        print(f" - {p}")
+
+
+def result_from_partial(merged: dict, by: str, source: str,
+                         total: Optional[int] = None) -> AnalysisResult:
+    """ 합친 부분 집계(시간대 x 요일 피벗) 하나에서 by에 맞는 표를 모두 계산합니다. """
+    overall, hourly_avg, daily_avg = means_from_partial(merged)
+    return AnalysisResult(merged["rows"] if total is None else total, overall,
+                          hourly_avg if by in ["hourly", "all"] else None,
+                          daily_avg if by in ["daily", "all"] else None,
+                          new_meta(by, source),
+                          heatmap_from_partial(merged) if by in ["heatmap", "all"] else None)
+
+
+def analyze_logs(df: pd.DataFrame, by: str = "all", out: Optional[TextIO] = None,
+                 quiet: bool = False) -> Optional[AnalysisResult]:
+    """
+    df를 분석하여 시간대별, 요일별, 요일 x 시간대 평균 속도 등 통계를 AnalysisResult로 반환하고 리포트를 출력합니다.
+    세 표 모두 시간대 x 요일 피벗(aggregate.partial_aggregate) 한 번으로 계산합니다.
+    by: 'hourly', 'daily', 'heatmap', 'all' 중 선택
+    out: 출력 대상 스트림 (기본: sys.stdout). 스레드에서 redirect_stdout 없이 결과를 받을 때 사용
+    quiet: True이면 출력하지 않고 결과만 반환 (GUI, 내보내기용)
+    df는 원시 로그 또는 rollup.load_combined 결과(시간별 집계 + 원시)를 받을 수 있습니다.
+    """
+    if df is None or df.empty:
+        print("No data to analyze.", file=out)
+        return None
+
+    if "timestamp" not in df.columns:
+        print("'timestamp' 컬럼이 없습니다.", file=out)
+        return None
+
+    result = result_from_partial(partial_aggregate(df), by, "dataframe", total_measurements(df))
+    if not quiet:
+        result.render_text(out)
+    return result
+
+
+def analyze_pivot(log_path: Path, by: str = "all", workers: Optional[int] = None,
+                  rebuild: bool = False, out: Optional[TextIO] = None,
+                  quiet: bool = False) -> Optional[AnalysisResult]:
+    """
+    analyze_logs와 같은 결과를 로그 옆의 누적 피벗 캐시(aggregate.update_pivot)에서 계산합니다.
+    마지막 분석 이후 추가된 행만 읽어 피벗에 합치므로 기록이 길어도 비용은 새 행 수에 비례합니다.
+    피벗을 다시 만들어야 하면(처음, 회전/압축 후, rebuild=True) workers개 프로세스로 계산합니다.
+    """
+    merged = update_pivot(log_path, workers=workers or 1, rebuild=rebuild)
+    if merged is None or merged["rows"] == 0 or merged["slot"] is None:
+        print("No data to analyze.", file=out)
+        return None
+    result = result_from_partial(merged, by, "pivot")
+    result.meta["pivot"] = merged["mode"]
+    if not quiet:
+        result.render_text(out)
+    return result
@@ -0,0 +1,159 @@
+# src/watch.py
+from __future__ import annotations
+import datetime as dt
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, TextIO
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from .aggregate import partial_aggregate, merge_partials, update_pivot
+from .compare import parse_range
+from .pyramid import update_pyramid, read_buckets, bucketize, merge_buckets, buckets_as_rows
+from .storage import read_since, DEFAULT_LOG_PATH
+from .visualize import result_from_partial, plot_heatmaps, plot_logs
+
+# 로그 증가를 확인하고 리포트/그래프를 다시 그리는 기본 간격 (초)
+DEFAULT_REFRESH_S = 5.0
+
+
+class LogTail:
+    """
+    로그에 새로 추가된 행만 읽습니다 (--watch).
+    읽은 위치는 누적 집계(update_pivot/update_pyramid)가 저장한 커서(storage.read_since)에서 이어 가므로
+    비용은 기록 전체가 아니라 새로 들어온 데이터량에 비례하고, timestamp와 관계없이 추가된 행을 모두 돌려줍니다
+    (같은 초에 기록된 행, 늦게 들어온 행 포함).
+    회전/헤더 확장/압축으로 이어 읽을 수 없으면 stale이 True가 되며, 호출한 쪽은 누적 집계를 처음부터
+    다시 계산하고 새 LogTail을 만들어야 합니다.
+    """
+
+    def __init__(self, log_path: Path = DEFAULT_LOG_PATH, cursor: Optional[dict] = None):
+        self.log_path = log_path
+        self.cursor = cursor
+        self.stale = cursor is None
+
+    def poll(self) -> Optional[pd.DataFrame]:
+        """ 마지막 호출 이후 추가된 행. 없거나 이어 읽을 수 없으면(stale) None. """
+        if self.stale:
+            return None
+        df, cursor = read_since(self.log_path, self.cursor)
+        if cursor is None:
+            self.stale = True
+            return None
+        self.cursor = cursor
+        if df is None or df.empty or "timestamp" not in df.columns:
+            return None
+        return df.reset_index(drop=True)
+
+
+def _clear_screen(out: Optional[TextIO]):
+    stream = out or sys.stdout
+    if stream.isatty():
+        print("\033[2J\033[H", end="", file=out)
+
+
+def watch_analysis(log_path: Path = DEFAULT_LOG_PATH, by: str = "all",
+                   refresh_s: float = DEFAULT_REFRESH_S, workers: Optional[int] = None,
+                   rebuild: bool = False, stop_event: Optional[threading.Event] = None,
+                   out: Optional[TextIO] = None):
+    """
+    --analyze --watch: 부분 집계(시간대 x 요일 피벗)를 메모리에 두고 refresh_s마다 새로 추가된 행만
+    집계해 합친 뒤 리포트를 다시 출력합니다 (by='heatmap'이면 히트맵 PNG도 갱신).
+    새 행이 없으면 아무것도 계산하지 않습니다. 시작할 때는 누적 피벗 캐시(update_pivot, rebuild=True면 다시 만듦)에서
+    전체 기록을 불러오고, 회전/압축 등으로 이어 읽을 수 없게 되면 update_pivot으로 처음부터 다시 계산합니다.
+    stop_event가 설정되거나 Ctrl+C를 누르면 종료합니다.
+    """
+    stop_event = stop_event or threading.Event()
+
+    def reload(rebuild: bool):
+        merged = update_pivot(log_path, workers=workers or 1, rebuild=rebuild) \
+            or {"rows": 0, "slot": None, "last_ts": None}
+        return merged, LogTail(log_path, merged.get("cursor"))
+
+    merged, tail = reload(rebuild)
+    new_rows = None
+    try:
+        while True:
+            new = tail.poll()
+            note = ""
+            if tail.stale:
+                # 회전/압축 등으로 이어 읽을 수 없음: 누적 피벗을 처음부터 다시 계산
+                merged, tail = reload(False)
+                note = ", 로그가 바뀌어 다시 계산"
+            elif new is not None:
+                merged = merge_partials([merged, partial_aggregate(new)])
+            if new_rows is None or new is not None or note:
+                new_rows = 0 if new is None else len(new)
+                _clear_screen(out)
+                print(f"[watch] {log_path.name} {dt.datetime.now():%H:%M:%S} 갱신, 새 행 {new_rows}개{note} "
+                      f"({refresh_s:g}초마다 확인, 중지하려면 Ctrl+C)", file=out)
+                if merged["slot"] is None:
+                    print("No data to analyze.", file=out)
+                else:
+                    result = result_from_partial(merged, by, "watch")
+                    result.render_text(out)
+                    if by == "heatmap":
+                        plot_heatmaps(result, show=False)
+            if stop_event.wait(refresh_s):
+                break
+    except KeyboardInterrupt:
+        print("\nStopped.", file=out)
+
+
+def watch_plot(log_path: Path = DEFAULT_LOG_PATH, range_text: Optional[str] = None,
+               width_px: Optional[int] = None, refresh_s: float = DEFAULT_REFRESH_S,
+               save_dir: Optional[Path] = None, stop_event: Optional[threading.Event] = None):
+    """
+    --plot --watch: 해상도 피라미드에서 읽은 버킷 시계열을 메모리에 두고, refresh_s마다 새 행만
+    같은 해상도 버킷으로 묶어 끝에 합친 뒤 PNG를 다시 그립니다. 해상도는 시작할 때 고른 것을 유지합니다.
+    range_text가 '7d..now'처럼 현재 시각 기준이면 구간이 함께 이동하고 구간을 벗어난 버킷은 버립니다.
+    회전/압축 등으로 이어 읽을 수 없게 되면 피라미드를 처음부터 다시 만들고 버킷을 다시 읽습니다.
+    """
+    if width_px is None:
+        width_px = int(plt.rcParams["figure.figsize"][0] * plt.rcParams["figure.dpi"])
+    stop_event = stop_event or threading.Event()
+    start, end = parse_range(range_text) if range_text else (None, None)
+    state = update_pyramid(log_path)
+    if state is None:
+        print("No data to plot.")
+        return
+    buckets, level, seconds = read_buckets(log_path, state, start, end, width_px)
+    tail = LogTail(log_path, state["cursor"])
+    print(f"해상도 {level} 버킷 {len(buckets)}개를 사용합니다. "
+          f"{refresh_s:g}초마다 새 행을 반영합니다 (중지하려면 Ctrl+C).")
+    changed = True
+    try:
+        while True:
+            new = tail.poll()
+            if range_text:
+                start, end = parse_range(range_text) # 'now' 기준 구간 이동
+            if tail.stale:
+                # 회전/압축 등으로 이어 읽을 수 없음: 피라미드를 처음부터 다시 만들고 구간을 다시 읽음
+                state = update_pyramid(log_path)
+                if state is not None:
+                    buckets, level, seconds = read_buckets(log_path, state, start, end, width_px)
+                    tail = LogTail(log_path, state["cursor"])
+                    changed = True
+            elif new is not None:
+                if start is not None:
+                    new = new[(new["timestamp"] >= start) & (new["timestamp"] < end)]
+                if not new.empty:
+                    # 늦게 들어온 행은 이전 버킷에 합쳐질 수 있으므로 전체를 다시 합침 (버킷 수는 그림 폭 이하)
+                    buckets = merge_buckets(pd.concat([buckets, bucketize(new, seconds)], ignore_index=True))
+                    changed = True
+            if start is not None and not buckets.empty:
+                lo = start // seconds * seconds
+                if buckets["timestamp"].iloc[0] < lo: # 구간 밖으로 밀려난 버킷
+                    buckets = buckets[buckets["timestamp"] >= lo].reset_index(drop=True)
+                    changed = True
+            if changed:
+                print(f"[watch] {dt.datetime.now():%H:%M:%S} 버킷 {len(buckets)}개, "
+                      f"새 행 {0 if new is None else len(new)}개")
+                plot_logs(buckets_as_rows(buckets), save_dir=save_dir, show=False)
+                changed = False
+            if stop_event.wait(refresh_s):
+                break
+    except KeyboardInterrupt:
+        print("\nStopped.")
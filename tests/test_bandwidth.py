@@ -0,0 +1,121 @@
+# tests/test_bandwidth.py
+from __future__ import annotations
+
+import http.server
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from test_probes import _serve
+
+from src.bandwidth import BandwidthCap, StreamPlan, converged, measure_capped
+
+IMAGE_BYTES = 64 * 1024 * 1024
+SLICE_BYTES = 16 * 1024
+
+
+def _speedtest_server(delay_s: float = 0.0) -> http.server.ThreadingHTTPServer:
+    """
+    speedtest.net 서버 흉내: GET random*.jpg는 큰 본문을 SLICE_BYTES씩 보내고(delay_s마다 한 조각),
+    POST upload.php는 본문을 모두 읽고 'size=N'으로 답합니다. 요청 수는 server.hits에 셉니다.
+    """
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def do_GET(self):
+            server.hits["GET"] += 1
+            self.send_response(200)
+            self.send_header("Content-Length", str(IMAGE_BYTES))
+            self.end_headers()
+            chunk = b"\0" * SLICE_BYTES
+            try:
+                for _ in range(IMAGE_BYTES // SLICE_BYTES):
+                    self.wfile.write(chunk)
+                    if delay_s:
+                        time.sleep(delay_s)
+            except OSError:
+                pass # 클라이언트가 한도에 닿아 연결을 끊음
+
+        def do_POST(self):
+            server.hits["POST"] += 1
+            left = int(self.headers.get("Content-Length", 0))
+            try:
+                while left > 0:
+                    got = self.rfile.read(min(left, SLICE_BYTES))
+                    if not got:
+                        return # 업로드 도중 중단
+                    left -= len(got)
+                body = f"size={self.headers['Content-Length']}".encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.hits = Counter()
+    return server
+
+
+def _upload_url(port: int) -> str:
+    return f"http://127.0.0.1:{port}/speedtest/upload.php"
+
+
+def test_streams_are_summed_across_servers():
+    a, b = _speedtest_server(delay_s=0.01), _speedtest_server(delay_s=0.01)
+    cap = BandwidthCap(max_bytes=4_000_000, max_seconds=5, tolerance=0)
+    with _serve(a) as port_a, _serve(b) as port_b:
+        plan = StreamPlan(streams=3, urls=[_upload_url(port_a), _upload_url(port_b)])
+        result = measure_capped(cap, plan=plan)
+
+    assert result["servers"] == 2
+    assert result["streams"] == 6
+    # 서버마다 스트림 수만큼 다운로드 연결이 열리고, 업로드도 양쪽 서버로 나뉨
+    assert a.hits["GET"] >= 3 and b.hits["GET"] >= 3
+    assert a.hits["POST"] >= 1 and b.hits["POST"] >= 1
+    assert result["download_mbps"] > 0 and result["upload_mbps"] > 0
+    assert 0 < result["bytes_used"] <= cap.max_bytes
+
+
+@pytest.mark.parametrize("max_bytes", [300_000, 3_000_000])
+def test_bytes_used_stays_within_cap(max_bytes):
+    cap = BandwidthCap(max_bytes=max_bytes, max_seconds=5, tolerance=0)
+    with _serve(_speedtest_server()) as port:
+        result = measure_capped(cap, plan=StreamPlan(streams=4, urls=[_upload_url(port)]))
+    assert 0 < result["bytes_used"] <= max_bytes
+
+
+def test_stop_event_aborts_within_a_second():
+    server = _speedtest_server(delay_s=0.01)
+    cap = BandwidthCap(max_seconds=60, tolerance=0)
+    stop, stopped_at = threading.Event(), []
+
+    def stop_now():
+        stopped_at.append(time.perf_counter())
+        stop.set()
+
+    with _serve(server) as port:
+        timer = threading.Timer(1.5, stop_now)
+        timer.start()
+        result = measure_capped(cap, stop, plan=StreamPlan(streams=2, urls=[_upload_url(port)]))
+        returned_at = time.perf_counter()
+        timer.join()
+
+    assert stopped_at and returned_at - stopped_at[0] < 1.0
+    assert server.hits["POST"] == 0 # 중지되면 업로드는 시작하지 않음
+    assert result["bytes_used"] > 0
+
+
+def test_converged_needs_enough_stable_samples():
+    cap = BandwidthCap(tolerance=0.05, min_windows=4)
+    assert not converged([100.0, 100.0, 100.0], cap)
+    assert converged([100.0, 101.0, 99.0, 100.0], cap)
+    assert not converged([10.0, 200.0, 50.0, 400.0], cap)
+    assert not converged([100.0] * 10, BandwidthCap(tolerance=0))
@@ -0,0 +1,47 @@
+# tests/test_pivot.py
+from __future__ import annotations
+
+import numpy as np
+
+from src.aggregate import update_pivot, parallel_partials
+from src.storage import append_row
+
+T0 = 1_700_000_000
+
+
+def _row(ts: int, ping: float) -> dict:
+    return {"timestamp": ts, "ping_ms": ping, "download_mbps": 100.0 + ping, "upload_mbps": 10.0}
+
+
+def _assert_same(a: dict, b: dict):
+    assert a["rows"] == b["rows"]
+    assert np.allclose(a["slot"].sort_index().to_numpy(), b["slot"].sort_index().to_numpy(), equal_nan=True)
+
+
+def test_late_and_same_second_rows_are_appended(tmp_path):
+    log_path = tmp_path / "logs.csv"
+    for i in range(50):
+        append_row(_row(T0 + i * 600, i % 9), log_path)
+    first = update_pivot(log_path)
+    assert first["mode"] == "rebuilt" and first["rows"] == 50
+    last_ts = first["last_ts"]
+
+    append_row(_row(last_ts, 40.0), log_path)          # 마지막 행과 같은 초
+    append_row(_row(last_ts - 3 * 3600, 80.0), log_path)  # 늦게 들어온 이전 시각 행
+    merged = update_pivot(log_path)
+    assert merged["mode"] == "appended"
+    assert merged["rows"] == 52
+    _assert_same(merged, parallel_partials(log_path, workers=1))
+
+    assert update_pivot(log_path)["mode"] == "cached"
+
+
+def test_header_extension_rebuilds(tmp_path):
+    log_path = tmp_path / "logs.csv"
+    for i in range(10):
+        append_row(_row(T0 + i * 60, 5.0), log_path)
+    update_pivot(log_path)
+    append_row(dict(_row(T0, 7.0), jitter_ms=1.5), log_path)  # 새 컬럼: 활성 CSV를 다시 씀
+    merged = update_pivot(log_path)
+    assert merged["mode"] == "rebuilt" and merged["rows"] == 11
+    _assert_same(merged, parallel_partials(log_path, workers=1))
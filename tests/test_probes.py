@@ -0,0 +1,161 @@
+# tests/test_probes.py
+from __future__ import annotations
+
+import asyncio
+import http.server
+import math
+import socket
+import socketserver
+import struct
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from src.measure import ProbeSet, probe_dns, probe_http, probe_tcp
+
+TS = 1_700_000_000
+
+
+@contextmanager
+def _serve(server: socketserver.BaseServer):
+    """ 로컬 대역 서버를 데몬 스레드에서 실행하고 끝나면 닫습니다. """
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _dns_server(rcode: int = 0, answer: bool = True) -> socketserver.UDPServer:
+    """ 질의 ID를 그대로 돌려주는 대역 리졸버 (answer=False면 응답하지 않음) """
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data, sock = self.request
+            if answer:
+                qid = struct.unpack(">H", data[:2])[0]
+                sock.sendto(struct.pack(">HHHHHH", qid, 0x8180 | rcode, 1, 0, 0, 0) + data[12:],
+                            self.client_address)
+    return socketserver.UDPServer(("127.0.0.1", 0), Handler)
+
+
+def _http_server() -> http.server.HTTPServer:
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+    return http.server.HTTPServer(("127.0.0.1", 0), Handler)
+
+
+def _tcp_server(reply: bool) -> socketserver.TCPServer:
+    """ 연결을 받자마자 닫거나(reply=True), 응답 없이 클라이언트가 닫을 때까지 기다리는(시간 초과용) 서버 """
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            if not reply:
+                while self.request.recv(1024):
+                    pass
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def _closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _run(probes: ProbeSet) -> list:
+    return asyncio.run(probes.run_async(TS))
+
+
+def _assert_failed(row: dict):
+    assert math.isnan(row["ms"])
+    assert row["error"]
+
+
+# --- DNS ---
+def test_dns_answer():
+    with _serve(_dns_server()) as port:
+        assert asyncio.run(probe_dns(f"127.0.0.1:{port}")) >= 0
+
+
+def test_dns_error_rcode_row():
+    with _serve(_dns_server(rcode=3)) as port:
+        row, = _run(ProbeSet(dns=[f"127.0.0.1:{port}"], timeout_s=2))
+    assert row["probe"] == "dns" and row["target"] == f"127.0.0.1:{port}"
+    _assert_failed(row)
+    assert "3" in row["error"]
+
+
+def test_dns_timeout_row():
+    with _serve(_dns_server(answer=False)) as port:
+        row, = _run(ProbeSet(dns=[f"127.0.0.1:{port}"], timeout_s=0.3))
+    _assert_failed(row)
+    assert row["error"] == "TimeoutError"
+
+
+# --- TCP 연결 ---
+def test_tcp_connect():
+    with _serve(_tcp_server(reply=True)) as port:
+        row, = _run(ProbeSet(tcp=[f"127.0.0.1:{port}"]))
+    assert row == {"timestamp": TS, "probe": "tcp", "target": f"127.0.0.1:{port}",
+                   "ms": row["ms"], "error": ""}
+    assert row["ms"] >= 0
+
+
+def test_tcp_refused_row():
+    row, = _run(ProbeSet(tcp=[f"127.0.0.1:{_closed_port()}"], timeout_s=2))
+    _assert_failed(row)
+
+
+def test_tcp_timeout_row(monkeypatch):
+    async def never(*args, **kwargs):
+        await asyncio.sleep(10)
+    monkeypatch.setattr(asyncio, "open_connection", never) # SYN에 응답하지 않는 호스트 대신
+    row, = _run(ProbeSet(tcp=["127.0.0.1:9"], timeout_s=0.2))
+    _assert_failed(row)
+    assert row["error"] == "TimeoutError"
+
+
+# --- HTTP TTFB ---
+def test_http_ttfb():
+    with _serve(_http_server()) as port:
+        assert asyncio.run(probe_http(f"http://127.0.0.1:{port}/health?x=1")) >= 0
+
+
+def test_http_closed_without_response_row():
+    with _serve(_tcp_server(reply=True)) as port:
+        row, = _run(ProbeSet(http=[f"http://127.0.0.1:{port}/"], timeout_s=2))
+    _assert_failed(row)
+    assert "닫혔습니다" in row["error"]
+
+
+def test_http_timeout_row():
+    with _serve(_tcp_server(reply=False)) as port:
+        row, = _run(ProbeSet(http=[f"http://127.0.0.1:{port}/"], timeout_s=0.3))
+    _assert_failed(row)
+    assert row["error"] == "TimeoutError"
+
+
+def test_http_bad_scheme():
+    with pytest.raises(ValueError):
+        asyncio.run(probe_http("ftp://127.0.0.1/"))
+
+
+def test_probes_run_concurrently():
+    """ 시간 초과 프로브가 있어도 다른 프로브 결과는 정상으로 기록되고 행 순서는 dns, tcp, http """
+    with _serve(_dns_server(answer=False)) as dns_port, _serve(_http_server()) as http_port:
+        rows = _run(ProbeSet(dns=[f"127.0.0.1:{dns_port}"], tcp=[f"127.0.0.1:{http_port}"],
+                             http=[f"http://127.0.0.1:{http_port}/"], timeout_s=0.5))
+    assert [r["probe"] for r in rows] == ["dns", "tcp", "http"]
+    _assert_failed(rows[0])
+    assert rows[1]["error"] == "" and rows[2]["error"] == ""
@@ -0,0 +1,115 @@
+# tests/test_storage.py
+from __future__ import annotations
+
+import multiprocessing
+import threading
+
+import pytest
+
+from src.storage import append_row, drop_torn_lines, load_logs, log_lock, read_header
+
+T0 = 1_700_000_000
+WRITERS = 4
+ROWS = 50
+HEADER = b"timestamp,ping_ms,download_mbps\n"
+
+
+def _row(ts: int, **extra) -> dict:
+    return {"timestamp": ts, "ping_ms": 10.0, "download_mbps": 100.0, **extra}
+
+
+def _write_rows(log_path, writer: int, extra: bool):
+    """ 프로세스 하나가 ROWS개 행을 기록합니다. extra면 행마다 이 프로세스만 쓰는 컬럼을 더함 """
+    for i in range(ROWS):
+        columns = {f"extra_{writer}": float(i)} if extra else {}
+        append_row(_row(T0 + writer * ROWS + i, **columns), log_path)
+
+
+def _run_writers(log_path, extra: bool = False):
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_write_rows, args=(log_path, w, extra)) for w in range(WRITERS)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=60)
+    assert all(proc.exitcode == 0 for proc in procs)
+
+
+def test_concurrent_writers_keep_every_row(tmp_path):
+    log_path = tmp_path / "logs.csv"
+    _run_writers(log_path)
+
+    data = log_path.read_bytes()
+    lines = data.splitlines()
+    assert lines[0] == HEADER.rstrip() and lines.count(lines[0]) == 1
+    assert len(lines) == 1 + WRITERS * ROWS and data.endswith(b"\n")
+    header, body = data.split(b"\n", 1)
+    assert drop_torn_lines(header, body) == (body, 0)
+    df = load_logs(log_path=log_path)
+    assert sorted(df["timestamp"]) == list(range(T0, T0 + WRITERS * ROWS))
+
+
+def test_header_extends_under_lock(tmp_path):
+    log_path = tmp_path / "logs.csv"
+    _run_writers(log_path, extra=True)
+
+    header = read_header(log_path)
+    assert header[:3] == ["timestamp", "ping_ms", "download_mbps"]
+    assert sorted(header[3:]) == [f"extra_{w}" for w in range(WRITERS)]
+    df = load_logs(log_path=log_path)
+    assert len(df) == WRITERS * ROWS
+    for w in range(WRITERS):
+        # 다른 프로세스가 헤더를 다시 쓰는 동안에도 자기 컬럼 값은 모두 남아 있어야 함
+        mine = df[(df["timestamp"] - T0) // ROWS == w]
+        assert list(mine[f"extra_{w}"]) == [float(i) for i in range(ROWS)]
+        assert df.loc[df.index.difference(mine.index), f"extra_{w}"].isna().all()
+
+
+def test_lock_excludes_other_threads(tmp_path):
+    log_path = tmp_path / "logs.csv"
+    with log_lock(log_path):
+        with log_lock(log_path): # 같은 스레드에서는 다시 잡을 수 있음
+            pass
+        errors = []
+
+        def try_lock():
+            try:
+                with log_lock(log_path, blocking=False):
+                    pass
+            except BlockingIOError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+    assert len(errors) == 1
+    with log_lock(log_path, blocking=False):
+        pass
+
+
+@pytest.mark.parametrize("body, kept, skipped", [
+    # 개행으로 끝나지 않은 마지막 줄 (기록 도중 끊김)
+    (b"1,10.0,100.0\n2,11.0,1", b"1,10.0,100.0\n", 1),
+    # 필드 수가 다른 줄: 끊긴 줄, 두 줄이 붙은 줄
+    (b"1,10.0,100.0\n2,11.0\n3,12.0,100.03,12.0,100.0\n4,13.0,100.0\n",
+     b"1,10.0,100.0\n4,13.0,100.0\n", 2),
+    # 본문 중간에 다시 나온 헤더 (두 프로세스가 빈 파일에 동시에 헤더를 씀)
+    (b"1,10.0,100.0\n" + HEADER + b"2,11.0,100.0\n", b"1,10.0,100.0\n2,11.0,100.0\n", 1),
+    # 빈 줄과 CRLF 줄은 정상으로 둠
+    (b"1,10.0,100.0\r\n\n2,11.0,100.0\n", b"1,10.0,100.0\r\n\n2,11.0,100.0\n", 0),
+    # 따옴표가 있으면 csv 모듈로 판정
+    (b'1,"10.0",100.0\n2,"11,0"\n3,12.0,100.0\n4,1', b'1,"10.0",100.0\n3,12.0,100.0\n', 2),
+])
+def test_drop_torn_lines(body, kept, skipped):
+    assert drop_torn_lines(HEADER, body) == (kept, skipped)
+
+
+def test_append_after_torn_write_keeps_new_row(tmp_path, capsys):
+    log_path = tmp_path / "logs.csv"
+    log_path.write_bytes(HEADER + b"1,10.0,100.0\n2,11.")
+    append_row(_row(3), log_path)
+
+    assert log_path.read_bytes().endswith(b"2,11.\n3,10.0,100.0\r\n") # 끊긴 줄을 닫고 새 행을 씀
+    df = load_logs(log_path=log_path)
+    assert list(df["timestamp"]) == [1, 3]
+    assert "1개" in capsys.readouterr().out
@@ -0,0 +1,35 @@
+# tests/test_watch.py
+from __future__ import annotations
+
+from src.storage import append_row, log_cursor, rotate_log
+from src.watch import LogTail
+
+T0 = 1_700_000_000
+
+
+def _row(ts: int) -> dict:
+    return {"timestamp": ts, "ping_ms": 10.0, "download_mbps": 100.0, "upload_mbps": 10.0}
+
+
+def test_tail_returns_rows_regardless_of_timestamp(tmp_path):
+    log_path = tmp_path / "logs.csv"
+    for i in range(5):
+        append_row(_row(T0 + i), log_path)
+    tail = LogTail(log_path, log_cursor(log_path))
+    assert tail.poll() is None
+
+    append_row(_row(T0 + 4), log_path)   # 같은 초
+    append_row(_row(T0 - 60), log_path)  # 늦게 들어온 행
+    new = tail.poll()
+    assert list(new["timestamp"]) == [T0 + 4, T0 - 60]
+    assert tail.poll() is None and not tail.stale
+
+
+def test_tail_goes_stale_after_rotation(tmp_path):
+    log_path = tmp_path / "logs.csv"
+    append_row(_row(T0), log_path)
+    tail = LogTail(log_path, log_cursor(log_path))
+    rotate_log(log_path, force=True)
+    append_row(_row(T0 + 1), log_path)
+    assert tail.poll() is None
+    assert tail.stale